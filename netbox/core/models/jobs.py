@@ -1,11 +1,12 @@
 import uuid
+from functools import partial
 
 import django_rq
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -225,9 +226,12 @@ class Job(models.Model):
             job_id=uuid.uuid4()
         )
 
+        # Enqueue the job only once the Job has been committed, so that it is visible to the worker
         if schedule_at:
-            queue.enqueue_at(schedule_at, func, job_id=str(job.job_id), job=job, **kwargs)
+            transaction.on_commit(
+                partial(queue.enqueue_at, schedule_at, func, job_id=str(job.job_id), job=job, **kwargs)
+            )
         else:
-            queue.enqueue(func, job_id=str(job.job_id), job=job, **kwargs)
+            transaction.on_commit(partial(queue.enqueue, func, job_id=str(job.job_id), job=job, **kwargs))
 
         return job
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
@@ -11,6 +12,7 @@ from dcim import filtersets
 from dcim.constants import CABLE_TRACE_SVG_DEFAULT_WIDTH
 from dcim.models import *
 from dcim.svg import CableTraceSVG
+from dcim.utils import deferred_cable_paths
 from extras.api.mixins import ConfigContextQuerySetMixin, RenderConfigMixin
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
 from netbox.api.metadata import ContentTypeMetadata
@@ -52,7 +54,7 @@ class PathEndpointMixin(object):
             except (ValueError, TypeError):
                 width = CABLE_TRACE_SVG_DEFAULT_WIDTH
             drawing = CableTraceSVG(obj, base_url=request.build_absolute_uri('/'), width=width)
-            return HttpResponse(drawing.render().tostring(), content_type='image/svg+xml')
+            return HttpResponse(drawing.tostring(), content_type='image/svg+xml')
 
         # Serialize path objects, iterating over each three-tuple in the path
         for near_ends, cable, far_ends in obj.trace():
@@ -81,7 +83,7 @@ class PassThroughPortMixin(object):
         Return all CablePaths which traverse a given pass-through port.
         """
         obj = get_object_or_404(self.queryset, pk=pk)
-        cablepaths = CablePath.objects.filter(_nodes__contains=obj)
+        cablepaths = CablePath.objects.with_node(obj)
         serializer = serializers.CablePathSerializer(cablepaths, context={'request': request}, many=True)
 
         return Response(serializer.data)
@@ -498,6 +500,14 @@ class CableViewSet(NetBoxModelViewSet):
     serializer_class = serializers.CableSerializer
     filterset_class = filtersets.CableFilterSet
 
+    def perform_create(self, serializer):
+        if not getattr(serializer, 'many', False):
+            return super().perform_create(serializer)
+
+        # When creating cables in bulk, trace the affected cable paths once all cables have been saved
+        with transaction.atomic(), deferred_cable_paths():
+            super().perform_create(serializer)
+
 
 class CableTerminationViewSet(NetBoxModelViewSet):
     metadata_class = ContentTypeMetadata
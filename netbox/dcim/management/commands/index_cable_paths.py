@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from dcim.utils import rebuild_cablepath_nodes
+
+
+class Command(BaseCommand):
+    help = "Rebuild the index of the nodes traversed by each cable path"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding cable path node index... ", ending='')
+        self.stdout.flush()
+        count = rebuild_cablepath_nodes()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} nodes."))
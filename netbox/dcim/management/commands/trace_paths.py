@@ -1,10 +1,17 @@
-from django.core.management.base import BaseCommand
+import itertools
+from collections import Counter
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management.color import no_style
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import Q
 
-from dcim.models import CablePath, ConsolePort, ConsoleServerPort, Interface, PowerFeed, PowerOutlet, PowerPort
-from dcim.signals import create_cablepath
+from dcim.models import (
+    CablePath, CablePathNode, ConsolePort, ConsoleServerPort, Interface, PowerFeed, PowerOutlet, PowerPort, Site
+)
+from dcim.tracing import CableGraph
+from utilities.parallel import get_process_pool
 
 ENDPOINT_MODELS = (
     ConsolePort,
@@ -15,6 +22,94 @@ ENDPOINT_MODELS = (
     PowerPort
 )
 
+# Number of CablePaths to write per query
+BATCH_SIZE = 1000
+
+
+def get_origins(model, site_id):
+    """
+    Return all cabled instances of the given endpoint model at the specified site.
+    """
+    params = Q(cable__isnull=False)
+    if hasattr(model, 'wireless_link'):
+        params |= Q(wireless_link__isnull=False)
+    if model is PowerFeed:
+        params &= Q(power_panel__site_id=site_id)
+    else:
+        params &= Q(device__site_id=site_id)
+    return model.objects.filter(params)
+
+
+def is_changed(cablepath, new_path):
+    """
+    Return True if a newly traced path differs from the existing CablePath (disregarding its origins).
+    """
+    return any((
+        cablepath.path[1:] != new_path.path[1:],
+        cablepath.is_complete != new_path.is_complete,
+        cablepath.is_active != new_path.is_active,
+        cablepath.is_split != new_path.is_split,
+    ))
+
+
+def trace_site(site_id, force=False, dry_run=False):
+    """
+    Trace the paths from all cabled endpoints at a site against a CableGraph preloaded for the site, and save the new
+    CablePaths in bulk. Only endpoints without a path are traced, unless `force` is True (in which case any existing
+    paths must already have been deleted). If `dry_run` is True, all endpoints are traced and compared with their
+    existing paths, but nothing is saved.
+
+    Returns a Counter of results keyed by (model name, result), and a list of the changes found during a dry run.
+    """
+    graph = CableGraph()
+    graph.load(sites=[site_id])
+    results = Counter()
+    changes = []
+
+    for model in ENDPOINT_MODELS:
+        origins = get_origins(model, site_id)
+        if dry_run:
+            origins = origins.select_related('_path')
+        elif not force:
+            origins = origins.filter(_path__isnull=True)
+        origins = list(origins)
+        graph.prepare(origins)
+        model_name = model._meta.model_name
+
+        if dry_run:
+            for origin in origins:
+                new_path = CablePath.from_origin([origin], graph=graph)
+                if origin._path is None and new_path is None:
+                    continue
+                elif origin._path is None:
+                    result = 'created'
+                elif new_path is None:
+                    result = 'deleted'
+                elif is_changed(origin._path, new_path):
+                    result = 'changed'
+                else:
+                    result = 'unchanged'
+                results[(model_name, result)] += 1
+                if result != 'unchanged':
+                    changes.append(f'{model._meta.verbose_name} {origin.pk} ({origin}): path would be {result}')
+            continue
+
+        # Trace all paths before saving them in bulk
+        traced = []
+        for origin in origins:
+            if cablepath := CablePath.from_origin([origin], graph=graph):
+                cablepath._nodes = list(itertools.chain(*cablepath.path))
+                traced.append((origin, cablepath))
+        with transaction.atomic():
+            cablepaths = CablePath.objects.bulk_create([cablepath for _, cablepath in traced], batch_size=BATCH_SIZE)
+            CablePathNode.update_index(cablepaths)
+            for origin, cablepath in traced:
+                origin._path = cablepath
+            model.objects.bulk_update([origin for origin, _ in traced], ['_path'], batch_size=BATCH_SIZE)
+        results[(model_name, 'created')] += len(traced)
+
+    return results, changes
+
 
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in NetBox"
@@ -28,6 +123,18 @@ class Command(BaseCommand):
             "--no-input", action='store_true', dest='no_input',
             help="Do not prompt user for any input/confirmation"
         )
+        parser.add_argument(
+            "--site", action='append', dest='sites', metavar='SLUG',
+            help="Trace only the paths originating from the specified site (may be passed multiple times)"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of processes among which to divide the sites being traced (default: 1)"
+        )
+        parser.add_argument(
+            "--dry-run", action='store_true', dest='dry_run',
+            help="Report the cable paths which would be created, changed, or deleted, without saving any changes"
+        )
 
     def draw_progress_bar(self, percentage):
         """
@@ -36,55 +143,113 @@ class Command(BaseCommand):
         bar_size = int(percentage / 5)
         self.stdout.write(f"\r  [{'#' * bar_size}{' ' * (20 - bar_size)}] {int(percentage)}%", ending='')
 
-    def handle(self, *model_names, **options):
+    def get_sites(self, slugs):
+        sites = Site.objects.all()
+        if slugs:
+            sites = sites.filter(slug__in=slugs)
+            if invalid_slugs := set(slugs) - set(sites.values_list('slug', flat=True)):
+                raise CommandError(f"Invalid site(s): {', '.join(sorted(invalid_slugs))}")
+        return list(sites.values_list('pk', flat=True))
 
-        # If --force was passed, first delete all existing CablePaths
-        if options['force']:
+    def delete_paths(self, options):
+        """
+        Delete all existing CablePaths originating from the selected sites (or all CablePaths, if no sites have been
+        specified).
+        """
+        if options['sites']:
+            cable_paths = CablePath.objects.none()
+            for model in ENDPOINT_MODELS:
+                site_filter = 'power_panel__site__slug__in' if model is PowerFeed else 'device__site__slug__in'
+                cable_paths |= CablePath.objects.filter(
+                    pk__in=model.objects.filter(**{site_filter: options['sites']}).values('_path')
+                )
+        else:
             cable_paths = CablePath.objects.all()
-            paths_count = cable_paths.count()
+        paths_count = cable_paths.count()
 
-            # Prompt the user to confirm recalculation of all paths
-            if paths_count and not options['no_input']:
-                self.stdout.write(self.style.ERROR("WARNING: Forcing recalculation of all cable paths."))
-                self.stdout.write(
-                    f"This will delete and recalculate all {paths_count} existing cable paths. Are you sure?"
-                )
-                confirmation = input("Type yes to confirm: ")
-                if confirmation != 'yes':
-                    self.stdout.write(self.style.SUCCESS("Aborting"))
-                    return
+        # Prompt the user to confirm recalculation of all paths
+        if paths_count and not options['no_input']:
+            self.stdout.write(self.style.ERROR("WARNING: Forcing recalculation of all cable paths."))
+            self.stdout.write(
+                f"This will delete and recalculate all {paths_count} existing cable paths. Are you sure?"
+            )
+            confirmation = input("Type yes to confirm: ")
+            if confirmation != 'yes':
+                self.stdout.write(self.style.SUCCESS("Aborting"))
+                return False
 
-            # Delete all existing CablePath instances
-            self.stdout.write(f"Deleting {paths_count} existing cable paths...")
-            deleted_count, _ = CablePath.objects.all().delete()
-            self.stdout.write((self.style.SUCCESS(f'  Deleted {deleted_count} paths')))
+        # Delete existing CablePath instances (first deleting their indexed nodes directly, rather than loading each
+        # for deletion)
+        self.stdout.write(f"Deleting {paths_count} existing cable paths...")
+        nodes = CablePathNode.objects.filter(path__in=cable_paths)
+        nodes._raw_delete(using=nodes.db)
+        deleted_count, _ = cable_paths.delete()
+        self.stdout.write((self.style.SUCCESS(f'  Deleted {deleted_count} paths')))
 
-            # Reinitialize the model's PK sequence
+        # Reinitialize the model's PK sequence (if all CablePaths have been deleted)
+        if not options['sites']:
             self.stdout.write(f'Resetting database sequence for CablePath model')
             sequence_sql = connection.ops.sequence_reset_sql(no_style(), [CablePath])
             with connection.cursor() as cursor:
                 for sql in sequence_sql:
                     cursor.execute(sql)
 
-        # Retrace paths
+        return True
+
+    def handle(self, *model_names, **options):
+        if options['workers'] < 1:
+            raise CommandError("The number of workers must be at least 1.")
+        site_ids = self.get_sites(options['sites'])
+
+        # If --force was passed, first delete all existing CablePaths
+        if options['force'] and not options['dry_run']:
+            if not self.delete_paths(options):
+                return
+
+        # Retrace paths, one site at a time
+        if options['dry_run']:
+            self.stdout.write(f'Tracing cable paths from {len(site_ids)} sites (dry run)...')
+        else:
+            self.stdout.write(f'Retracing cable paths from {len(site_ids)} sites...')
+        results = Counter()
+        changes = []
+        kwargs = {'force': options['force'], 'dry_run': options['dry_run']}
+
+        if options['workers'] > 1:
+            with get_process_pool(options['workers']) as executor:
+                futures = [executor.submit(trace_site, site_id, **kwargs) for site_id in site_ids]
+                for i, future in enumerate(as_completed(futures), start=1):
+                    site_results, site_changes = future.result()
+                    results.update(site_results)
+                    changes.extend(site_changes)
+                    self.draw_progress_bar(i * 100 / len(site_ids))
+        else:
+            for i, site_id in enumerate(site_ids, start=1):
+                site_results, site_changes = trace_site(site_id, **kwargs)
+                results.update(site_results)
+                changes.extend(site_changes)
+                self.draw_progress_bar(i * 100 / len(site_ids))
+        self.draw_progress_bar(100)
+        self.stdout.write('')
+
+        # Report the results
         for model in ENDPOINT_MODELS:
-            params = Q(cable__isnull=False)
-            if hasattr(model, 'wireless_link'):
-                params |= Q(wireless_link__isnull=False)
-            origins = model.objects.filter(params)
-            if not options['force']:
-                origins = origins.filter(_path__isnull=True)
-            origins_count = origins.count()
-            if not origins_count:
-                self.stdout.write(f'Found no missing {model._meta.verbose_name} paths; skipping')
-                continue
-            self.stdout.write(f'Retracing {origins_count} cabled {model._meta.verbose_name_plural}...')
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath([obj])
-                if not i % 100:
-                    self.draw_progress_bar(i * 100 / origins_count)
-            self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {i} {model._meta.verbose_name_plural}'))
+            model_name = model._meta.model_name
+            verbose_name = model._meta.verbose_name_plural
+            if options['dry_run']:
+                created, changed, deleted, unchanged = (
+                    results[(model_name, result)] for result in ('created', 'changed', 'deleted', 'unchanged')
+                )
+                self.stdout.write(
+                    f'  {verbose_name}: {created} paths would be created, {changed} changed, and {deleted} deleted '
+                    f'({unchanged} unchanged)'
+                )
+            elif count := results[(model_name, 'created')]:
+                self.stdout.write(self.style.SUCCESS(f'  Retraced {count} {verbose_name}'))
+            else:
+                self.stdout.write(f'  Found no missing {model._meta.verbose_name} paths')
+        if options['verbosity'] >= 2:
+            for change in changes:
+                self.stdout.write(f'    {change}')
 
         self.stdout.write(self.style.SUCCESS('Finished.'))
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dcim', '0187_alter_device_vc_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CablePathNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('node_id', models.PositiveBigIntegerField()),
+                ('node_type', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='+',
+                    to='contenttypes.contenttype'
+                )),
+                ('path', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='nodes',
+                    to='dcim.cablepath'
+                )),
+            ],
+            options={
+                'verbose_name': 'cable path node',
+                'verbose_name_plural': 'cable path nodes',
+                'indexes': [models.Index(fields=['node_type', 'node_id'], name='dcim_cablep_node_ty_adf4e2_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cablepathnode',
+            constraint=models.UniqueConstraint(
+                fields=('path', 'node_type', 'node_id'),
+                name='dcim_cablepathnode_unique_path_node'
+            ),
+        ),
+
+        # Index the nodes of all existing CablePaths
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO dcim_cablepathnode (path_id, node_type_id, node_id)
+                SELECT DISTINCT p.id, split_part(n.node, ':', 1)::integer, split_part(n.node, ':', 2)::bigint
+                FROM dcim_cablepath p CROSS JOIN LATERAL unnest(p._nodes) AS n(node)
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -13,6 +13,7 @@ from core.models import ObjectType
 from dcim.choices import *
 from dcim.constants import *
 from dcim.fields import PathField
+from dcim.querysets import CablePathQuerySet
 from dcim.utils import decompile_path_node, object_to_path_node
 from netbox.models import ChangeLoggedModel, PrimaryModel
 from utilities.conversion import to_meters
@@ -24,6 +25,7 @@ from .device_components import FrontPort, RearPort, PathEndpoint
 __all__ = (
     'Cable',
     'CablePath',
+    'CablePathNode',
     'CableTermination',
 )
 
@@ -456,6 +458,8 @@ class CablePath(models.Model):
     )
     _nodes = PathField()
 
+    objects = CablePathQuerySet.as_manager()
+
     _netbox_private = True
 
     class Meta:
@@ -472,11 +476,22 @@ class CablePath(models.Model):
 
         super().save(*args, **kwargs)
 
+        # Update the reverse index of the path's nodes
+        CablePathNode.update_index([self])
+
         # Record a direct reference to this CablePath on its originating object(s)
         origin_model = self.origin_type.model_class()
         origin_ids = [decompile_path_node(node)[1] for node in self.path[0]]
         origin_model.objects.filter(pk__in=origin_ids).update(_path=self.pk)
 
+    def delete(self, *args, **kwargs):
+
+        # Delete the path's indexed nodes directly, rather than loading each for deletion
+        nodes = CablePathNode.objects.filter(path=self)
+        nodes._raw_delete(using=nodes.db)
+
+        return super().delete(*args, **kwargs)
+
     @property
     def origin_type(self):
         if self.path:
@@ -519,16 +534,23 @@ class CablePath(models.Model):
         return int(len(self.path) / 3)
 
     @classmethod
-    def from_origin(cls, terminations):
+    def from_origin(cls, terminations, graph=None):
         """
         Create a new CablePath instance as traced from the given termination objects. These can be any object to which a
         Cable or WirelessLink connects (interfaces, console ports, circuit termination, etc.). All terminations must be
         of the same type and must belong to the same parent object.
+
+        A CableGraph may be passed to trace many paths against the same set of preloaded objects. Otherwise, a new
+        graph is populated as the trace progresses.
         """
         from circuits.models import CircuitTermination
+        from dcim.tracing import CableGraph
 
         if not terminations:
             return None
+        if graph is None:
+            graph = CableGraph()
+        graph.prepare(terminations)
 
         # Ensure all originating terminations are attached to the same link
         if len(terminations) > 1:
@@ -594,19 +616,7 @@ class CablePath(models.Model):
 
             # Step 6: Determine the far-end terminations
             if isinstance(links[0], Cable):
-                termination_type = ObjectType.objects.get_for_model(terminations[0])
-                local_cable_terminations = CableTermination.objects.filter(
-                    termination_type=termination_type,
-                    termination_id__in=[t.pk for t in terminations]
-                )
-
-                q_filter = Q()
-                for lct in local_cable_terminations:
-                    cable_end = 'A' if lct.cable_end == 'B' else 'B'
-                    q_filter |= Q(cable=lct.cable, cable_end=cable_end)
-
-                remote_cable_terminations = CableTermination.objects.filter(q_filter)
-                remote_terminations = [ct.termination for ct in remote_cable_terminations]
+                remote_terminations = graph.get_far_end_terminations(terminations)
             else:
                 # WirelessLink
                 remote_terminations = [
@@ -630,9 +640,7 @@ class CablePath(models.Model):
 
             if isinstance(remote_terminations[0], FrontPort):
                 # Follow FrontPorts to their corresponding RearPorts
-                rear_ports = RearPort.objects.filter(
-                    pk__in=[t.rear_port_id for t in remote_terminations]
-                )
+                rear_ports = graph.get_rear_ports(remote_terminations)
                 if len(rear_ports) > 1 or rear_ports[0].positions > 1:
                     position_stack.append([fp.rear_port_position for fp in remote_terminations])
 
@@ -640,10 +648,7 @@ class CablePath(models.Model):
 
             elif isinstance(remote_terminations[0], RearPort):
                 if len(remote_terminations) == 1 and remote_terminations[0].positions == 1:
-                    front_ports = FrontPort.objects.filter(
-                        rear_port_id__in=[rp.pk for rp in remote_terminations],
-                        rear_port_position=1
-                    )
+                    front_ports = graph.get_front_ports([(remote_terminations[0], 1)])
                 # Obtain the individual front ports based on the termination and all positions
                 elif len(remote_terminations) > 1 and position_stack:
                     positions = position_stack.pop()
@@ -652,18 +657,14 @@ class CablePath(models.Model):
                     assert len(remote_terminations) == len(positions)
 
                     # Get our front ports
-                    q_filter = Q()
-                    for rt in remote_terminations:
-                        position = positions.pop()
-                        q_filter |= Q(rear_port_id=rt.pk, rear_port_position=position)
-                    assert q_filter is not Q()
-                    front_ports = FrontPort.objects.filter(q_filter)
+                    front_ports = graph.get_front_ports([
+                        (rt, positions.pop()) for rt in remote_terminations
+                    ])
                 # Obtain the individual front ports based on the termination and position
                 elif position_stack:
-                    front_ports = FrontPort.objects.filter(
-                        rear_port_id=remote_terminations[0].pk,
-                        rear_port_position__in=position_stack.pop()
-                    )
+                    front_ports = graph.get_front_ports([
+                        (remote_terminations[0], position) for position in position_stack.pop()
+                    ])
                 else:
                     # No position indicated: path has split, so we stop at the RearPorts
                     is_split = True
@@ -676,10 +677,7 @@ class CablePath(models.Model):
                 if len(remote_terminations) > 1:
                     is_split = True
                     break
-                circuit_termination = CircuitTermination.objects.filter(
-                    circuit=remote_terminations[0].circuit,
-                    term_side='Z' if remote_terminations[0].term_side == 'A' else 'A'
-                ).first()
+                circuit_termination = graph.get_peer_circuit_termination(remote_terminations[0])
                 if circuit_termination is None:
                     break
                 elif circuit_termination.provider_network:
@@ -827,3 +825,56 @@ class CablePath(models.Model):
                 asymmetric_nodes.extend([node for node in nodes if node.link is None])
 
         return asymmetric_nodes
+
+
+class CablePathNode(models.Model):
+    """
+    A reverse index of the nodes within each CablePath, from which all paths traversing a particular object can be
+    retrieved efficiently (see CablePathQuerySet.with_node()). Nodes are indexed by CablePath.save(); paths saved in
+    bulk must be indexed by calling update_index().
+    """
+    path = models.ForeignKey(
+        to='dcim.CablePath',
+        on_delete=models.CASCADE,
+        related_name='nodes'
+    )
+    node_type = models.ForeignKey(
+        to='contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    node_id = models.PositiveBigIntegerField()
+
+    _netbox_private = True
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('node_type', 'node_id')),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('path', 'node_type', 'node_id'),
+                name='%(app_label)s_%(class)s_unique_path_node'
+            ),
+        )
+        verbose_name = _('cable path node')
+        verbose_name_plural = _('cable path nodes')
+
+    def __str__(self):
+        return f'Path #{self.path_id}: {self.node_type_id}:{self.node_id}'
+
+    @classmethod
+    def update_index(cls, cablepaths):
+        """
+        Replace any indexed nodes of the given CablePaths with their current nodes.
+        """
+        existing_nodes = cls.objects.filter(path__in=[cablepath.pk for cablepath in cablepaths])
+        existing_nodes._raw_delete(using=existing_nodes.db)
+        cls.objects.bulk_create(
+            [
+                cls(path=cablepath, node_type_id=node_type_id, node_id=node_id)
+                for cablepath in cablepaths
+                for node_type_id, node_id in dict.fromkeys(decompile_path_node(node) for node in cablepath._nodes)
+            ],
+            batch_size=1000
+        )
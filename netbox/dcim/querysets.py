@@ -0,0 +1,23 @@
+from django.contrib.contenttypes.models import ContentType
+
+from utilities.querysets import RestrictedQuerySet
+
+__all__ = (
+    'CablePathQuerySet',
+)
+
+
+class CablePathQuerySet(RestrictedQuerySet):
+
+    def with_node(self, obj):
+        """
+        Return all CablePaths which include the given object (as an origin, a destination, or an intermediate node).
+        Paths are looked up by the reverse index of their nodes (CablePathNode).
+        """
+        from dcim.models import CablePathNode
+
+        nodes = CablePathNode.objects.filter(
+            node_type=ContentType.objects.get_for_model(obj),
+            node_id=obj.pk
+        )
+        return self.filter(pk__in=nodes.values('path'))
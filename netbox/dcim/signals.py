@@ -5,10 +5,12 @@ from django.dispatch import receiver
 
 from .choices import CableEndChoices, LinkStatusChoices
 from .models import (
-    Cable, CablePath, CableTermination, Device, FrontPort, PathEndpoint, PowerPanel, Rack, Location, VirtualChassis,
+    Cable, CablePath, CableTermination, CabledObjectModel, Device, FrontPort, PathEndpoint, PowerPanel, Rack, Location,
+    VirtualChassis,
 )
 from .models.cables import trace_paths
-from .utils import create_cablepath, rebuild_paths
+from .svg import invalidate_cable_traces
+from .utils import create_cablepath, rebuild_paths, retrace_cablepath
 
 
 #
@@ -102,7 +104,7 @@ def update_connected_endpoints(instance, created, raw=False, **kwargs):
     # Update status of CablePaths if Cable status has been changed
     elif instance.status != instance._orig_status:
         if instance.status != LinkStatusChoices.STATUS_CONNECTED:
-            CablePath.objects.filter(_nodes__contains=instance).update(is_active=False)
+            CablePath.objects.with_node(instance).update(is_active=False)
         else:
             rebuild_paths([instance])
 
@@ -112,8 +114,8 @@ def retrace_cable_paths(instance, **kwargs):
     """
     When a Cable is deleted, check for and update its connected endpoints
     """
-    for cablepath in CablePath.objects.filter(_nodes__contains=instance):
-        cablepath.retrace()
+    for cablepath in CablePath.objects.with_node(instance):
+        retrace_cablepath(cablepath)
 
 
 @receiver(post_delete, sender=CableTermination)
@@ -124,11 +126,11 @@ def nullify_connected_endpoints(instance, **kwargs):
     model = instance.termination_type.model_class()
     model.objects.filter(pk=instance.termination_id).update(cable=None, cable_end='')
 
-    for cablepath in CablePath.objects.filter(_nodes__contains=instance.cable):
+    for cablepath in CablePath.objects.with_node(instance.cable):
         # Remove the deleted CableTermination if it's one of the path's originating nodes
         if instance.termination in cablepath.origins:
             cablepath.origins.remove(instance.termination)
-        cablepath.retrace()
+        retrace_cablepath(cablepath)
 
 
 @receiver(post_save, sender=FrontPort)
@@ -138,5 +140,39 @@ def extend_rearport_cable_paths(instance, created, raw, **kwargs):
     """
     if created and not raw:
         rearport = instance.rear_port
-        for cablepath in CablePath.objects.filter(_nodes__contains=rearport):
-            cablepath.retrace()
+        for cablepath in CablePath.objects.with_node(rearport):
+            retrace_cablepath(cablepath)
+
+
+#
+# Cable trace caching
+#
+
+# Models (other than cabled objects) whose attributes are depicted by a rendered cable trace
+CABLE_TRACE_MODELS = {
+    'circuits.circuit',
+    'circuits.circuittype',
+    'circuits.provider',
+    'circuits.providernetwork',
+    'dcim.cable',
+    'dcim.cablepath',
+    'dcim.device',
+    'dcim.devicerole',
+    'dcim.devicetype',
+    'dcim.location',
+    'dcim.manufacturer',
+    'dcim.powerpanel',
+    'dcim.rack',
+    'dcim.site',
+    'wireless.wirelesslink',
+}
+
+
+@receiver((post_save, post_delete))
+def invalidate_cached_cable_traces(sender, **kwargs):
+    """
+    Supersede any cached cable traces when a path is retraced or an object which may be depicted by a trace is
+    modified or deleted.
+    """
+    if issubclass(sender, CabledObjectModel) or sender._meta.label_lower in CABLE_TRACE_MODELS:
+        invalidate_cable_traces()
@@ -1,15 +1,24 @@
+import hashlib
+import json
+import time
+
 import svgwrite
 from svgwrite.container import Group, Hyperlink
 from svgwrite.shapes import Line, Polyline, Rect
 from svgwrite.text import Text
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 
 from dcim.constants import CABLE_TRACE_SVG_DEFAULT_WIDTH
+from netbox.context import cabletrace_generation_queue
 from utilities.html import foreground_color
+from utilities.transactions import get_transaction_batch
 
 __all__ = (
     'CableTraceSVG',
+    'invalidate_cable_traces',
 )
 
 OFFSET = 0.5
@@ -19,6 +28,8 @@ FANOUT_HEIGHT = 35
 FANOUT_LEG_HEIGHT = 15
 CABLE_HEIGHT = 5 * LINE_HEIGHT + FANOUT_HEIGHT + FANOUT_LEG_HEIGHT
 
+GENERATION_CACHE_KEY = 'cabletrace:svg:generation'
+
 
 class Node(Hyperlink):
     """
@@ -149,6 +160,39 @@ class CableTraceSVG:
     def center(self):
         return self.width / 2
 
+    def get_cache_key(self):
+        """
+        Return the key under which the rendered trace is cached. The key is derived from each CablePath comprising the
+        trace (including any bridged paths) and the current cable trace generation, which is advanced whenever a path
+        is retraced or any of the objects a trace depicts is modified (see invalidate_cable_traces()).
+        """
+        from django.contrib.contenttypes.models import ContentType
+        from dcim.models import CablePath, Interface
+        from dcim.utils import decompile_path_node
+
+        paths = []
+        interface_type_id = ContentType.objects.get_for_model(Interface).pk
+        cablepath = self.origin._path
+        while cablepath is not None:
+            paths.append(
+                (cablepath.pk, cablepath._nodes, cablepath.is_active, cablepath.is_complete, cablepath.is_split)
+            )
+
+            # Follow any bridged relationship (see PathEndpoint.trace()) without retrieving the path's objects
+            destinations = cablepath.path[-1] if cablepath.is_complete else []
+            cablepath = None
+            if len(destinations) == 1:
+                ct_id, object_id = decompile_path_node(destinations[0])
+                if ct_id == interface_type_id:
+                    cablepath = CablePath.objects.filter(
+                        pk__in=Interface.objects.filter(pk=object_id).values('bridge___path')
+                    ).first()
+
+        data = json.dumps(
+            [self.origin._meta.label_lower, self.origin.pk, self.width, self.base_url, get_generation(), paths]
+        )
+        return f'cabletrace:svg:{hashlib.sha256(data.encode()).hexdigest()}'
+
     @classmethod
     def _get_labels(cls, instance):
         """
@@ -463,3 +507,53 @@ class CableTraceSVG:
             self.drawing.add(element)
 
         return self.drawing
+
+    def tostring(self):
+        """
+        Return the rendered SVG document as a string. The document is cached for CABLE_TRACE_SVG_CACHE_TIMEOUT seconds
+        (if set) under the key returned by get_cache_key().
+        """
+        if not settings.CABLE_TRACE_SVG_CACHE_TIMEOUT:
+            return self.render().tostring()
+
+        cache_key = self.get_cache_key()
+        if (svg := cache.get(cache_key)) is None:
+            svg = self.render().tostring()
+            cache.set(cache_key, svg, settings.CABLE_TRACE_SVG_CACHE_TIMEOUT)
+
+        return svg
+
+
+def get_generation():
+    """
+    Return the current cable trace generation.
+    """
+    # Seed a missing counter using the current time, so that it cannot repeat a prior generation
+    return cache.get_or_set(GENERATION_CACHE_KEY, time.time_ns, None)
+
+
+def bump_generation(*args):
+    """
+    Advance the cable trace generation, superseding all cached traces.
+    """
+    try:
+        cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(GENERATION_CACHE_KEY, time.time_ns(), None)
+
+
+def invalidate_cable_traces():
+    """
+    Supersede all cached cable traces once the current transaction (if any) has been committed. The generation is
+    advanced only once per transaction, however many times this is called.
+    """
+    if not settings.CABLE_TRACE_SVG_CACHE_TIMEOUT:
+        return
+    if not transaction.get_connection().in_atomic_block:
+        bump_generation()
+        return
+
+    if (queue := cabletrace_generation_queue.get()) is None:
+        queue = {}
+        cabletrace_generation_queue.set(queue)
+    get_transaction_batch(queue, bump_generation, factory=list)
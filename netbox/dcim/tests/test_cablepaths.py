@@ -1,10 +1,12 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from circuits.models import *
 from dcim.choices import LinkStatusChoices
 from dcim.models import *
 from dcim.svg import CableTraceSVG
-from dcim.utils import object_to_path_node
+from dcim.tracing import CableGraph
+from dcim.utils import decompile_path_node, deferred_cable_paths, object_to_path_node, rebuild_cablepath_nodes
 
 
 class CablePathTestCase(TestCase):
@@ -16,6 +18,7 @@ class CablePathTestCase(TestCase):
         2XX: Test different cable topologies
         3XX: Test responses to changes in existing objects
         4XX: Test to exclude specific cable topologies
+        5XX: Test tracing paths against a preloaded cable graph, and rendering of traces
     """
     @classmethod
     def setUpTestData(cls):
@@ -2300,3 +2303,213 @@ class CablePathTestCase(TestCase):
             is_active=True
         )
         self.assertEqual(CablePath.objects.count(), 0)
+
+    def test_501_trace_paths_via_cable_graph(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [IF4]
+        [IF2]                                                  [IF5]
+        [IF3] --C2-- [FP1:2]                    [FP2:2] --C5-- [CT1] [CT2] --C6-- [IF6]
+        """
+        interfaces = [
+            Interface.objects.create(device=self.device, name=f'Interface {i}') for i in range(1, 7)
+        ]
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=4)
+        frontport1_1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1:1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport1_2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1:2', rear_port=rearport1, rear_port_position=2
+        )
+        frontport2_1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2:1', rear_port=rearport2, rear_port_position=1
+        )
+        frontport2_2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2:2', rear_port=rearport2, rear_port_position=2
+        )
+        circuittermination1 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side='A')
+        circuittermination2 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side='Z')
+        for a_terminations, b_terminations in (
+            (interfaces[0:2], [frontport1_1]),
+            ([interfaces[2]], [frontport1_2]),
+            ([rearport1], [rearport2]),
+            ([frontport2_1], interfaces[3:5]),
+            ([frontport2_2], [circuittermination1]),
+            ([circuittermination2], [interfaces[5]]),
+        ):
+            Cable(a_terminations=a_terminations, b_terminations=b_terminations).save()
+        self.assertEqual(CablePath.objects.count(), 4)
+
+        # Preload the graph & path origins
+        graph = CableGraph()
+        graph.load(sites=[self.site])
+        cable_paths = list(CablePath.objects.all())
+        origins = [
+            graph.get_objects(Interface, [decompile_path_node(node)[1] for node in cp.path[0]]) for cp in cable_paths
+        ]
+
+        # Tracing each path against the graph should produce identical results without querying the database
+        with self.assertNumQueries(0):
+            traced_paths = [CablePath.from_origin(terminations, graph=graph) for terminations in origins]
+        for cp, traced_path in zip(cable_paths, traced_paths):
+            self.assertEqual(traced_path.path, cp.path)
+            self.assertEqual(traced_path.is_complete, cp.is_complete)
+            self.assertEqual(traced_path.is_active, cp.is_active)
+            self.assertEqual(traced_path.is_split, cp.is_split)
+
+    def test_502_cablepath_node_index(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1', rear_port=rearport1, rear_port_position=1
+        )
+        cable1 = Cable(a_terminations=[interface1], b_terminations=[frontport1])
+        cable1.save()
+        cable2 = Cable(a_terminations=[rearport1], b_terminations=[interface2])
+        cable2.save()
+        path1 = self.assertPathExists(
+            (interface1, cable1, frontport1, rearport1, cable2, interface2),
+            is_complete=True
+        )
+        path2 = self.assertPathExists(
+            (interface2, cable2, rearport1, frontport1, cable1, interface1),
+            is_complete=True
+        )
+
+        # Check that the nodes of each path have been indexed
+        def get_indexed_nodes():
+            return {
+                (node.path_id, object_to_path_node(node.node_type.get_object_for_this_type(pk=node.node_id)))
+                for node in CablePathNode.objects.all()
+            }
+        self.assertEqual(
+            get_indexed_nodes(),
+            {(path.pk, node) for path in (path1, path2) for node in path._nodes}
+        )
+        for obj in (interface1, cable1, frontport1, rearport1, cable2, interface2):
+            self.assertEqual(set(CablePath.objects.with_node(obj)), {path1, path2})
+
+        # Rebuilding the index should produce identical nodes
+        indexed_nodes = get_indexed_nodes()
+        self.assertEqual(rebuild_cablepath_nodes(), len(indexed_nodes))
+        self.assertEqual(get_indexed_nodes(), indexed_nodes)
+
+        # Deleting cable 2 should update the index of the retraced path
+        cable2.delete()
+        path1 = self.assertPathExists(
+            (interface1, cable1, frontport1, rearport1),
+            is_complete=False
+        )
+        self.assertEqual(set(CablePath.objects.with_node(rearport1)), {path1})
+        self.assertFalse(CablePath.objects.with_node(interface2).exists())
+
+    def test_503_deferred_cable_paths(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [RP2] [FP2] --C3-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=1)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2', rear_port=rearport2, rear_port_position=1
+        )
+
+        # No paths should be traced until the context is exited
+        with deferred_cable_paths():
+            cable1 = Cable(a_terminations=[interface1], b_terminations=[frontport1])
+            cable1.save()
+            cable2 = Cable(a_terminations=[rearport1], b_terminations=[rearport2])
+            cable2.save()
+            cable3 = Cable(a_terminations=[frontport2], b_terminations=[interface2])
+            cable3.save()
+            self.assertEqual(CablePath.objects.count(), 0)
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertPathExists(
+            (interface1, cable1, frontport1, rearport1, cable2, rearport2, frontport2, cable3, interface2),
+            is_complete=True
+        )
+        self.assertPathExists(
+            (interface2, cable3, frontport2, rearport2, cable2, rearport1, frontport1, cable1, interface1),
+            is_complete=True
+        )
+
+        # Deleting a cable should retrace the affected paths upon exiting the context
+        with deferred_cable_paths():
+            cable2.delete()
+        self.assertEqual(CablePath.objects.count(), 2)
+        self.assertPathExists(
+            (interface1, cable1, frontport1, rearport1),
+            is_complete=False
+        )
+        self.assertPathExists(
+            (interface2, cable3, frontport2, rearport2),
+            is_complete=False
+        )
+
+        # No paths should be traced if an exception is raised within the context
+        with self.assertRaises(ValueError):
+            with deferred_cable_paths():
+                Cable(a_terminations=[rearport1], b_terminations=[rearport2]).save()
+                raise ValueError
+        self.assertEqual(CablePath.objects.count(), 2)
+
+    @override_settings(CABLE_TRACE_SVG_CACHE_TIMEOUT=60)
+    def test_504_cable_trace_svg_caching(self):
+        """
+        [IF1] --C1-- [FP1] [RP1] --C2-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1', rear_port=rearport1, rear_port_position=1
+        )
+        cable1 = Cable(a_terminations=[interface1], b_terminations=[frontport1])
+        cable1.save()
+        cable2 = Cable(a_terminations=[rearport1], b_terminations=[interface2])
+        cable2.save()
+        cache.clear()
+
+        def get_trace():
+            origin = Interface.objects.get(pk=interface1.pk)
+            return CableTraceSVG(origin)
+
+        # The rendered trace should be cached
+        trace = get_trace()
+        cache_key = trace.get_cache_key()
+        svg = trace.tostring()
+        self.assertEqual(cache.get(cache_key), svg)
+        trace = get_trace()
+        with self.assertNumQueries(1):
+            # Only the origin's CablePath is retrieved to derive the key
+            self.assertEqual(trace.get_cache_key(), cache_key)
+        self.assertEqual(get_trace().tostring(), svg)
+
+        # Modifying an object within the path should invalidate the cached trace
+        with self.captureOnCommitCallbacks(execute=True):
+            cable2.label = 'Cable 2'
+            cable2.save()
+        self.assertNotEqual(get_trace().get_cache_key(), cache_key)
+        cache_key = get_trace().get_cache_key()
+
+        # Modifying an object depicted by the trace should invalidate the cached trace
+        with self.captureOnCommitCallbacks(execute=True):
+            self.device.role.color = '00ff00'
+            self.device.role.save()
+        self.assertNotEqual(get_trace().get_cache_key(), cache_key)
+        self.assertIn('00ff00', get_trace().tostring())
+        cache_key = get_trace().get_cache_key()
+
+        # Retracing the path should invalidate the cached trace
+        with self.captureOnCommitCallbacks(execute=True):
+            cable2.delete()
+        self.assertNotEqual(get_trace().get_cache_key(), cache_key)
+        self.assertNotIn('Cable 2', get_trace().tostring())
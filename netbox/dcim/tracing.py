@@ -0,0 +1,264 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from circuits.choices import CircuitTerminationSideChoices
+from dcim.choices import CableEndChoices
+
+__all__ = (
+    'CableGraph',
+)
+
+
+class CableGraph:
+    """
+    An in-memory graph of Cables, their CableTerminations, and the mappings between FrontPorts and RearPorts, against
+    which many CablePaths can be traced without querying the database at each hop. The graph may be preloaded for a set
+    of sites and/or devices by calling load(); any objects beyond these are fetched in bulk as a trace reaches them.
+
+    Objects are cached for the lifetime of the graph, so a graph must not be reused across changes to the cabling it
+    represents.
+    """
+    def __init__(self):
+        # Cable ID -> Cable
+        self.cables = {}
+        # (termination type ID, termination ID) -> CableTermination (or None if the object is not cabled)
+        self.cable_terminations = {}
+        # (Cable ID, cable end) -> list of CableTerminations
+        self.cable_ends = defaultdict(list)
+        # Model -> {pk: instance}
+        self.objects = defaultdict(dict)
+        # (RearPort ID, position) -> FrontPort
+        self.front_ports = {}
+        # (Circuit ID, term side) -> CircuitTermination
+        self.circuit_terminations = {}
+
+        # Position of each object within the default ordering of its model. (FrontPorts and RearPorts are always
+        # loaded for an entire device at once, so the relative order of ports belonging to a device is preserved.)
+        self._ranks = {}
+        # Devices for which all FrontPorts and RearPorts have been loaded
+        self._port_devices = set()
+        # Circuits for which all CircuitTerminations have been loaded
+        self._circuits = set()
+
+    def load(self, sites=None, devices=None):
+        """
+        Preload all Cables attached to the given sites and/or devices, along with the terminations at both ends of
+        each Cable. If neither is specified, all Cables are loaded.
+        """
+        from dcim.models import CableTermination
+
+        q = Q()
+        if sites is not None:
+            q |= Q(_site__in=sites)
+        if devices is not None:
+            q |= Q(_device__in=devices)
+        self._load_cables(
+            CableTermination.objects.filter(q).order_by().values_list('cable_id', flat=True).distinct()
+        )
+
+    def get_objects(self, model, pks):
+        """
+        Return the instances of a model with the given primary keys (in the order given), fetching any which have not
+        already been loaded. Suitable for retrieving the origins of the paths to be traced.
+        """
+        from dcim.models import FrontPort, RearPort
+
+        missing = set(pks) - self.objects[model].keys()
+        if missing and model in (FrontPort, RearPort):
+            self._load_ports(model.objects.filter(pk__in=missing).values_list('device_id', flat=True))
+        elif missing:
+            self._add_objects(model, model.objects.filter(pk__in=missing))
+        objects = [self.objects[model][pk] for pk in pks if pk in self.objects[model]]
+        self.prepare(objects)
+
+        return objects
+
+    def prepare(self, terminations):
+        """
+        Attach the cached Cable to each of the given terminations (unless one has already been set), loading the
+        Cable and its far-end terminations if necessary.
+        """
+        terminations = [t for t in terminations if t is not None]
+        if not terminations:
+            return
+        cable_field = terminations[0]._meta.get_field('cable')
+        self._load_cables({t.cable_id for t in terminations if t.cable_id})
+        for termination in terminations:
+            if termination.cable_id in self.cables and not cable_field.is_cached(termination):
+                cable_field.set_cached_value(termination, self.cables[termination.cable_id])
+
+    def get_far_end_terminations(self, terminations):
+        """
+        Return the objects terminating the far end(s) of the Cables attached to the given terminations, ordered by
+        Cable, cable end, and ID. A deleted termination object is returned as None.
+        """
+        from dcim.models import CableTermination
+
+        termination_type = ContentType.objects.get_for_model(terminations[0])
+        keys = [(termination_type.pk, t.pk) for t in terminations]
+
+        if missing := [pk for type_id, pk in keys if (type_id, pk) not in self.cable_terminations]:
+            self._load_cables(
+                CableTermination.objects.filter(
+                    termination_type=termination_type,
+                    termination_id__in=missing
+                ).values_list('cable_id', flat=True)
+            )
+            for pk in missing:
+                self.cable_terminations.setdefault((termination_type.pk, pk), None)
+
+        far_ends = []
+        for key in keys:
+            if cable_termination := self.cable_terminations[key]:
+                cable_end = CableEndChoices.SIDE_A if cable_termination.cable_end == CableEndChoices.SIDE_B \
+                    else CableEndChoices.SIDE_B
+                if (cable_termination.cable_id, cable_end) not in far_ends:
+                    far_ends.append((cable_termination.cable_id, cable_end))
+
+        remote_cable_terminations = sorted(
+            [ct for far_end in far_ends for ct in self.cable_ends[far_end]],
+            key=lambda ct: (ct.cable_id, ct.cable_end, ct.pk)
+        )
+        remote_terminations = [self._get_termination(ct) for ct in remote_cable_terminations]
+        self.prepare(remote_terminations)
+
+        return remote_terminations
+
+    def get_rear_ports(self, front_ports):
+        """
+        Return the distinct RearPorts to which the given FrontPorts are mapped.
+        """
+        from dcim.models import RearPort
+
+        self._load_ports({fp.device_id for fp in front_ports})
+        rear_ports = {
+            self.objects[RearPort][fp.rear_port_id] for fp in front_ports if fp.rear_port_id in self.objects[RearPort]
+        }
+        rear_ports = sorted(rear_ports, key=lambda rp: self._ranks[(RearPort, rp.pk)])
+        self.prepare(rear_ports)
+
+        return rear_ports
+
+    def get_front_ports(self, mappings):
+        """
+        Return the distinct FrontPorts mapped to the given (RearPort, position) pairs.
+        """
+        from dcim.models import FrontPort
+
+        self._load_ports({rp.device_id for rp, position in mappings})
+        front_ports = {
+            self.front_ports[(rp.pk, position)] for rp, position in mappings if (rp.pk, position) in self.front_ports
+        }
+        front_ports = sorted(front_ports, key=lambda fp: self._ranks[(FrontPort, fp.pk)])
+        self.prepare(front_ports)
+
+        return front_ports
+
+    def get_peer_circuit_termination(self, circuit_termination):
+        """
+        Return the CircuitTermination on the opposite side of a Circuit, if any.
+        """
+        self._load_circuits({circuit_termination.circuit_id})
+        term_side = CircuitTerminationSideChoices.SIDE_Z \
+            if circuit_termination.term_side == CircuitTerminationSideChoices.SIDE_A \
+            else CircuitTerminationSideChoices.SIDE_A
+        peer = self.circuit_terminations.get((circuit_termination.circuit_id, term_side))
+        self.prepare([peer])
+
+        return peer
+
+    #
+    # Loaders
+    #
+
+    def _add_objects(self, model, objects):
+        for obj in objects:
+            self._ranks[(model, obj.pk)] = len(self._ranks)
+            self.objects[model][obj.pk] = obj
+
+    def _get_termination(self, cable_termination):
+        model = ContentType.objects.get_for_id(cable_termination.termination_type_id).model_class()
+        return self.objects[model].get(cable_termination.termination_id)
+
+    def _load_cables(self, cable_ids):
+        """
+        Load the given Cables and the terminations at both ends of each.
+        """
+        from dcim.models import Cable, CableTermination
+
+        cable_ids = set(cable_ids) - self.cables.keys()
+        if not cable_ids:
+            return
+
+        self.cables.update(Cable.objects.in_bulk(cable_ids))
+        cable_terminations = list(CableTermination.objects.filter(cable_id__in=cable_ids))
+        for ct in cable_terminations:
+            self.cable_terminations[(ct.termination_type_id, ct.termination_id)] = ct
+            self.cable_ends[(ct.cable_id, ct.cable_end)].append(ct)
+        self._load_terminations(cable_terminations)
+
+    def _load_terminations(self, cable_terminations):
+        """
+        Load the objects to which the given CableTerminations are attached.
+        """
+        from circuits.models import CircuitTermination
+        from dcim.models import FrontPort, RearPort
+
+        to_load = defaultdict(set)
+        for ct in cable_terminations:
+            model = ContentType.objects.get_for_id(ct.termination_type_id).model_class()
+            if ct.termination_id not in self.objects[model]:
+                to_load[model].add(ct.termination_id)
+
+        for model, pks in to_load.items():
+            if model in (FrontPort, RearPort):
+                # Load all pass-through ports on the parent device(s), to enable mapping between FrontPorts and
+                # RearPorts
+                self._load_ports(model.objects.filter(pk__in=pks).values_list('device_id', flat=True))
+            elif model is CircuitTermination:
+                # Load all terminations of the parent circuit(s), to enable tracing across each circuit
+                self._load_circuits(model.objects.filter(pk__in=pks).values_list('circuit_id', flat=True))
+            else:
+                self._add_objects(model, model.objects.filter(pk__in=pks))
+
+    def _load_ports(self, device_ids):
+        """
+        Load all FrontPorts and RearPorts belonging to the given devices.
+        """
+        from dcim.models import Device, FrontPort, RearPort
+
+        device_ids = set(device_ids) - self._port_devices
+        if not device_ids:
+            return
+        self._port_devices.update(device_ids)
+
+        devices = Device.objects.in_bulk(device_ids)
+        for model in (RearPort, FrontPort):
+            ports = list(model.objects.filter(device_id__in=device_ids))
+            device_field = model._meta.get_field('device')
+            for port in ports:
+                device_field.set_cached_value(port, devices[port.device_id])
+            self._add_objects(model, ports)
+            if model is FrontPort:
+                for port in ports:
+                    self.front_ports[(port.rear_port_id, port.rear_port_position)] = port
+
+    def _load_circuits(self, circuit_ids):
+        """
+        Load all CircuitTerminations belonging to the given circuits.
+        """
+        from circuits.models import CircuitTermination
+
+        circuit_ids = set(circuit_ids) - self._circuits
+        if not circuit_ids:
+            return
+        self._circuits.update(circuit_ids)
+
+        circuit_terminations = list(
+            CircuitTermination.objects.filter(circuit_id__in=circuit_ids).select_related('provider_network', 'site')
+        )
+        self._add_objects(CircuitTermination, circuit_terminations)
+        for ct in circuit_terminations:
+            self.circuit_terminations[(ct.circuit_id, ct.term_side)] = ct
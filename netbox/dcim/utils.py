@@ -1,7 +1,10 @@
 import itertools
+from contextlib import contextmanager
 
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from django.db import connection, transaction
+
+from netbox.context import cablepath_queue
 
 
 def compile_path_node(ct_id, object_id):
@@ -32,15 +35,23 @@ def path_node_to_object(repr):
     return ct.model_class().objects.filter(pk=object_id).first()
 
 
-def create_cablepath(terminations):
+def create_cablepath(terminations, graph=None):
     """
     Create CablePaths for all paths originating from the specified set of nodes.
 
     :param terminations: Iterable of CableTermination objects
+    :param graph: A CableGraph against which to trace the path (optional)
     """
     from dcim.models import CablePath
 
-    cp = CablePath.from_origin(terminations)
+    # Defer tracing the path if requested (see deferred_cable_paths())
+    if (queue := cablepath_queue.get()) is not None:
+        if terminations:
+            ct = ContentType.objects.get_for_model(terminations[0])
+            queue['origins'][(ct.pk, tuple(t.pk for t in terminations))] = None
+        return
+
+    cp = CablePath.from_origin(terminations, graph=graph)
     if cp:
         cp.save()
 
@@ -51,10 +62,107 @@ def rebuild_paths(terminations):
     """
     from dcim.models import CablePath
 
+    # Defer rebuilding the paths if requested (see deferred_cable_paths())
+    if (queue := cablepath_queue.get()) is not None:
+        for obj in terminations:
+            queue['paths'].update(dict.fromkeys(CablePath.objects.with_node(obj).values_list('pk', flat=True)))
+        return
+
     for obj in terminations:
-        cable_paths = CablePath.objects.filter(_nodes__contains=obj)
+        cable_paths = CablePath.objects.with_node(obj)
 
         with transaction.atomic():
             for cp in cable_paths:
                 cp.delete()
                 create_cablepath(cp.origins)
+
+
+def retrace_cablepath(cablepath):
+    """
+    Retrace the given CablePath, or defer its retracing if requested (see deferred_cable_paths()).
+    """
+    if (queue := cablepath_queue.get()) is not None:
+        queue['paths'][cablepath.pk] = None
+    else:
+        cablepath.retrace()
+
+
+@contextmanager
+def deferred_cable_paths():
+    """
+    Defer the tracing of all cable paths affected by changes made within the context (e.g. the creation or deletion
+    of Cables), then trace each affected path only once upon exiting the context. This avoids retracing the same path
+    repeatedly when many Cables are modified in bulk. The context should be entered within the transaction encompassing
+    the bulk operation, so that the paths are traced before the transaction is committed:
+
+        with transaction.atomic(), deferred_cable_paths():
+            for cable in cables:
+                cable.save()
+
+    If an exception is raised within the context, no paths are traced.
+    """
+    # Defer to an enclosing context, if any
+    if cablepath_queue.get() is not None:
+        yield
+        return
+
+    queue = {
+        'origins': {},  # (ContentType ID, termination IDs) -> None
+        'paths': {},    # CablePath ID -> None
+    }
+    token = cablepath_queue.set(queue)
+    try:
+        yield
+    finally:
+        cablepath_queue.reset(token)
+    flush_cable_paths(queue)
+
+
+def flush_cable_paths(queue):
+    """
+    Trace all paths queued by deferred_cable_paths(). Queued CablePaths are deleted and traced anew from their
+    origins, along with the paths from any newly connected origins. Each origin is traced only once, against a single
+    CableGraph.
+    """
+    from dcim.models import CablePath
+    from dcim.tracing import CableGraph
+
+    origins = list(queue['origins'])
+    for cablepath in CablePath.objects.filter(pk__in=list(queue['paths'])):
+        ct_id = decompile_path_node(cablepath.path[0][0])[0]
+        origins.append((ct_id, tuple(decompile_path_node(node)[1] for node in cablepath.path[0])))
+        cablepath.delete()
+
+    graph = CableGraph()
+    traced = set()
+    for ct_id, pks in origins:
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        objects = model.objects.in_bulk(pks)
+        terminations = [objects[pk] for pk in pks if pk in objects and (ct_id, pk) not in traced]
+        graph.prepare(terminations)
+
+        # Group the terminations by their current link, omitting any which have been disconnected
+        links = {}
+        for termination in terminations:
+            if (link := termination.link) is not None:
+                links.setdefault((type(link), link.pk), []).append(termination)
+        for terminations in links.values():
+            traced.update((ct_id, t.pk) for t in terminations)
+            create_cablepath(terminations, graph=graph)
+
+
+def rebuild_cablepath_nodes():
+    """
+    Rebuild the reverse index of nodes (CablePathNodes) from the nodes recorded on all CablePaths. Returns the number
+    of nodes indexed.
+    """
+    from dcim.models import CablePath, CablePathNode
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {CablePathNode._meta.db_table}")
+        cursor.execute(f"""
+            INSERT INTO {CablePathNode._meta.db_table} (path_id, node_type_id, node_id)
+            SELECT DISTINCT p.id, split_part(n.node, ':', 1)::integer, split_part(n.node, ':', 2)::bigint
+            FROM {CablePath._meta.db_table} p CROSS JOIN LATERAL unnest(p._nodes) AS n(node)
+        """)
+        return cursor.rowcount
@@ -34,6 +34,7 @@ from virtualization.tables import VirtualMachineTable
 from . import filtersets, forms, tables
 from .choices import DeviceFaceChoices
 from .models import *
+from .utils import deferred_cable_paths
 
 CABLE_TERMINATION_TYPES = {
     'dcim.consoleport': ConsolePort,
@@ -175,7 +176,7 @@ class PathTraceView(generic.ObjectView):
 
         # Otherwise, find all CablePaths which traverse the specified object
         else:
-            related_paths = CablePath.objects.filter(_nodes__contains=instance)
+            related_paths = CablePath.objects.with_node(instance)
             # Check for specification of a particular path (when tracing pass-through ports)
             try:
                 path_id = int(request.GET.get('cablepath_id'))
@@ -3237,6 +3238,11 @@ class CableBulkImportView(generic.BulkImportView):
     queryset = Cable.objects.all()
     model_form = forms.CableImportForm
 
+    def create_and_update_objects(self, form, request):
+        # Trace the cable paths affected by the imported cables once all cables have been saved
+        with deferred_cable_paths():
+            return super().create_and_update_objects(form, request)
+
 
 class CableBulkEditView(generic.BulkEditView):
     queryset = Cable.objects.prefetch_related(
@@ -1,3 +1,6 @@
+import base64
+
+from django.utils.translation import gettext as _
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
@@ -10,6 +13,7 @@ from users.api.serializers_.users import UserSerializer
 from utilities.api import get_serializer_for_model
 
 __all__ = (
+    'ObjectChangeFeedSerializer',
     'ObjectChangeSerializer',
 )
 
@@ -63,3 +67,40 @@ class ObjectChangeSerializer(BaseModelSerializer):
         data = serializer(obj.changed_object, nested=True, context={'request': self.context['request']}).data
 
         return data
+
+
+class ObjectChangeFeedSerializer(ObjectChangeSerializer):
+    """
+    Includes the opaque cursor identifying each change's position in the change feed. Changes are ordered by the ID of
+    the transaction which recorded them, then by ID; a consumer may resume the feed from any change by passing its
+    cursor.
+    """
+    cursor = serializers.SerializerMethodField(
+        read_only=True
+    )
+
+    class Meta(ObjectChangeSerializer.Meta):
+        fields = [*ObjectChangeSerializer.Meta.fields, 'cursor']
+
+    def get_cursor(self, obj) -> str:
+        return self.encode_cursor(obj)
+
+    @staticmethod
+    def encode_cursor(objectchange):
+        """
+        Encode the keyset (transaction ID, ID) of an ObjectChange as an opaque cursor string.
+        """
+        return base64.urlsafe_b64encode(f'{objectchange.txid}|{objectchange.pk}'.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode an opaque cursor string into its keyset (transaction ID, ID).
+        """
+        try:
+            txid, pk = map(int, base64.urlsafe_b64decode(cursor.encode()).decode().split('|'))
+            if txid < 0 or pk < 0:
+                raise ValueError
+            return txid, pk
+        except (ValueError, UnicodeError):
+            raise ValueError(_("Invalid cursor: {cursor}").format(cursor=cursor))
@@ -64,7 +64,7 @@ class WebhookSerializer(NetBoxModelSerializer):
         model = Webhook
         fields = [
             'id', 'url', 'display', 'name', 'description', 'payload_url', 'http_method', 'http_content_type',
-            'additional_headers', 'body_template', 'secret', 'ssl_verification', 'ca_file_path', 'custom_fields',
-            'tags', 'created', 'last_updated',
+            'additional_headers', 'body_template', 'secret', 'ssl_verification', 'ca_file_path', 'batch_size',
+            'batch_window', 'custom_fields', 'tags', 'created', 'last_updated',
         ]
         brief_fields = ('id', 'url', 'display', 'name', 'description')
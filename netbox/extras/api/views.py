@@ -1,13 +1,19 @@
-from django.http import Http404
+from itertools import islice
+
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_rq.queues import get_connection
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.generics import RetrieveUpdateDestroyAPIView
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rq import Worker
 
@@ -18,8 +24,10 @@ from extras.scripts import run_script
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
 from netbox.api.features import SyncedDataMixin
 from netbox.api.metadata import ContentTypeMetadata
-from netbox.api.renderers import TextRenderer
+from netbox.api.pagination import OptionalLimitOffsetPagination
+from netbox.api.renderers import NDJSONRenderer, TextRenderer
 from netbox.api.viewsets import NetBoxModelViewSet
+from netbox.config import get_config
 from utilities.exceptions import RQWorkerNotRunningException
 from utilities.request import copy_safe_request
 from . import serializers
@@ -284,6 +292,77 @@ class ObjectChangeViewSet(ReadOnlyModelViewSet):
     serializer_class = serializers.ObjectChangeSerializer
     filterset_class = filtersets.ObjectChangeFilterSet
 
+    def get_serializer(self, *args, **kwargs):
+        # Rebuild the full snapshots of any deltas in bulk
+        if kwargs.get('many') and args:
+            args = (list(args[0]), *args[1:])
+            ObjectChange.prefetch_full_data(args[0])
+        return super().get_serializer(*args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('cursor', OpenApiTypes.STR, description="Return only changes following this cursor"),
+            OpenApiParameter('limit', OpenApiTypes.INT, description="Number of changes to return"),
+        ],
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(detail=False, url_path='feed', renderer_classes=[JSONRenderer, NDJSONRenderer])
+    def feed(self, request):
+        """
+        Return all changes following the specified cursor, in chronological order. Changes are streamed as
+        newline-delimited JSON if requested (format=ndjson); otherwise, a single page of changes is returned.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).restrict(request.user, 'view')
+        # Changes are ordered by the ID of the transaction which recorded them, then by ID. Neither the time nor the ID
+        # of a change reflects the order in which it was committed, so changes recorded by transactions which are still
+        # in progress (and any later changes) are withheld until those transactions have finished.
+        queryset = queryset.committed().select_related('user').prefetch_related('changed_object').order_by('txid', 'pk')
+        if cursor := request.query_params.get('cursor'):
+            try:
+                txid, pk = serializers.ObjectChangeFeedSerializer.decode_cursor(cursor)
+            except ValueError as e:
+                raise ValidationError({'cursor': str(e)})
+            queryset = queryset.filter(Q(txid__gt=txid) | Q(txid=txid, pk__gt=pk))
+
+        # Stream all remaining changes (unless a limit has been specified)
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            if 'limit' in request.query_params and (limit := OptionalLimitOffsetPagination().get_limit(request)):
+                queryset = queryset[:limit]
+            return StreamingHttpResponse(
+                self._stream_changes(queryset, request),
+                content_type=NDJSONRenderer.media_type
+            )
+
+        limit = OptionalLimitOffsetPagination().get_limit(request) or get_config().PAGINATE_COUNT
+        changes = list(queryset[:limit + 1])
+        has_next = len(changes) > limit
+        ObjectChange.prefetch_full_data(changes[:limit])
+        results = serializers.ObjectChangeFeedSerializer(
+            changes[:limit],
+            many=True,
+            context={'request': request}
+        ).data
+        if results:
+            cursor = results[-1]['cursor']
+
+        return Response({
+            'next': replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if has_next else None,
+            'cursor': cursor,
+            'results': results,
+        })
+
+    @staticmethod
+    def _stream_changes(queryset, request):
+        context = {'request': request}
+        chunk_size = get_config().PAGINATE_COUNT
+        objectchanges = queryset.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(objectchanges, chunk_size)):
+            # Rebuild the full snapshots of any deltas in bulk
+            ObjectChange.prefetch_full_data(chunk)
+            for objectchange in chunk:
+                data = serializers.ObjectChangeFeedSerializer(objectchange, context=context).data
+                yield NDJSONRenderer.render_line(data)
+
 
 #
 # Object types
@@ -1,16 +1,22 @@
 import functools
 import re
+from collections import OrderedDict
+
 from django.utils.translation import gettext as _
 
 __all__ = (
     'Condition',
     'ConditionSet',
+    'get_condition_set',
 )
 
 
 AND = 'and'
 OR = 'or'
 
+# Maximum number of compiled ConditionSets to retain in memory (see get_condition_set())
+CONDITION_SET_CACHE_SIZE = 1024
+
 
 def is_ruleset(data):
     """
@@ -59,23 +65,32 @@ class Condition:
         if op not in self.TYPES[type(value)]:
             raise ValueError(_("Invalid type for {op} operation: {value}").format(op=op, value=type(value)))
 
+        # Precompile regular expressions
+        if op == self.REGEX:
+            try:
+                self.pattern = re.compile(value)
+            except re.error as e:
+                raise ValueError(_("Invalid regular expression: {value} ({error})").format(value=value, error=e))
+
         self.attr = attr
+        self.path = attr.split('.')
         self.value = value
         self.eval_func = getattr(self, f'eval_{op}')
         self.negate = negate
 
+    @staticmethod
+    def _get(obj, key):
+        if isinstance(obj, list):
+            return [dict.get(i, key) for i in obj]
+
+        return dict.get(obj, key)
+
     def eval(self, data):
         """
         Evaluate the provided data to determine whether it matches the condition.
         """
-        def _get(obj, key):
-            if isinstance(obj, list):
-                return [dict.get(i, key) for i in obj]
-
-            return dict.get(obj, key)
-
         try:
-            value = functools.reduce(_get, self.attr.split('.'), data)
+            value = functools.reduce(self._get, self.path, data)
         except TypeError:
             # Invalid key path
             value = None
@@ -118,7 +133,7 @@ class Condition:
     # Regular expressions
 
     def eval_regex(self, value):
-        return re.match(self.value, value) is not None
+        return self.pattern.match(value) is not None
 
 
 class ConditionSet:
@@ -146,6 +161,7 @@ class ConditionSet:
                 logic=logic, op_and=AND, op_or=OR
             ))
         self.logic = logic.lower()
+        self.eval_func = any if self.logic == OR else all
 
         # Compile the set of Conditions
         self.conditions = [
@@ -157,5 +173,27 @@ class ConditionSet:
         """
         Evaluate the provided data to determine whether it matches this set of conditions.
         """
-        func = any if self.logic == 'or' else all
-        return func(d.eval(data) for d in self.conditions)
+        return self.eval_func(d.eval(data) for d in self.conditions)
+
+
+_condition_set_cache = OrderedDict()
+
+
+def get_condition_set(ruleset, key=None):
+    """
+    Return a compiled ConditionSet for the given ruleset. If a key is provided, the ConditionSet is cached for reuse
+    under that key, which must change whenever the ruleset does (e.g. an EventRule's PK and modification time). The
+    least recently used ConditionSets are discarded once CONDITION_SET_CACHE_SIZE is reached.
+    """
+    if key is None:
+        return ConditionSet(ruleset)
+
+    try:
+        condition_set = _condition_set_cache[key]
+        _condition_set_cache.move_to_end(key)
+    except KeyError:
+        condition_set = _condition_set_cache[key] = ConditionSet(ruleset)
+        if len(_condition_set_cache) > CONDITION_SET_CACHE_SIZE:
+            _condition_set_cache.popitem(last=False)
+
+    return condition_set
@@ -1,3 +1,7 @@
+# Change logging
+# When delta storage is enabled, a full snapshot of each object is stored at least every this many changes
+CHANGELOG_SNAPSHOT_INTERVAL = 10
+
 # Events
 EVENT_CREATE = 'create'
 EVENT_UPDATE = 'update'
@@ -9,6 +13,13 @@ EVENT_JOB_END = 'job_end'
 # Webhooks
 HTTP_CONTENT_TYPE_JSON = 'application/json'
 
+# Maximum number of webhook deliveries to be sent by a single task (when WEBHOOK_CONCURRENCY > 1)
+WEBHOOK_BATCH_SIZE = 100
+
+# Limits for webhooks which combine multiple events into a single request
+WEBHOOK_EVENT_BATCH_SIZE_MAX = 1000
+WEBHOOK_EVENT_BATCH_WINDOW_MAX = 3600
+
 WEBHOOK_EVENT_TYPES = {
     EVENT_CREATE: 'created',
     EVENT_UPDATE: 'updated',
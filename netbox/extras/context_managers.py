@@ -1,26 +1,45 @@
 from contextlib import contextmanager
 
-from netbox.context import current_request, events_queue
+from django.conf import settings
+from django.db import transaction
+
+from netbox.context import changelog_queue, current_request, events_queue, search_generation_queue, search_queue
 from .events import flush_events
+from .signals import flush_objectchanges
 
 
 @contextmanager
 def event_tracking(request):
     """
     Queue interesting events in memory while processing a request, then flush that queue for processing by the
-    events pipline before returning the response.
+    events pipline before returning the response. (If EVENTS_OUTBOX_ENABLED is set, the events have already been
+    recorded in the outbox, to be relayed to the events pipeline by the relay_events management command.)
+
+    The request is processed within a transaction. ObjectChanges buffered during the request (see
+    enqueue_objectchange()) are saved before the transaction is committed, and queued events are flushed once it has
+    been committed.
 
     :param request: WSGIRequest object with a unique `id` set
     """
     current_request.set(request)
     events_queue.set({})
+    changelog_queue.set({})
+    search_queue.set({})
+    search_generation_queue.set({})
+
+    with transaction.atomic():
+        yield
 
-    yield
+        # Save any buffered ObjectChanges
+        flush_objectchanges()
 
-    # Flush queued webhooks to RQ
-    if events := list(events_queue.get().values()):
+    # Flush queued webhooks to RQ (unless they have been recorded in the outbox)
+    if not settings.EVENTS_OUTBOX_ENABLED and (events := list(events_queue.get().values())):
         flush_events(events)
 
     # Clear context vars
     current_request.set(None)
     events_queue.set({})
+    changelog_queue.set(None)
+    search_queue.set(None)
+    search_generation_queue.set(None)
@@ -1,23 +1,36 @@
+import time
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
 from django_rq import get_queue
+from rq import Queue
 
 from core.models import Job
-from netbox.config import get_config
-from netbox.constants import RQ_QUEUE_DEFAULT
+from netbox.context import current_request
 from netbox.registry import registry
 from utilities.api import get_serializer_for_model
-from utilities.rqworker import get_rq_retry
+from utilities.rqworker import get_queue_for_model, get_rq_retry
 from utilities.serialization import serialize_object
 from .choices import *
-from .models import EventRule
+from .constants import WEBHOOK_BATCH_SIZE
+from .models import EventRule, OutboxEvent
+from .webhooks import collect_webhook_events, get_delivery_job, get_webhook_context
 
 logger = logging.getLogger('netbox.events_processor')
 
+# Map object change actions to the corresponding EventRule fields
+ACTION_FLAGS = {
+    ObjectChangeActionChoices.ACTION_CREATE: 'type_create',
+    ObjectChangeActionChoices.ACTION_UPDATE: 'type_update',
+    ObjectChangeActionChoices.ACTION_DELETE: 'type_delete',
+}
+
 
 def serialize_for_event(instance):
     """
@@ -47,6 +60,56 @@ def get_snapshots(instance, action):
     return snapshots
 
 
+class EventRuleIndex:
+    """
+    An in-process index of the object types and actions targeted by enabled EventRules. This allows the serialization
+    of objects for which no EventRule exists to be skipped entirely. The index is rebuilt whenever the version stored
+    in the cache changes (see invalidate()); this is checked at most once per request.
+    """
+    cache_key = 'extras.eventrule_index_version'
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._request_id = None
+
+    def _refresh(self):
+        request = current_request.get()
+        request_id = getattr(request, 'id', None)
+        if self._index is not None and request_id is not None and request_id == self._request_id:
+            return
+        self._request_id = request_id
+
+        version = cache.get(self.cache_key)
+        if self._index is None or version != self._version:
+            index = set()
+            for object_type_id, *actions in EventRule.objects.filter(enabled=True).values_list(
+                'object_types', 'type_create', 'type_update', 'type_delete'
+            ):
+                for action, enabled in zip(ACTION_FLAGS.values(), actions):
+                    if enabled:
+                        index.add((object_type_id, action))
+            self._index = index
+            self._version = version
+
+    def has_rules(self, object_type, action):
+        """
+        Return True if any enabled EventRule applies to the given object type and action.
+        """
+        self._refresh()
+        return (object_type.pk, ACTION_FLAGS[action]) in self._index
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Force all processes to rebuild their indexes.
+        """
+        cache.set(cls.cache_key, time.time_ns(), None)
+
+
+event_rule_index = EventRuleIndex()
+
+
 def enqueue_object(queue, instance, user, request_id, action):
     """
     Enqueue a serialized representation of a created/updated/deleted object for the processing of
@@ -60,12 +123,18 @@ def enqueue_object(queue, instance, user, request_id, action):
 
     assert instance.pk is not None
     key = f'{app_label}.{model_name}:{instance.pk}'
+    object_type = ContentType.objects.get_for_model(instance)
+
+    # Skip serializing the object if no EventRules apply to it
+    if key not in queue and not event_rule_index.has_rules(object_type, action):
+        return
+
     if key in queue:
         queue[key]['data'] = serialize_for_event(instance)
         queue[key]['snapshots']['postchange'] = get_snapshots(instance, action)['postchange']
     else:
         queue[key] = {
-            'content_type': ContentType.objects.get_for_model(instance),
+            'content_type': object_type,
             'object_id': instance.pk,
             'event': action,
             'data': serialize_for_event(instance),
@@ -74,12 +143,21 @@ def enqueue_object(queue, instance, user, request_id, action):
             'request_id': request_id
         }
 
+    # Record the event in the outbox, within the same transaction as the change
+    if settings.EVENTS_OUTBOX_ENABLED:
+        OutboxEvent.record(queue[key])
 
-def process_event_rules(event_rules, model_name, event, data, username=None, snapshots=None, request_id=None):
-    if username:
-        user = get_user_model().objects.get(username=username)
-    else:
-        user = None
+
+def process_event_rules(event_rules, model_name, event, data, username=None, snapshots=None, request_id=None,
+                        webhook_jobs=None):
+    """
+    Evaluate a set of EventRules against an event, and carry out the action associated with each matching rule.
+
+    Webhook deliveries are enqueued in RQ in bulk. If a list is passed as `webhook_jobs`, the parameters for each
+    delivery are appended to it instead, to be enqueued by the caller (see enqueue_webhook_jobs()).
+    """
+    user = None
+    jobs = webhook_jobs if webhook_jobs is not None else []
 
     for event_rule in event_rules:
 
@@ -90,10 +168,6 @@ def process_event_rules(event_rules, model_name, event, data, username=None, sna
         # Webhooks
         if event_rule.action_type == EventRuleActionChoices.WEBHOOK:
 
-            # Select the appropriate RQ queue
-            queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
-            rq_queue = get_queue(queue_name)
-
             # Compile the task parameters
             params = {
                 "event_rule": event_rule,
@@ -103,24 +177,23 @@ def process_event_rules(event_rules, model_name, event, data, username=None, sna
                 "snapshots": snapshots,
                 "timestamp": timezone.now().isoformat(),
                 "username": username,
-                "retry": get_rq_retry()
             }
             if snapshots:
                 params["snapshots"] = snapshots
             if request_id:
                 params["request_id"] = request_id
 
-            # Enqueue the task
-            rq_queue.enqueue(
-                "extras.webhooks.send_webhook",
-                **params
-            )
+            jobs.append(params)
 
         # Scripts
         elif event_rule.action_type == EventRuleActionChoices.SCRIPT:
             # Resolve the script from action parameters
             script = event_rule.action_object.python_class()
 
+            # Resolve the user (only once)
+            if username and user is None:
+                user = get_user_model().objects.get(username=username)
+
             # Enqueue a Job to record the script's execution
             Job.enqueue(
                 "extras.scripts.run_script",
@@ -135,6 +208,65 @@ def process_event_rules(event_rules, model_name, event, data, username=None, sna
                 action_type=event_rule.action_type
             ))
 
+    if webhook_jobs is None:
+        enqueue_webhook_jobs(jobs)
+
+
+def batch_webhook_jobs(jobs):
+    """
+    Combine the events for each Webhook which has batching enabled into batched deliveries (parameters for
+    send_webhook_batch()) of up to the webhook's batch size. Events for a webhook with a batch window are instead
+    collected, to be sent once the window has elapsed. Returns the list of resulting deliveries.
+    """
+    deliveries = []
+    batches = {}
+
+    for params in jobs:
+        webhook = params['event_rule'].action_object
+        if not webhook.batch_size:
+            deliveries.append(params)
+            continue
+        context = get_webhook_context(**{k: v for k, v in params.items() if k != 'event_rule'})
+        batches.setdefault(webhook.pk, (webhook, []))[1].append(context)
+
+    timestamp = timezone.now().isoformat()
+    for webhook, events in batches.values():
+        if webhook.batch_window:
+            collect_webhook_events(webhook, events)
+            continue
+        for i in range(0, len(events), webhook.batch_size):
+            deliveries.append({
+                'webhook': webhook,
+                'events': events[i:i + webhook.batch_size],
+                'timestamp': timestamp,
+            })
+
+    return deliveries
+
+
+def enqueue_webhook_jobs(jobs):
+    """
+    Enqueue webhook deliveries (a list of parameters for send_webhook()) in RQ using a single round trip. If
+    WEBHOOK_CONCURRENCY is greater than one, deliveries are grouped into batches to be sent concurrently by
+    send_webhooks(); otherwise, a task is enqueued for each delivery.
+    """
+    jobs = batch_webhook_jobs(jobs)
+    if not jobs:
+        return
+
+    if settings.WEBHOOK_CONCURRENCY > 1:
+        tasks = [
+            Queue.prepare_data("extras.webhooks.send_webhooks", kwargs={'deliveries': jobs[i:i + WEBHOOK_BATCH_SIZE]})
+            for i in range(0, len(jobs), WEBHOOK_BATCH_SIZE)
+        ]
+    else:
+        tasks = [
+            Queue.prepare_data(get_delivery_job(params), kwargs=params, retry=get_rq_retry()) for params in jobs
+        ]
+
+    queue_name = get_queue_for_model('webhook')
+    get_queue(queue_name).enqueue_many(tasks)
+
 
 def process_event_queue(events):
     """
@@ -145,13 +277,10 @@ def process_event_queue(events):
         'type_update': {},
         'type_delete': {},
     }
+    webhook_jobs = []
 
     for data in events:
-        action_flag = {
-            ObjectChangeActionChoices.ACTION_CREATE: 'type_create',
-            ObjectChangeActionChoices.ACTION_UPDATE: 'type_update',
-            ObjectChangeActionChoices.ACTION_DELETE: 'type_delete',
-        }[data['event']]
+        action_flag = ACTION_FLAGS[data['event']]
         content_type = data['content_type']
 
         # Cache applicable Event Rules
@@ -165,13 +294,44 @@ def process_event_queue(events):
 
         process_event_rules(
             event_rules, content_type.model, data['event'], data['data'], data['username'],
-            snapshots=data['snapshots'], request_id=data['request_id']
+            snapshots=data['snapshots'], request_id=data['request_id'], webhook_jobs=webhook_jobs
         )
 
+    # Enqueue all webhook deliveries at once
+    enqueue_webhook_jobs(webhook_jobs)
+
+
+def enqueue_event_queue(events):
+    """
+    Enqueue a list of object representations as a single background task, which will process EventRules for all the
+    events. This may be used in place of process_event_queue() in EVENTS_PIPELINE, to avoid evaluating EventRules and
+    enqueuing the resulting actions while handling a request.
+    """
+    queue_name = get_queue_for_model('eventrule')
+    get_queue(queue_name).enqueue("extras.events.process_event_queue", events=events)
+
+
+def relay_outbox_events(batch_size):
+    """
+    Pass up to `batch_size` pending events from the outbox to the events pipeline, deleting them once processed, and
+    return the number of events relayed. The events remain locked (and are skipped by any concurrent relay) until
+    processing has completed; should the pipeline fail, they will be relayed again.
+    """
+    with transaction.atomic():
+        outbox_events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True, of=('self',))[:batch_size]
+        )
+        if outbox_events:
+            flush_events([outbox_event.to_event() for outbox_event in outbox_events], fail_silently=False)
+            OutboxEvent.objects.filter(pk__in=[outbox_event.pk for outbox_event in outbox_events]).delete()
+
+    return len(outbox_events)
+
 
-def flush_events(events):
+def flush_events(events, fail_silently=True):
     """
-    Flush a list of object representations to RQ for event processing.
+    Flush a list of object representations to RQ for event processing. If `fail_silently` is False, any exception
+    raised by the events pipeline is propagated rather than logged.
     """
     if events:
         for name in settings.EVENTS_PIPELINE:
@@ -179,4 +339,6 @@ def flush_events(events):
                 func = import_string(name)
                 func(events)
             except Exception as e:
+                if not fail_silently:
+                    raise
                 logger.error(_("Cannot import events pipeline {name} error: {error}").format(name=name, error=e))
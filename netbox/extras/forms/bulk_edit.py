@@ -2,6 +2,7 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 
 from extras.choices import *
+from extras.constants import WEBHOOK_EVENT_BATCH_SIZE_MAX, WEBHOOK_EVENT_BATCH_WINDOW_MAX
 from extras.models import *
 from netbox.forms import NetBoxModelBulkEditForm
 from utilities.forms import BulkEditForm, add_blank_choice
@@ -206,8 +207,20 @@ class WebhookBulkEditForm(NetBoxModelBulkEditForm):
         required=False,
         label=_('CA file path')
     )
+    batch_size = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=WEBHOOK_EVENT_BATCH_SIZE_MAX,
+        label=_('Batch size')
+    )
+    batch_window = forms.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=WEBHOOK_EVENT_BATCH_WINDOW_MAX,
+        label=_('Batch window')
+    )
 
-    nullable_fields = ('secret', 'ca_file_path')
+    nullable_fields = ('secret', 'ca_file_path', 'batch_size')
 
 
 class EventRuleBulkEditForm(NetBoxModelBulkEditForm):
@@ -245,6 +245,7 @@ class WebhookForm(NetBoxModelForm):
             name=_('HTTP Request')
         ),
         FieldSet('ssl_verification', 'ca_file_path', name=_('SSL')),
+        FieldSet('batch_size', 'batch_window', name=_('Batching')),
     )
 
     class Meta:
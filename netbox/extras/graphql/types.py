@@ -2,6 +2,7 @@ from typing import Annotated, List
 
 import strawberry
 import strawberry_django
+from strawberry.scalars import JSON
 
 from extras import models
 from extras.graphql.mixins import CustomFieldsMixin, TagsMixin
@@ -129,7 +130,14 @@ class JournalEntryType(CustomFieldsMixin, TagsMixin, ObjectType):
     filters=ObjectChangeFilter
 )
 class ObjectChangeType(BaseObjectType):
-    pass
+
+    @strawberry_django.field
+    def prechange_data(self) -> JSON | None:
+        return self.prechange_data_full
+
+    @strawberry_django.field
+    def postchange_data(self) -> JSON | None:
+        return self.postchange_data_full
 
 
 @strawberry_django.type(
@@ -1,3 +1,4 @@
+from django.contrib.postgres.lookups import TrigramSimilar
 from django.db.models import CharField, TextField, Lookup
 from .fields import CachedValueField
 
@@ -32,3 +33,4 @@ class NetContainsOrEquals(Lookup):
 
 CharField.register_lookup(Empty)
 CachedValueField.register_lookup(NetContainsOrEquals)
+CachedValueField.register_lookup(TrigramSimilar)
@@ -1,22 +1,65 @@
 from datetime import timedelta
 from importlib import import_module
+from itertools import islice
 
 import requests
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management.base import BaseCommand
 from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from packaging import version
 
 from core.models import Job
 from extras.models import ObjectChange
 from netbox.config import Config
+from utilities.partitioning import create_partitions, drop_partitions, is_partitioned
+
+# Number of future months for which changelog partitions are maintained
+CHANGELOG_PARTITIONS_AHEAD = 3
+
+# Number of deltas to materialize per batch
+MATERIALIZE_BATCH_SIZE = 1000
 
 
 class Command(BaseCommand):
     help = "Perform nightly housekeeping tasks. (This command can be run at any time.)"
 
+    @staticmethod
+    def materialize_deltas(cutoff):
+        """
+        Replace the earliest change recorded for each object after the cut-off time with a full snapshot (if it is a
+        delta), so that full snapshots can still be rebuilt once all preceding changes have been deleted.
+        """
+        if not ObjectChange.objects.filter(is_delta=True).exists():
+            return 0
+
+        # Find deltas which have no earlier change to the same object after the cut-off time
+        earlier_changes = ObjectChange.objects.filter(
+            changed_object_type=OuterRef('changed_object_type'),
+            changed_object_id=OuterRef('changed_object_id'),
+            time__gte=cutoff,
+            pk__lt=OuterRef('pk')
+        )
+        objectchanges = ObjectChange.objects.filter(
+            time__gte=cutoff,
+            is_delta=True
+        ).exclude(
+            Exists(earlier_changes)
+        ).iterator(chunk_size=MATERIALIZE_BATCH_SIZE)
+
+        # Rebuild and save the full snapshots in batches
+        count = 0
+        while batch := list(islice(objectchanges, MATERIALIZE_BATCH_SIZE)):
+            ObjectChange.prefetch_full_data(batch)
+            for objectchange in batch:
+                objectchange.decompress()
+            ObjectChange.objects.bulk_update(batch, ('prechange_data', 'postchange_data', 'is_delta'))
+            count += len(batch)
+
+        return count
+
     def handle(self, *args, **options):
         config = Config()
 
@@ -37,6 +80,20 @@ class Command(BaseCommand):
                     f"clearing sessions; skipping."
                 )
 
+        # Create upcoming changelog partitions (if the changelog table has been partitioned)
+        changelog_partitioned = is_partitioned(ObjectChange)
+        if changelog_partitioned:
+            if options['verbosity']:
+                self.stdout.write("[*] Checking for upcoming changelog partitions")
+            now = timezone.now()
+            created = create_partitions(
+                ObjectChange, now, now + timedelta(days=31 * CHANGELOG_PARTITIONS_AHEAD)
+            )
+            if options['verbosity']:
+                for name in created:
+                    self.stdout.write(f"\tCreated partition {name}")
+                self.stdout.write(f"\t{len(created)} partitions created.", self.style.SUCCESS)
+
         # Delete expired ObjectChanges
         if options['verbosity']:
             self.stdout.write("[*] Checking for expired changelog records")
@@ -45,6 +102,16 @@ class Command(BaseCommand):
             if options['verbosity'] >= 2:
                 self.stdout.write(f"\tRetention period: {config.CHANGELOG_RETENTION} days")
                 self.stdout.write(f"\tCut-off time: {cutoff}")
+            # Any delta records which will remain must not depend on a full snapshot which is due to be deleted
+            materialized = self.materialize_deltas(cutoff)
+            if materialized and options['verbosity'] >= 2:
+                self.stdout.write(f"\tRestored full snapshots for {materialized} delta records")
+            if changelog_partitioned:
+                # Drop any partitions which have expired entirely
+                dropped = drop_partitions(ObjectChange, cutoff)
+                if options['verbosity']:
+                    for name in dropped:
+                        self.stdout.write(f"\tDropped expired partition {name}")
             expired_records = ObjectChange.objects.filter(time__lt=cutoff).count()
             if expired_records:
                 if options['verbosity']:
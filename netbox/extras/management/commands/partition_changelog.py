@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from extras.models import ObjectChange
+from utilities.partitioning import get_partitions, is_partitioned, partition_table
+
+
+class Command(BaseCommand):
+    help = "Convert the changelog (ObjectChange) table into a table partitioned by month"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help="Number of future months for which to create partitions (default: 3)"
+        )
+        parser.add_argument(
+            '--no-input',
+            action='store_false',
+            dest='interactive',
+            help="Do not prompt for confirmation"
+        )
+
+    def handle(self, *args, **options):
+        if is_partitioned(ObjectChange):
+            raise CommandError("The changelog table is already partitioned.")
+
+        if options['interactive']:
+            self.stdout.write(self.style.WARNING(
+                "The changelog table will be locked while all existing records are copied to the new partitioned "
+                "table. This may take a considerable amount of time for large tables."
+            ))
+            confirm = input("Proceed? [y/N] ")
+            if confirm.lower() not in ('y', 'yes'):
+                self.stdout.write("Aborted.")
+                return
+
+        self.stdout.write("Partitioning changelog table... ", ending='')
+        self.stdout.flush()
+        partition_table(ObjectChange, 'time', months_ahead=options['months_ahead'])
+        self.stdout.write("Done.", self.style.SUCCESS)
+
+        if options['verbosity'] >= 2:
+            for name, start, end in get_partitions(ObjectChange):
+                self.stdout.write(f"\t{name}: {start} - {end}")
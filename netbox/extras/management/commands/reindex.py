@@ -1,9 +1,27 @@
+import time
+from concurrent.futures import as_completed
+
 from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
 from django.utils.translation import gettext as _
 
 from netbox.registry import registry
 from netbox.search.backends import search_backend
+from utilities.parallel import get_process_pool, split_range
+
+
+def cache_chunk(label, start, end):
+    """
+    Cache all objects of the indexed model identified by `label` having a primary key within the range [start, end].
+    This is executed within a worker process.
+    """
+    indexer = registry['search'][label]
+    queryset = indexer.model.objects.order_by('pk')
+    if start is not None:
+        queryset = queryset.filter(pk__gte=start, pk__lte=end)
+
+    return search_backend.cache(queryset.iterator(chunk_size=2000), indexer=indexer, remove_existing=False)
 
 
 class Command(BaseCommand):
@@ -21,6 +39,26 @@ class Command(BaseCommand):
             action='store_true',
             help="For each model, reindex objects only if no cache entries already exist"
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of worker processes to use for indexing (default: 1)"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help="Maximum range of primary keys assigned to a worker at once (default: 10000)"
+        )
+
+    def draw_progress_bar(self, percentage):
+        """
+        Draw a simple progress bar 20 increments wide illustrating the specified percentage.
+        """
+        bar_size = int(percentage / 5)
+        self.stdout.write(f"\r  [{'#' * bar_size}{' ' * (20 - bar_size)}] {int(percentage)}%", ending='')
+        self.stdout.flush()
 
     def _get_indexers(self, *model_names):
         indexers = {}
@@ -58,7 +96,43 @@ class Command(BaseCommand):
 
         return indexers
 
+    @staticmethod
+    def _get_chunks(model, chunk_size):
+        """
+        Partition a model's objects into ranges of primary keys, to be indexed independently.
+        """
+        pk_range = model.objects.aggregate(start=Min('pk'), end=Max('pk'))
+        if pk_range['start'] is None:
+            return []
+        if not isinstance(pk_range['start'], int):
+            # Non-integer primary keys cannot be partitioned; index the entire table as a single chunk
+            return [(None, None)]
+        return split_range(pk_range['start'], pk_range['end'], chunk_size)
+
+    def _cache_parallel(self, pool, label, model, chunk_size):
+        """
+        Distribute the indexing of a model across the worker pool, reporting progress as each chunk completes.
+        """
+        chunks = self._get_chunks(model, chunk_size)
+        if not chunks:
+            return 0
+
+        futures = [pool.submit(cache_chunk, label, start, end) for start, end in chunks]
+        count = 0
+        self.stdout.write('')
+        for i, future in enumerate(as_completed(futures), start=1):
+            count += future.result()
+            self.draw_progress_bar(i * 100 / len(futures))
+        self.stdout.write('\n    ', ending='')
+
+        return count
+
     def handle(self, *model_labels, **kwargs):
+        workers = kwargs['workers']
+        if workers < 1:
+            raise CommandError(_("The number of workers must be at least 1."))
+        if kwargs['chunk_size'] < 1:
+            raise CommandError(_("The chunk size must be at least 1."))
 
         # Determine which models to reindex
         indexers = self._get_indexers(*model_labels)
@@ -73,25 +147,40 @@ class Command(BaseCommand):
             deleted_count = search_backend.clear()
             self.stdout.write(f'{deleted_count} entries deleted.')
 
-        # Index models
-        self.stdout.write('Indexing models')
-        for model, idx in indexers.items():
-            app_label = model._meta.app_label
-            model_name = model._meta.model_name
-            self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
-            self.stdout.flush()
+        # Start the worker pool (if indexing in parallel)
+        pool = get_process_pool(workers) if workers > 1 else None
+        if pool:
+            self.stdout.write(f'Indexing models using {workers} workers')
+        else:
+            self.stdout.write('Indexing models')
 
-            if kwargs['lazy']:
-                content_type = ContentType.objects.get_for_model(model)
-                if cached_count := search_backend.count(object_types=[content_type]):
-                    self.stdout.write(f'Skipping (found {cached_count} existing).')
-                    continue
-
-            i = search_backend.cache(model.objects.iterator(), remove_existing=False)
-            if i:
-                self.stdout.write(f'{i} entries cached.')
-            else:
-                self.stdout.write(f'No objects found.')
+        # Index models
+        try:
+            for model, idx in indexers.items():
+                app_label = model._meta.app_label
+                model_name = model._meta.model_name
+                self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
+                self.stdout.flush()
+
+                if kwargs['lazy']:
+                    content_type = ContentType.objects.get_for_model(model)
+                    if cached_count := search_backend.count(object_types=[content_type]):
+                        self.stdout.write(f'Skipping (found {cached_count} existing).')
+                        continue
+
+                start_time = time.monotonic()
+                if pool:
+                    i = self._cache_parallel(pool, f'{app_label}.{model_name}', model, kwargs['chunk_size'])
+                else:
+                    i = search_backend.cache(model.objects.iterator(), remove_existing=False)
+                elapsed = time.monotonic() - start_time
+                if i:
+                    self.stdout.write(f'{i} entries cached in {elapsed:.2f} seconds.')
+                else:
+                    self.stdout.write(f'No objects found.')
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
 
         msg = f'Completed.'
         if total_count := search_backend.size:
@@ -0,0 +1,54 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from extras.events import relay_outbox_events
+
+logger = logging.getLogger('netbox.events_processor')
+
+
+class Command(BaseCommand):
+    help = "Relay events recorded in the outbox to the events pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Maximum number of events to pass to the events pipeline at once (default: 100)"
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help="Number of seconds to wait before checking for new events once the outbox is empty (default: 1)"
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once the outbox has been emptied"
+        )
+
+    def handle(self, *args, **options):
+        if not settings.EVENTS_OUTBOX_ENABLED:
+            self.stdout.write(self.style.WARNING("EVENTS_OUTBOX_ENABLED is not set; no new events will be recorded."))
+
+        while True:
+            close_old_connections()
+            try:
+                count = relay_outbox_events(options['batch_size'])
+            except Exception as e:
+                # The events remain in the outbox; retry after the polling interval
+                logger.error(f"Failed to relay events: {e}")
+                count = 0
+            else:
+                if count and options['verbosity'] >= 2:
+                    self.stdout.write(f"Relayed {count} events")
+
+            if count < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:36
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('extras', '0115_convert_dashboard_widgets'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='cachedvalue',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('value'),
+                    name='gin_trgm_ops'
+                ),
+                name='extras_cachedvalue_value_trgm'
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:47
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0116_cachedvalue_value_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='batch_size',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1000)]),
+        ),
+        migrations.AddField(
+            model_name='webhook',
+            name='batch_window',
+            field=models.PositiveIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(3600)]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0118_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectchange',
+            name='is_delta',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
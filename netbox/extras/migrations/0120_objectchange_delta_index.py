@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0119_objectchange_is_delta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='objectchange',
+            index=models.Index(condition=models.Q(('is_delta', True)), fields=['time'], name='extras_objectchange_delta'),
+        ),
+    ]
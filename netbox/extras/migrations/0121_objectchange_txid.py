@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 07:54
+
+from django.db import migrations, models
+
+import utilities.query_functions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0120_objectchange_delta_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectchange',
+            name='txid',
+            field=models.BigIntegerField(db_default=utilities.query_functions.TransactionID(), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='objectchange',
+            index=models.Index(fields=['txid', 'id'], name='extras_obje_txid_479c4e_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from .configs import *
 from .customfields import *
 from .dashboard import *
 from .models import *
+from .outbox import *
 from .scripts import *
 from .search import *
 from .staging import *
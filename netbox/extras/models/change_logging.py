@@ -4,14 +4,18 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Max, Q
+from django.db.models.functions import RowNumber
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel
 
 from core.models import ObjectType
 from extras.choices import *
+from extras.constants import CHANGELOG_SNAPSHOT_INTERVAL
 from netbox.models.features import ChangeLoggingMixin
 from utilities.data import shallow_compare_dict
+from utilities.query_functions import TransactionID
 from ..querysets import ObjectChangeQuerySet
 
 __all__ = (
@@ -94,6 +98,21 @@ class ObjectChange(models.Model):
         blank=True,
         null=True
     )
+    is_delta = models.BooleanField(
+        verbose_name=_('delta'),
+        default=False,
+        editable=False,
+        help_text=_(
+            "The pre- and post-change data include only the attributes which have changed. Full snapshots are "
+            "rebuilt from preceding changes to the object."
+        )
+    )
+    txid = models.BigIntegerField(
+        verbose_name=_('transaction ID'),
+        db_default=TransactionID(),
+        editable=False,
+        help_text=_("The ID of the database transaction which recorded the change")
+    )
 
     objects = ObjectChangeQuerySet.as_manager()
 
@@ -102,6 +121,8 @@ class ObjectChange(models.Model):
         indexes = (
             models.Index(fields=('changed_object_type', 'changed_object_id')),
             models.Index(fields=('related_object_type', 'related_object_id')),
+            models.Index(fields=('txid', 'id')),
+            models.Index(fields=('time',), condition=Q(is_delta=True), name='extras_objectchange_delta'),
         )
         verbose_name = _('object change')
         verbose_name_plural = _('object changes')
@@ -135,6 +156,179 @@ class ObjectChange(models.Model):
 
         return super().save(*args, **kwargs)
 
+    @property
+    def _compressible(self):
+        if not settings.CHANGELOG_DELTA_STORAGE or self.is_delta:
+            return False
+        if self.action != ObjectChangeActionChoices.ACTION_UPDATE:
+            return False
+        if not self.prechange_data or not self.postchange_data:
+            return False
+        # Attributes which have been added or removed cannot be represented as a delta
+        return self.prechange_data.keys() == self.postchange_data.keys()
+
+    def compress(self, recent=None):
+        """
+        If CHANGELOG_DELTA_STORAGE is enabled, reduce the pre- and post-change data of an update to only the
+        attributes which have changed. A full snapshot is instead retained if none of the object's preceding
+        CHANGELOG_SNAPSHOT_INTERVAL - 1 changes has one, so that full snapshots can always be rebuilt from a bounded
+        number of records.
+
+        :param recent: The is_delta values of the object's preceding changes, most recent first (optional; these are
+            retrieved from the database if not specified)
+        """
+        if not self._compressible:
+            return
+
+        # Check whether a full snapshot is due
+        if recent is None:
+            preceding = ObjectChange.objects.filter(
+                changed_object_type_id=self.changed_object_type_id,
+                changed_object_id=self.changed_object_id
+            )
+            if self.pk:
+                preceding = preceding.filter(pk__lt=self.pk)
+            recent = preceding.order_by('-pk').values_list('is_delta', flat=True)
+        if False not in recent[:CHANGELOG_SNAPSHOT_INTERVAL - 1]:
+            return
+
+        changed_attrs = [k for k, v in self.postchange_data.items() if self.prechange_data[k] != v]
+        self.prechange_data = {k: self.prechange_data[k] for k in changed_attrs}
+        self.postchange_data = {k: self.postchange_data[k] for k in changed_attrs}
+        self.is_delta = True
+    compress.alters_data = True
+
+    @classmethod
+    def compress_many(cls, objectchanges):
+        """
+        Compress a sequence of new (unsaved) ObjectChanges, in the order in which they were made. The recent changes
+        to all affected objects are retrieved in a single query.
+        """
+        objectchanges = list(objectchanges)
+        candidates = [oc for oc in objectchanges if oc._compressible]
+        if not candidates:
+            return
+
+        # Retrieve the is_delta values of the most recent changes to each object, most recent first
+        recent = {}
+        preceding = cls.objects.filter(
+            changed_object_type_id__in={oc.changed_object_type_id for oc in candidates},
+            changed_object_id__in={oc.changed_object_id for oc in candidates}
+        ).annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=('changed_object_type_id', 'changed_object_id'),
+                order_by='-pk'
+            )
+        ).filter(
+            row_number__lt=CHANGELOG_SNAPSHOT_INTERVAL
+        ).order_by('pk').values_list('changed_object_type_id', 'changed_object_id', 'is_delta')
+        for object_type_id, object_id, is_delta in preceding:
+            recent.setdefault((object_type_id, object_id), []).insert(0, is_delta)
+
+        for objectchange in objectchanges:
+            key = (objectchange.changed_object_type_id, objectchange.changed_object_id)
+            history = recent.setdefault(key, [])
+            objectchange.compress(recent=history)
+            history.insert(0, objectchange.is_delta)
+    compress_many.alters_data = True
+
+    def decompress(self):
+        """
+        Replace the pre- and post-change data of a delta with full snapshots.
+        """
+        if self.is_delta:
+            self.prechange_data, self.postchange_data = self._full_data
+            self.is_delta = False
+            self.__dict__.pop('_full_data', None)
+    decompress.alters_data = True
+
+    @classmethod
+    def prefetch_full_data(cls, objectchanges):
+        """
+        Rebuild the full pre- and post-change data of all deltas among the given ObjectChanges, retrieving their
+        preceding changes in bulk (two queries in total).
+        """
+        deltas = {}
+        for objectchange in objectchanges:
+            if objectchange.is_delta and '_full_data' not in objectchange.__dict__:
+                key = (objectchange.changed_object_type_id, objectchange.changed_object_id)
+                deltas.setdefault(key, []).append(objectchange)
+        if not deltas:
+            return
+
+        # Find the most recent full snapshot preceding the earliest delta to each object
+        snapshot_filter = Q()
+        for (object_type_id, object_id), ocs in deltas.items():
+            snapshot_filter |= Q(
+                changed_object_type_id=object_type_id,
+                changed_object_id=object_id,
+                pk__lt=min(oc.pk for oc in ocs)
+            )
+        snapshots = {
+            (row['changed_object_type_id'], row['changed_object_id']): row['snapshot']
+            for row in cls.objects.filter(snapshot_filter, is_delta=False).order_by().values(
+                'changed_object_type_id', 'changed_object_id'
+            ).annotate(snapshot=Max('pk'))
+        }
+
+        # Retrieve all changes from each snapshot up to the latest delta
+        history = {}
+        if snapshots:
+            history_filter = Q()
+            for (object_type_id, object_id), snapshot in snapshots.items():
+                history_filter |= Q(
+                    changed_object_type_id=object_type_id,
+                    changed_object_id=object_id,
+                    pk__gte=snapshot,
+                    pk__lt=max(oc.pk for oc in deltas[(object_type_id, object_id)])
+                )
+            preceding = cls.objects.filter(history_filter).order_by('pk').values_list(
+                'changed_object_type_id', 'changed_object_id', 'pk', 'is_delta', 'postchange_data'
+            )
+            for object_type_id, object_id, *row in preceding:
+                history.setdefault((object_type_id, object_id), []).append(row)
+
+        # Apply the deltas preceding each delta to the most recent full snapshot
+        for key, ocs in deltas.items():
+            rows = iter(history.get(key, []))
+            row = next(rows, None)
+            data = None
+            for objectchange in sorted(ocs, key=lambda oc: oc.pk):
+                while row is not None and row[0] < objectchange.pk:
+                    _, is_delta, postchange_data = row
+                    if not is_delta:
+                        data = dict(postchange_data or {})
+                    elif data is not None:
+                        data.update(postchange_data or {})
+                    row = next(rows, None)
+                if data is None:
+                    # The full snapshot has been deleted; only the delta is available
+                    full_data = (objectchange.prechange_data, objectchange.postchange_data)
+                else:
+                    prechange_data = {**data, **objectchange.prechange_data}
+                    full_data = (prechange_data, {**prechange_data, **objectchange.postchange_data})
+                objectchange.__dict__['_full_data'] = full_data
+
+    @cached_property
+    def _full_data(self):
+        """
+        Return the full pre- and post-change data, rebuilding them from the preceding changes to the object if this
+        is a delta.
+        """
+        if not self.is_delta:
+            return self.prechange_data, self.postchange_data
+        self.prefetch_full_data([self])
+        return self.__dict__['_full_data']
+
+    @property
+    def prechange_data_full(self):
+        return self._full_data[0]
+
+    @property
+    def postchange_data_full(self):
+        return self._full_data[1]
+
     def get_absolute_url(self):
         return reverse('extras:objectchange', args=[self.pk])
 
@@ -170,7 +364,7 @@ class ObjectChange(models.Model):
         Return only the pre-/post-change attributes which are relevant for calculating a diff.
         """
         ret = {}
-        change_data = getattr(self, f'{prefix}_data') or {}
+        change_data = getattr(self, f'{prefix}_data_full') or {}
         for k, v in change_data.items():
             if k not in self.diff_exclude_fields and not k.startswith('_'):
                 ret[k] = v
@@ -3,7 +3,7 @@ import urllib.parse
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
-from django.core.validators import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator, ValidationError
 from django.db import models
 from django.http import HttpResponse
 from django.urls import reverse
@@ -14,7 +14,7 @@ from rest_framework.utils.encoders import JSONEncoder
 
 from core.models import ObjectType
 from extras.choices import *
-from extras.conditions import ConditionSet
+from extras.conditions import ConditionSet, get_condition_set
 from extras.constants import *
 from extras.utils import image_upload
 from netbox.config import get_config
@@ -168,7 +168,9 @@ class EventRule(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLogged
         if not self.conditions:
             return True
 
-        return ConditionSet(self.conditions).eval(data)
+        # Reuse the compiled ConditionSet for a saved EventRule until the rule is modified
+        key = (self.pk, self.last_updated) if self.pk else None
+        return get_condition_set(self.conditions, key=key).eval(data)
 
 
 class Webhook(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedModel):
@@ -251,6 +253,30 @@ class Webhook(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedMo
             "The specific CA certificate file to use for SSL verification. Leave blank to use the system defaults."
         )
     )
+    batch_size = models.PositiveIntegerField(
+        verbose_name=_('batch size'),
+        blank=True,
+        null=True,
+        validators=(
+            MinValueValidator(1),
+            MaxValueValidator(WEBHOOK_EVENT_BATCH_SIZE_MAX)
+        ),
+        help_text=_(
+            "Combine multiple events into a single request containing a list of up to this many events. Leave blank "
+            "to send a separate request for each event."
+        )
+    )
+    batch_window = models.PositiveIntegerField(
+        verbose_name=_('batch window'),
+        default=0,
+        validators=(
+            MaxValueValidator(WEBHOOK_EVENT_BATCH_WINDOW_MAX),
+        ),
+        help_text=_(
+            "The number of seconds for which to collect events before sending a batch. If zero, only the events "
+            "resulting from a single request are batched together."
+        )
+    )
     events = GenericRelation(
         EventRule,
         content_type_field='action_object_type',
@@ -281,6 +307,12 @@ class Webhook(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedMo
                 'ca_file_path': _('Do not specify a CA certificate file if SSL verification is disabled.')
             })
 
+        # A batch window requires batching to be enabled
+        if self.batch_window and not self.batch_size:
+            raise ValidationError({
+                'batch_window': _('A batch size must be specified to use a batch window.')
+            })
+
     def render_headers(self, context):
         """
         Render additional_headers and return a dict of Header: Value pairs.
@@ -0,0 +1,101 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+__all__ = (
+    'OutboxEvent',
+)
+
+
+class OutboxEvent(models.Model):
+    """
+    An event recorded within the same database transaction as the change which produced it, pending relay to the
+    events pipeline (see the relay_events management command). Only one OutboxEvent is recorded per object per
+    request; subsequent changes to the object update its data and snapshots.
+    """
+    created = models.DateTimeField(
+        verbose_name=_('created'),
+        auto_now_add=True,
+        editable=False
+    )
+    request_id = models.UUIDField(
+        verbose_name=_('request ID'),
+        editable=False
+    )
+    object_type = models.ForeignKey(
+        to='contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    object_id = models.PositiveBigIntegerField()
+    event = models.CharField(
+        verbose_name=_('event'),
+        max_length=50
+    )
+    data = models.JSONField(
+        verbose_name=_('data'),
+        encoder=DjangoJSONEncoder
+    )
+    snapshots = models.JSONField(
+        verbose_name=_('snapshots'),
+        encoder=DjangoJSONEncoder,
+        blank=True,
+        null=True
+    )
+    username = models.CharField(
+        verbose_name=_('username'),
+        max_length=150
+    )
+
+    _netbox_private = True
+
+    class Meta:
+        ordering = ('pk',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('request_id', 'object_type', 'object_id'),
+                name='%(app_label)s_%(class)s_unique_request_object'
+            ),
+        )
+        verbose_name = _('outbox event')
+        verbose_name_plural = _('outbox events')
+
+    def __str__(self):
+        return f'{self.object_type} {self.object_id}: {self.event}'
+
+    @classmethod
+    def record(cls, event):
+        """
+        Record an event (as queued by enqueue_object()), or update the existing record for the same object and request.
+        """
+        cls.objects.bulk_create(
+            [
+                cls(
+                    request_id=event['request_id'],
+                    object_type=event['content_type'],
+                    object_id=event['object_id'],
+                    event=event['event'],
+                    data=event['data'],
+                    snapshots=event['snapshots'],
+                    username=event['username']
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=('request_id', 'object_type', 'object_id'),
+            update_fields=('data', 'snapshots')
+        )
+
+    def to_event(self):
+        """
+        Return the event in the form expected by the events pipeline.
+        """
+        return {
+            'content_type': ContentType.objects.get_for_id(self.object_type_id),
+            'object_id': self.object_id,
+            'event': self.event,
+            'data': self.data,
+            'snapshots': self.snapshots,
+            'username': self.username,
+            'request_id': self.request_id,
+        }
@@ -1,7 +1,8 @@
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.aggregates import JSONBAgg
-from django.db.models import OuterRef, Subquery, Q
+from django.db.models import BigIntegerField, OuterRef, Subquery, Q
+from django.db.models.expressions import RawSQL
 from django.db.utils import ProgrammingError
 
 from extras.models.tags import TaggedItem
@@ -165,3 +166,15 @@ class ObjectChangeQuerySet(RestrictedQuerySet):
             ct.pk for ct in content_types
         )
         return self.filter(changed_object_type_id__in=content_type_ids)
+
+    def committed(self):
+        """
+        Return only changes recorded by transactions which have finished, or by the current transaction. Any change
+        recorded by a transaction which is still in progress would be followed (in order of transaction ID) by all
+        changes recorded by later transactions; these are excluded until it has finished, so that changes are never
+        committed behind those already returned.
+        """
+        return self.filter(
+            Q(txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', (), output_field=BigIntegerField())) |
+            Q(txid=RawSQL('txid_current_if_assigned()', (), output_field=BigIntegerField()))
+        )
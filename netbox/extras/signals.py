@@ -1,10 +1,13 @@
 import importlib
+import itertools
 import logging
+import operator
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db.models.fields.reverse_related import ManyToManyRel
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver, Signal
 from django.utils.translation import gettext_lazy as _
 from django_prometheus.models import model_deletes, model_inserts, model_updates
@@ -12,13 +15,14 @@ from django_prometheus.models import model_deletes, model_inserts, model_updates
 from core.models import ObjectType
 from core.signals import job_end, job_start
 from extras.constants import EVENT_JOB_END, EVENT_JOB_START
-from extras.events import process_event_rules
+from extras.events import event_rule_index, process_event_rules
 from extras.models import EventRule
 from netbox.config import get_config
-from netbox.context import current_request, events_queue
+from netbox.context import changelog_queue, current_request, events_queue
 from netbox.models.features import ChangeLoggingMixin
 from netbox.signals import post_clean
 from utilities.exceptions import AbortRequest
+from utilities.transactions import get_pending_batches, get_transaction_batch
 from .choices import ObjectChangeActionChoices
 from .events import enqueue_object, get_snapshots, serialize_for_event
 from .models import CustomField, ObjectChange, TaggedItem
@@ -55,6 +59,90 @@ def run_validators(instance, validators):
 clear_events = Signal()
 
 
+class ObjectChangeBatch:
+    """
+    The ObjectChanges buffered within a transaction (or savepoint), in the order in which they were recorded. The most
+    recent ObjectChange for each object is indexed by (object type ID, object ID), so that M2M changes can be merged
+    into it.
+    """
+    # Orders ObjectChanges across all batches
+    sequence = itertools.count()
+
+    def __init__(self):
+        self.objectchanges = []
+        self.latest = {}
+
+    def append(self, objectchange):
+        self.objectchanges.append((next(self.sequence), objectchange))
+        self.latest[(objectchange.changed_object_type_id, objectchange.changed_object_id)] = objectchange
+
+    def clear(self):
+        self.objectchanges.clear()
+        self.latest.clear()
+
+
+def get_objectchange_batch():
+    """
+    Return the ObjectChangeBatch for the current transaction (or savepoint). Returns None if ObjectChanges are not
+    being buffered, because no buffer has been established for the request (see event_tracking()) or no transaction is
+    open.
+
+    The buffer is saved by event_tracking() before the transaction enclosing the request is committed. It is discarded
+    if the transaction (or savepoint) is rolled back.
+    """
+    queue = changelog_queue.get()
+    if queue is None or not transaction.get_connection().in_atomic_block:
+        return None
+    return get_transaction_batch(queue, save_objectchanges, factory=ObjectChangeBatch)
+
+
+def enqueue_objectchange(objectchange):
+    """
+    Buffer an ObjectChange, to be saved in bulk with all others recorded within the current transaction. The
+    ObjectChange is saved immediately if it cannot be buffered.
+    """
+    if (batch := get_objectchange_batch()) is None:
+        objectchange.compress()
+        objectchange.save()
+        return
+
+    batch.append(objectchange)
+
+
+def save_objectchanges(*batches):
+    """
+    Save all ObjectChanges in the given ObjectChangeBatches, in the order in which they were recorded, using a single
+    query. (If delta storage is enabled, the recent changes to the affected objects are first retrieved using one
+    additional query.)
+    """
+    objectchanges = [
+        objectchange for _, objectchange in sorted(
+            itertools.chain.from_iterable(batch.objectchanges for batch in batches),
+            key=operator.itemgetter(0)
+        )
+    ]
+    if not objectchanges:
+        return
+
+    for objectchange in objectchanges:
+        # Replicate ObjectChange.save()
+        if not objectchange.user_name:
+            objectchange.user_name = objectchange.user.username
+    ObjectChange.compress_many(objectchanges)
+    ObjectChange.objects.bulk_create(objectchanges)
+    for batch in batches:
+        batch.clear()
+
+
+def flush_objectchanges():
+    """
+    Save any ObjectChanges still buffered for the request. These belong to transactions which remain open (for
+    example, the transaction enclosing the entire request), and are saved within them.
+    """
+    if queue := changelog_queue.get():
+        save_objectchanges(*get_pending_batches(queue))
+
+
 @receiver((post_save, m2m_changed))
 def handle_changed_object(sender, instance, **kwargs):
     """
@@ -84,21 +172,29 @@ def handle_changed_object(sender, instance, **kwargs):
 
     # Create/update an ObjectChange record for this change
     objectchange = instance.to_objectchange(action)
-    # If this is a many-to-many field change, check for a previous ObjectChange instance recorded
-    # for this object by this request and update it
-    if m2m_changed and (
+    object_type = ContentType.objects.get_for_model(instance)
+    batch = get_objectchange_batch() if m2m_changed else None
+    queued_change = batch.latest.get((object_type.pk, instance.pk)) if batch is not None else None
+    # If this is a many-to-many field change, update the previous ObjectChange recorded for this object by this
+    # request (if any). Check for an ObjectChange buffered within the current transaction before querying the
+    # database.
+    if m2m_changed and queued_change:
+        queued_change.postchange_data = objectchange.postchange_data
+    elif m2m_changed and (
         prev_change := ObjectChange.objects.filter(
-            changed_object_type=ContentType.objects.get_for_model(instance),
+            changed_object_type=object_type,
             changed_object_id=instance.pk,
             request_id=request.id
         ).first()
     ):
+        prev_change.decompress()
         prev_change.postchange_data = objectchange.postchange_data
+        prev_change.compress()
         prev_change.save()
     elif objectchange and objectchange.has_changes:
         objectchange.user = request.user
         objectchange.request_id = request.id
-        objectchange.save()
+        enqueue_objectchange(objectchange)
 
     # Ensure that we're working with fresh M2M assignments
     if m2m_changed:
@@ -145,7 +241,7 @@ def handle_deleted_object(sender, instance, **kwargs):
         objectchange = instance.to_objectchange(ObjectChangeActionChoices.ACTION_DELETE)
         objectchange.user = request.user
         objectchange.request_id = request.id
-        objectchange.save()
+        enqueue_objectchange(objectchange)
 
     # Django does not automatically send an m2m_changed signal for the reverse direction of a
     # many-to-many relationship (see https://code.djangoproject.com/ticket/17688), so we need to
@@ -184,6 +280,11 @@ def clear_events_queue(sender, **kwargs):
     logger.info(f"Clearing {len(events_queue.get())} queued events ({sender})")
     events_queue.set({})
 
+    # Discard any buffered ObjectChanges
+    if queue := changelog_queue.get():
+        for batch in get_pending_batches(queue):
+            batch.clear()
+
 
 #
 # Custom fields
@@ -263,6 +364,17 @@ def validate_assigned_tags(sender, instance, action, model, pk_set, **kwargs):
 # Event rules
 #
 
+@receiver((post_save, post_delete), sender=EventRule)
+@receiver(m2m_changed, sender=EventRule.object_types.through)
+def invalidate_event_rule_index(sender, **kwargs):
+    """
+    Rebuild the index of enabled EventRules whenever an EventRule is modified. The index is invalidated both
+    immediately and once the transaction has been committed, to avoid other processes caching stale rules.
+    """
+    event_rule_index.invalidate()
+    transaction.on_commit(event_rule_index.invalidate)
+
+
 @receiver(job_start)
 def process_job_start_event_rules(sender, **kwargs):
     """
@@ -42,6 +42,7 @@ class WebhookTest(APIViewTestCases.APIViewTestCase):
         {
             'name': 'Webhook 6',
             'payload_url': 'http://example.com/?6',
+            'batch_size': 100,
         },
     ]
     bulk_update_data = {
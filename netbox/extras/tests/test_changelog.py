@@ -1,13 +1,25 @@
+import json
+import uuid
+from datetime import timedelta
+
 from django.contrib.contenttypes.models import ContentType
-from django.test import override_settings
+from django.db import transaction
+from django.db.models import F
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
 from core.models import ObjectType
 from dcim.choices import SiteStatusChoices
 from dcim.models import Site
 from extras.choices import *
+from extras.constants import CHANGELOG_SNAPSHOT_INTERVAL
+from extras.context_managers import event_tracking
+from extras.management.commands.housekeeping import Command as HousekeepingCommand
 from extras.models import CustomField, CustomFieldChoiceSet, ObjectChange, Tag
+from extras.signals import flush_objectchanges
+from users.models import ObjectPermission
 from utilities.testing import APITestCase
 from utilities.testing.utils import create_tags, post_data
 from utilities.testing.views import ModelViewTestCase
@@ -541,3 +553,256 @@ class ChangeLogAPITest(APITestCase):
         self.assertEqual(objectchange.prechange_data['name'], 'Site 1')
         self.assertEqual(objectchange.prechange_data['slug'], 'site-1')
         self.assertEqual(objectchange.postchange_data, None)
+
+    def test_buffered_objectchanges(self):
+        """
+        Check that ObjectChanges recorded within a transaction are buffered and saved in bulk, with any M2M changes
+        merged into the buffered record.
+        """
+        request = RequestFactory().get(reverse('dcim:site_add'))
+        request.id = uuid.uuid4()
+        request.user = self.user
+        tags = create_tags('Alpha', 'Bravo')
+
+        with event_tracking(request):
+            with transaction.atomic():
+                for i in range(1, 4):
+                    site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+                    site.tags.set(tags)
+                self.assertEqual(ObjectChange.objects.count(), 0)
+
+            # Save the buffered ObjectChanges with a single query
+            with self.assertNumQueries(1):
+                flush_objectchanges()
+
+        self.assertEqual(ObjectChange.objects.count(), 3)
+        for objectchange in ObjectChange.objects.all():
+            self.assertEqual(objectchange.action, ObjectChangeActionChoices.ACTION_CREATE)
+            self.assertEqual(objectchange.user_name, self.user.username)
+            self.assertEqual(objectchange.request_id, request.id)
+            self.assertEqual(objectchange.postchange_data['tags'], ['Alpha', 'Bravo'])
+
+    def test_buffered_objectchanges_order(self):
+        """
+        Check that buffered ObjectChanges are saved before the request's transaction is committed, in the order in
+        which the changes were made.
+        """
+        request = RequestFactory().get(reverse('dcim:site_add'))
+        request.id = uuid.uuid4()
+        request.user = self.user
+
+        with self.captureOnCommitCallbacks(execute=False):
+            with event_tracking(request):
+                site1 = Site.objects.create(name='Site 1', slug='site-1')
+                with transaction.atomic():
+                    site2 = Site.objects.create(name='Site 2', slug='site-2')
+                site1.snapshot()
+                site1.description = 'foo'
+                site1.save()
+
+            # The ObjectChanges should have been saved without waiting for the transaction to be committed
+            self.assertEqual(
+                [(oc.changed_object_id, oc.action) for oc in ObjectChange.objects.order_by('pk')],
+                [
+                    (site1.pk, ObjectChangeActionChoices.ACTION_CREATE),
+                    (site2.pk, ObjectChangeActionChoices.ACTION_CREATE),
+                    (site1.pk, ObjectChangeActionChoices.ACTION_UPDATE),
+                ]
+            )
+
+    def test_buffered_objectchanges_rollback(self):
+        """
+        Check that buffered ObjectChanges are discarded when the transaction in which they were recorded is rolled back
+        (here, due to a violation of object-level permissions).
+        """
+        obj_perm = ObjectPermission(
+            name='Test permission',
+            constraints={'name': 'Site 1'},
+            actions=['add']
+        )
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ObjectType.objects.get_for_model(Site))
+        url = reverse('dcim-api:site-list')
+
+        response = self.client.post(url, {'name': 'Site 2', 'slug': 'site-2'}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Site.objects.filter(slug='site-2').exists())
+        self.assertEqual(ObjectChange.objects.count(), 0)
+
+        # Changes in a subsequent transaction should still be recorded
+        response = self.client.post(url, {'name': 'Site 1', 'slug': 'site-1'}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        objectchange = ObjectChange.objects.get()
+        self.assertEqual(objectchange.changed_object_id, response.data['id'])
+        self.assertEqual(objectchange.action, ObjectChangeActionChoices.ACTION_CREATE)
+
+    @override_settings(CHANGELOG_DELTA_STORAGE=True)
+    def test_delta_storage(self):
+        """
+        Check that only changed attributes are stored for updates when delta storage is enabled, and that full
+        snapshots are rebuilt on read.
+        """
+        self.add_permissions('dcim.add_site', 'dcim.change_site', 'extras.view_objectchange')
+        response = self.client.post(
+            reverse('dcim-api:site-list'), {'name': 'Site 1', 'slug': 'site-1'}, format='json', **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        url = reverse('dcim-api:site-detail', kwargs={'pk': response.data['id']})
+        for description in ('foo', 'bar'):
+            response = self.client.patch(url, {'description': description}, format='json', **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+
+        create, update1, update2 = ObjectChange.objects.order_by('pk')
+        self.assertFalse(create.is_delta)
+        self.assertTrue(update1.is_delta)
+        self.assertTrue(update2.is_delta)
+        self.assertEqual(update2.postchange_data['description'], 'bar')
+        self.assertNotIn('name', update2.postchange_data)
+
+        # Full snapshots should be rebuilt from the preceding changes
+        self.assertEqual(update2.prechange_data_clean['name'], 'Site 1')
+        self.assertEqual(update2.prechange_data_clean['description'], 'foo')
+        self.assertEqual(update2.postchange_data_clean['description'], 'bar')
+        self.assertEqual(update2.diff()['post'], {'description': 'bar'})
+        response = self.client.get(
+            reverse('extras-api:objectchange-detail', kwargs={'pk': update2.pk}), **self.header
+        )
+        self.assertEqual(response.data['prechange_data']['slug'], 'site-1')
+        self.assertEqual(response.data['postchange_data']['description'], 'bar')
+
+        # Restoring the full snapshot of a delta should not alter its data
+        update2.decompress()
+        self.assertFalse(update2.is_delta)
+        self.assertEqual(update2.postchange_data['name'], 'Site 1')
+        self.assertEqual(update2.postchange_data['description'], 'bar')
+
+    @override_settings(CHANGELOG_DELTA_STORAGE=True)
+    def test_delta_storage_bulk(self):
+        """
+        Check that buffered changes are compressed, and full snapshots of deltas rebuilt or materialized, using a
+        constant number of queries.
+        """
+        request = RequestFactory().get(reverse('dcim:site_add'))
+        request.id = uuid.uuid4()
+        request.user = self.user
+        sites = (Site(name='Site 1', slug='site-1'), Site(name='Site 2', slug='site-2'))
+
+        with event_tracking(request):
+            with transaction.atomic():
+                for site in sites:
+                    site.save()
+                    for i in range(CHANGELOG_SNAPSHOT_INTERVAL + 2):
+                        site.snapshot()
+                        site.description = f'Description {i}'
+                        site.save()
+
+            # Compress and save the buffered ObjectChanges
+            with self.assertNumQueries(2):
+                flush_objectchanges()
+
+        objectchanges = list(ObjectChange.objects.order_by('pk'))
+        with self.assertNumQueries(2):
+            ObjectChange.prefetch_full_data(objectchanges)
+        with self.assertNumQueries(0):
+            for site in sites:
+                changes = [oc for oc in objectchanges if oc.changed_object_id == site.pk]
+                self.assertEqual(
+                    [oc.is_delta for oc in changes],
+                    [False, *[True] * (CHANGELOG_SNAPSHOT_INTERVAL - 1), False, True, True]
+                )
+                for i, objectchange in enumerate(changes[1:]):
+                    self.assertEqual(objectchange.prechange_data_full['name'], site.name)
+                    prev_description = f'Description {i - 1}' if i else ''
+                    self.assertEqual(objectchange.prechange_data_full['description'], prev_description)
+                    self.assertEqual(objectchange.postchange_data_full['description'], f'Description {i}')
+
+        # Materialize the earliest delta to each object following the cut-off
+        ObjectChange.objects.filter(pk__lt=objectchanges[3].pk).update(time=F('time') - timedelta(days=1))
+        with self.assertNumQueries(5):
+            self.assertEqual(HousekeepingCommand.materialize_deltas(objectchanges[3].time), 1)
+        objectchange = ObjectChange.objects.get(pk=objectchanges[3].pk)
+        self.assertFalse(objectchange.is_delta)
+        self.assertEqual(objectchange.postchange_data['name'], 'Site 1')
+        self.assertEqual(objectchange.postchange_data['description'], 'Description 2')
+
+    def test_materialize_deltas_skipped(self):
+        """
+        Check that housekeeping does not search for deltas to materialize if none have been recorded.
+        """
+        Site.objects.create(name='Site 1', slug='site-1')
+        with self.assertNumQueries(1):
+            self.assertEqual(HousekeepingCommand.materialize_deltas(timezone.now()), 0)
+
+    def test_change_feed(self):
+        """
+        Check that the change feed returns the changes following a cursor in chronological order, both as pages of
+        JSON and streamed as NDJSON.
+        """
+        self.add_permissions('dcim.add_site', 'extras.add_tag', 'extras.view_objectchange')
+        for i in range(1, 4):
+            response = self.client.post(
+                reverse('dcim-api:site-list'), {'name': f'Site {i}', 'slug': f'site-{i}'}, format='json', **self.header
+            )
+            self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        response = self.client.post(
+            reverse('extras-api:tag-list'), {'name': 'Tag 4', 'slug': 'tag-4'}, format='json', **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        url = reverse('extras-api:objectchange-feed')
+
+        # Page through the changes to sites
+        response = self.client.get(f'{url}?changed_object_type=dcim.site&limit=2', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([c['changed_object']['display'] for c in response.data['results']], ['Site 1', 'Site 2'])
+        self.assertEqual(response.data['cursor'], response.data['results'][-1]['cursor'])
+        response = self.client.get(response.data['next'], **self.header)
+        self.assertEqual([c['changed_object']['display'] for c in response.data['results']], ['Site 3'])
+        self.assertIsNone(response.data['next'])
+
+        # Resuming from the last cursor should return no further changes
+        cursor = response.data['cursor']
+        response = self.client.get(f'{url}?changed_object_type=dcim.site&cursor={cursor}', **self.header)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['cursor'], cursor)
+
+        # Stream all changes as NDJSON
+        response = self.client.get(f'{url}?format=ndjson', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        changes = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            [c['changed_object']['display'] for c in changes],
+            ['Site 1', 'Site 2', 'Site 3', 'Tag 4']
+        )
+
+        # Invalid cursor
+        response = self.client.get(f'{url}?cursor=invalid', **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+        # A change recorded after the cursor should follow it, even if the change was made earlier
+        response = self.client.post(
+            reverse('dcim-api:site-list'), {'name': 'Site 5', 'slug': 'site-5'}, format='json', **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        site5_changes = ObjectChange.objects.filter(
+            changed_object_type=ContentType.objects.get_for_model(Site),
+            changed_object_id=response.data['id']
+        )
+        site5_changes.update(time=ObjectChange.objects.order_by('time').first().time - timedelta(minutes=1))
+        response = self.client.get(f'{url}?changed_object_type=dcim.site&cursor={cursor}', **self.header)
+        self.assertEqual([c['changed_object']['display'] for c in response.data['results']], ['Site 5'])
+
+        # Changes recorded by a transaction which is still in progress should be withheld
+        txid = site5_changes.get().txid
+        site5_changes.update(txid=txid + 1000)
+        response = self.client.get(f'{url}?changed_object_type=dcim.site&cursor={cursor}', **self.header)
+        self.assertEqual(response.data['results'], [])
+
+        # Changes are ordered by the transaction which recorded them
+        site5_changes.update(txid=0)
+        response = self.client.get(f'{url}?changed_object_type=dcim.site', **self.header)
+        self.assertEqual(
+            [c['changed_object']['display'] for c in response.data['results']],
+            ['Site 5', 'Site 1', 'Site 2', 'Site 3']
+        )
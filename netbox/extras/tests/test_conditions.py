@@ -1,6 +1,8 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 
-from extras.conditions import Condition, ConditionSet
+from extras.conditions import Condition, ConditionSet, get_condition_set
 
 
 class ConditionTestCase(TestCase):
@@ -110,6 +112,10 @@ class ConditionTestCase(TestCase):
         self.assertTrue(c.eval({'x': 'abc'}))
         self.assertFalse(c.eval({'x': '123'}))
 
+    def test_regex_invalid(self):
+        with self.assertRaises(ValueError):
+            Condition('x', '[abc', 'regex')
+
     def test_regex_negated(self):
         c = Condition('x', '[a-z]+', 'regex', negate=True)
         self.assertFalse(c.eval({'x': 'abc'}))
@@ -217,3 +223,46 @@ class ConditionSetTest(TestCase):
         self.assertTrue(cs.eval({'a': 1, 'b': 2, 'c': 9}))
         self.assertFalse(cs.eval({'a': 9, 'b': 2, 'c': 9}))
         self.assertFalse(cs.eval({'a': 9, 'b': 9, 'c': 3}))
+
+
+class ConditionSetCacheTest(TestCase):
+
+    def test_cache(self):
+        ruleset = {'and': [{'attr': 'a', 'value': 1}]}
+
+        cs = get_condition_set(ruleset, key=(1, 'foo'))
+        self.assertIs(get_condition_set(ruleset, key=(1, 'foo')), cs)
+        self.assertIsNot(get_condition_set(ruleset, key=(1, 'bar')), cs)
+        self.assertIsNot(get_condition_set(ruleset), cs)
+
+    def test_compile_once(self):
+        """
+        Check that evaluating many cached rulesets against many events compiles each ruleset only once, with the same
+        results as evaluating freshly compiled rulesets.
+        """
+        rulesets = [
+            {'and': [
+                {'attr': 'status.value', 'value': 'active'},
+                {'attr': 'name', 'value': f'^site-{i}', 'op': 'regex'},
+                {'or': [
+                    {'attr': 'tenant.id', 'value': i},
+                    {'attr': 'tags', 'value': 'foo', 'op': 'contains', 'negate': True},
+                ]}
+            ]} for i in range(50)
+        ]
+        events = [
+            {'status': {'value': 'active'}, 'name': f'site-{i}', 'tenant': {'id': i % 50}, 'tags': ['foo', 'bar']}
+            for i in range(1000)
+        ]
+        uncached = [ConditionSet(ruleset).eval(data) for data in events for ruleset in rulesets]
+
+        with patch('extras.conditions.ConditionSet', wraps=ConditionSet) as mock_condition_set:
+            cached = [
+                get_condition_set(ruleset, key=(i, 'compile_once')).eval(data)
+                for data in events for i, ruleset in enumerate(rulesets)
+            ]
+
+        self.assertEqual(cached, uncached)
+        # Each ruleset (disregarding its nested rulesets) should have been compiled once
+        compiled = [call.args[0] for call in mock_condition_set.call_args_list if call.args[0] in rulesets]
+        self.assertEqual(len(compiled), len(rulesets))
@@ -1,22 +1,29 @@
 import json
 import uuid
-from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from unittest.mock import Mock, patch
+from urllib.request import Request
 
 import django_rq
 from django.http import HttpResponse
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
 from requests import Session
 from rest_framework import status
 
 from core.models import ObjectType
 from dcim.choices import SiteStatusChoices
-from dcim.models import Site
+from dcim.models import Region, Site
 from extras.choices import EventRuleActionChoices, ObjectChangeActionChoices
 from extras.context_managers import event_tracking
-from extras.events import enqueue_object, flush_events, serialize_for_event
-from extras.models import EventRule, Tag, Webhook
-from extras.webhooks import generate_signature, send_webhook
+from extras.events import (
+    enqueue_object, flush_events, process_event_queue, relay_outbox_events, serialize_for_event,
+)
+from extras.models import EventRule, OutboxEvent, Tag, Webhook
+from extras.webhooks import (
+    close_sessions, generate_signature, get_session, send_webhook, send_webhook_batch, send_webhooks,
+)
 from utilities.testing import APITestCase
 
 
@@ -380,6 +387,105 @@ class EventRuleTest(APITestCase):
         with patch.object(Session, 'send', dummy_send) as mock_send:
             send_webhook(**job.kwargs)
 
+    @override_settings(WEBHOOK_CONCURRENCY=4)
+    def test_send_webhooks_concurrently(self):
+        """
+        Test the batched delivery of webhooks when WEBHOOK_CONCURRENCY is greater than one.
+        """
+        sent = []
+
+        def dummy_send(_, request, **kwargs):
+            sent.append(json.loads(request.body)['data']['name'])
+            return HttpResponse()
+
+        # Enqueue webhooks for three new objects
+        webhooks_queue = {}
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_events(list(webhooks_queue.values()))
+
+        # All deliveries should have been enqueued as a single job
+        self.assertEqual(self.queue.count, 1)
+        job = self.queue.jobs[0]
+        self.assertEqual(job.func_name, 'extras.webhooks.send_webhooks')
+        self.assertEqual(len(job.kwargs['deliveries']), 3)
+
+        with patch.object(Session, 'send', dummy_send):
+            send_webhooks(**job.kwargs)
+        self.assertEqual(sorted(sent), ['Site 1', 'Site 2', 'Site 3'])
+
+    def test_webhook_sessions(self):
+        """
+        Test that webhook Sessions are not shared among endpoints or threads, do not retain any cookies, and are
+        closed explicitly.
+        """
+        close_sessions()
+        session = get_session('http://localhost:9000')
+        self.assertIs(get_session('http://localhost:9000'), session)
+        self.assertIsNot(get_session('http://localhost:9001'), session)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIsNot(executor.submit(get_session, 'http://localhost:9000').result(), session)
+
+        # A cookie set by the receiver should be rejected
+        headers = Message()
+        headers['Set-Cookie'] = 'sessionid=abc123'
+        session.cookies.extract_cookies(Mock(info=lambda: headers), Request('http://localhost:9000/'))
+        self.assertEqual(len(session.cookies), 0)
+
+        # All Sessions should be closed and discarded
+        with patch.object(Session, 'close') as mock_close:
+            close_sessions()
+        self.assertEqual(mock_close.call_count, 3)
+        self.assertIsNot(get_session('http://localhost:9000'), session)
+        close_sessions()
+
+    def test_send_webhook_batch(self):
+        """
+        Test the combination of multiple events into a single request for a Webhook with batching enabled.
+        """
+        Webhook.objects.filter(name='Webhook 1').update(batch_size=2)
+        sent = []
+
+        def dummy_send(_, request, **kwargs):
+            sent.append(json.loads(request.body))
+            return HttpResponse()
+
+        # Enqueue events for three new objects
+        webhooks_queue = {}
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_events(list(webhooks_queue.values()))
+
+        # The events should have been divided into batches of up to two
+        self.assertEqual(self.queue.count, 2)
+        for job in self.queue.jobs:
+            self.assertEqual(job.func_name, 'extras.webhooks.send_webhook_batch')
+        self.assertEqual([len(job.kwargs['events']) for job in self.queue.jobs], [2, 1])
+
+        with patch.object(Session, 'send', dummy_send):
+            for job in self.queue.jobs:
+                send_webhook_batch(**job.kwargs)
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(
+            [event['data']['name'] for body in sent for event in body['events']],
+            ['Site 1', 'Site 2', 'Site 3']
+        )
+        self.assertEqual(sent[0]['events'][0]['event'], 'created')
+
     def test_duplicate_triggers(self):
         """
         Test for erroneous duplicate event triggers resulting from saving an object multiple times
@@ -400,3 +506,90 @@ class EventRuleTest(APITestCase):
             site.save()
 
         self.assertEqual(self.queue.count, 1, msg="Duplicate jobs found in queue")
+
+    @override_settings(EVENTS_PIPELINE=['extras.events.enqueue_event_queue'])
+    def test_enqueue_event_queue(self):
+        """
+        Test the deferral of EventRule processing to a single background task.
+        """
+        url = reverse('dcim:site_add')
+        request = RequestFactory().get(url)
+        request.id = uuid.uuid4()
+        request.user = self.user
+
+        with event_tracking(request):
+            Site.objects.bulk_create([
+                Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 4)
+            ])
+            for site in Site.objects.all():
+                site.save()
+
+        # All events should have been enqueued as a single job
+        self.assertEqual(self.queue.count, 1)
+        job = self.queue.jobs[0]
+        self.assertEqual(job.func_name, 'extras.events.process_event_queue')
+        self.assertEqual(len(job.kwargs['events']), 3)
+
+        # Processing the job should enqueue a webhook for each event
+        self.queue.empty()
+        process_event_queue(**job.kwargs)
+        self.assertEqual(self.queue.count, 3)
+        for job in self.queue.jobs:
+            self.assertEqual(job.func_name, 'extras.webhooks.send_webhook')
+            self.assertEqual(job.kwargs['event_rule'], EventRule.objects.get(type_update=True))
+            self.assertEqual(job.kwargs['event'], ObjectChangeActionChoices.ACTION_UPDATE)
+
+    @override_settings(EVENTS_OUTBOX_ENABLED=True)
+    def test_outbox(self):
+        """
+        Test the recording of events in the outbox and their subsequent relay to the events pipeline.
+        """
+        url = reverse('dcim:site_add')
+        request = RequestFactory().get(url)
+        request.id = uuid.uuid4()
+        request.user = self.user
+
+        with event_tracking(request):
+            site = Site.objects.create(name='Site 1', slug='site-1')
+            site.description = 'foo'
+            site.save()
+
+        # The event should have been recorded once, and not yet enqueued
+        self.assertEqual(self.queue.count, 0)
+        outbox_event = OutboxEvent.objects.get()
+        self.assertEqual(outbox_event.event, ObjectChangeActionChoices.ACTION_CREATE)
+        self.assertEqual(outbox_event.object_id, site.pk)
+        self.assertEqual(outbox_event.data['description'], 'foo')
+
+        # Relay the event to the events pipeline
+        self.assertEqual(relay_outbox_events(batch_size=100), 1)
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(self.queue.count, 1)
+        job = self.queue.jobs[0]
+        self.assertEqual(job.kwargs['event_rule'], EventRule.objects.get(type_create=True))
+        self.assertEqual(job.kwargs['data']['description'], 'foo')
+        self.assertEqual(job.kwargs['request_id'], request.id)
+
+    def test_skip_unwatched_objects(self):
+        """
+        Test that objects are not enqueued for event processing when no EventRules apply to them.
+        """
+        region = Region.objects.create(name='Region 1', slug='region-1')
+
+        queue = {}
+        enqueue_object(queue, region, self.user, uuid.uuid4(), ObjectChangeActionChoices.ACTION_CREATE)
+        self.assertEqual(queue, {})
+
+        # Creating an applicable EventRule should take effect immediately
+        event_rule = EventRule.objects.create(
+            name='Webhook Event 4',
+            type_create=True,
+            action_type=EventRuleActionChoices.WEBHOOK,
+            action_object_type=ObjectType.objects.get(app_label='extras', model='webhook'),
+            action_object_id=Webhook.objects.first().pk
+        )
+        event_rule.object_types.set([ObjectType.objects.get_for_model(Region)])
+        enqueue_object(queue, region, self.user, uuid.uuid4(), ObjectChangeActionChoices.ACTION_UPDATE)
+        self.assertEqual(queue, {})
+        enqueue_object(queue, region, self.user, uuid.uuid4(), ObjectChangeActionChoices.ACTION_CREATE)
+        self.assertEqual(len(queue), 1)
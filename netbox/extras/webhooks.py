@@ -1,16 +1,146 @@
 import hashlib
 import hmac
 import logging
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
 
 import requests
 from django.conf import settings
-from django_rq import job
+from django.db import close_old_connections, connections
+from django.utils import timezone
+from django_rq import get_queue, job
 from jinja2.exceptions import TemplateError
+from prometheus_client import Counter, Histogram, multiprocess
+from rq import Queue, SimpleWorker
 
+from utilities.rqworker import get_queue_for_model, get_rq_retry
 from .constants import WEBHOOK_EVENT_TYPES
+from .models import Webhook
 
 logger = logging.getLogger('netbox.webhooks')
 
+# Per-endpoint delivery metrics
+webhook_request_latency = Histogram(
+    'netbox_webhook_request_latency_seconds',
+    'Latency of outgoing webhook requests',
+    ['endpoint']
+)
+webhook_request_failures = Counter(
+    'netbox_webhook_request_failures_total',
+    'Number of outgoing webhook requests which failed',
+    ['endpoint']
+)
+
+# Webhook Sessions, keyed by thread and endpoint
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Thread pool for concurrent webhook deliveries (see send_webhooks())
+_executor = None
+
+# Whether Sessions and the thread pool are retained for subsequent jobs (see WebhookWorker)
+_persistent = False
+
+
+def get_session(endpoint):
+    """
+    Return a requests Session for delivering webhooks to the given endpoint from the current thread. Reusing a Session
+    keeps open a pool of connections to the endpoint, avoiding a new TCP & TLS handshake for every request. Sessions
+    are not shared among endpoints or threads, and do not retain any cookies set by a receiver.
+    """
+    key = (threading.get_ident(), endpoint)
+    with _sessions_lock:
+        if key not in _sessions:
+            session = requests.Session()
+            # Reject all cookies
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _sessions[key] = session
+
+        return _sessions[key]
+
+
+def get_executor():
+    """
+    Return the thread pool used to send webhooks concurrently, creating it if necessary.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.WEBHOOK_CONCURRENCY, thread_name_prefix='webhook')
+    return _executor
+
+
+def close_sessions():
+    """
+    Shut down the webhook delivery thread pool and close all webhook Sessions, releasing their connections.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def release_sessions():
+    """
+    Close all webhook Sessions at the end of a job, unless they are being retained for reuse by a WebhookWorker.
+    """
+    if not _persistent:
+        close_sessions()
+
+
+class WebhookWorker(SimpleWorker):
+    """
+    An RQ worker which executes each job within its own process, rather than forking a new work horse for every job,
+    so that webhook Sessions (and their connection pools) persist across jobs. Sessions are closed when the worker
+    stops. Use this worker class for the queue to which webhooks are assigned (see QUEUE_MAPPINGS).
+    """
+    def work(self, *args, **kwargs):
+        global _persistent
+        multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR', os.environ.get('prometheus_multiproc_dir'))
+        if settings.METRICS_ENABLED and not multiproc_dir:
+            logger.warning(
+                "PROMETHEUS_MULTIPROC_DIR is not defined; webhook metrics recorded by this worker will not be exported."
+            )
+
+        _persistent = True
+        try:
+            return super().work(*args, **kwargs)
+        finally:
+            _persistent = False
+            close_sessions()
+            if multiproc_dir:
+                multiprocess.mark_process_dead(os.getpid(), multiproc_dir)
+
+    def perform_job(self, job, queue):
+        # Discard any database connections which have become unusable, as these are no longer renewed by forking a
+        # new work horse for each job.
+        close_old_connections()
+        try:
+            return super().perform_job(job, queue)
+        finally:
+            close_old_connections()
+
+
+def get_endpoint(url):
+    """
+    Return the endpoint (scheme, host, and port) for a URL, used to label webhook metrics and to select a Session.
+    """
+    parts = urlsplit(url)
+    if parts.port:
+        return f'{parts.scheme}://{parts.hostname}:{parts.port}'
+    return f'{parts.scheme}://{parts.hostname}'
+
 
 def generate_signature(request_body, secret):
     """
@@ -24,14 +154,10 @@ def generate_signature(request_body, secret):
     return hmac_prep.hexdigest()
 
 
-@job('default')
-def send_webhook(event_rule, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+def get_webhook_context(model_name, event, data, timestamp, username, request_id=None, snapshots=None):
     """
-    Make a POST request to the defined Webhook
+    Return the context data for a webhook event, used to render the request headers, body, and URL.
     """
-    webhook = event_rule.action_object
-
-    # Prepare context data for headers & body templates
     context = {
         'event': WEBHOOK_EVENT_TYPES[event],
         'timestamp': timestamp,
@@ -45,6 +171,53 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
             'snapshots': snapshots
         })
 
+    return context
+
+
+@job('default')
+def send_webhook(event_rule, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+    """
+    Make a POST request to the defined Webhook
+    """
+    try:
+        return _send_webhook(event_rule, model_name, event, data, timestamp, username, request_id, snapshots)
+    finally:
+        release_sessions()
+
+
+@job('default')
+def send_webhook_batch(webhook, events, timestamp):
+    """
+    Make a single request to the defined Webhook conveying a batch of events (each represented by its context data).
+    """
+    try:
+        return _send_webhook_batch(webhook, events, timestamp)
+    finally:
+        release_sessions()
+
+
+def _send_webhook(event_rule, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+    webhook = event_rule.action_object
+
+    # Prepare context data for headers & body templates
+    context = get_webhook_context(model_name, event, data, timestamp, username, request_id, snapshots)
+
+    return _send_request(webhook, context, f"{context['model']} {context['event']}")
+
+
+def _send_webhook_batch(webhook, events, timestamp):
+    context = {
+        'timestamp': timestamp,
+        'events': events,
+    }
+
+    return _send_request(webhook, context, f"{len(events)} events")
+
+
+def _send_request(webhook, context, summary):
+    """
+    Render and send the HTTP request for a Webhook using the given context data.
+    """
     # Build the headers for the HTTP request
     headers = {
         'Content-Type': webhook.http_content_type,
@@ -70,7 +243,7 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
         'data': body.encode('utf8'),
     }
     logger.info(
-        f"Sending {params['method']} request to {params['url']} ({context['model']} {context['event']})"
+        f"Sending {params['method']} request to {params['url']} ({summary})"
     )
     logger.debug(params)
     try:
@@ -84,17 +257,143 @@ def send_webhook(event_rule, model_name, event, data, timestamp, username, reque
         prepared_request.headers['X-Hook-Signature'] = generate_signature(prepared_request.body, webhook.secret)
 
     # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
-        response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
+    verify = webhook.ca_file_path or webhook.ssl_verification
+    endpoint = get_endpoint(params['url'])
+    start_time = time.monotonic()
+    try:
+        response = get_session(endpoint).send(prepared_request, proxies=settings.HTTP_PROXIES, verify=verify)
+    except requests.exceptions.RequestException:
+        webhook_request_failures.labels(endpoint).inc()
+        raise
+    finally:
+        webhook_request_latency.labels(endpoint).observe(time.monotonic() - start_time)
 
     if 200 <= response.status_code <= 299:
         logger.info(f"Request succeeded; response status {response.status_code}")
         return f"Status {response.status_code} returned, webhook successfully processed."
     else:
+        webhook_request_failures.labels(endpoint).inc()
         logger.warning(f"Request failed; response status {response.status_code}: {response.content}")
         raise requests.exceptions.RequestException(
             f"Status {response.status_code} returned with content '{response.content}', webhook FAILED to process."
         )
+
+
+@job('default')
+def send_webhooks(deliveries):
+    """
+    Send a batch of webhooks (a list of parameters for send_webhook()) concurrently, using up to WEBHOOK_CONCURRENCY
+    threads. Any failed deliveries are re-enqueued individually, to be retried per the configured retry policy.
+    """
+    # Resolve each Webhook in advance, to avoid querying the database from within the worker threads
+    for params in deliveries:
+        if 'event_rule' in params:
+            params['event_rule'].action_object
+
+    try:
+        results = list(get_executor().map(_deliver_webhook, deliveries))
+    finally:
+        release_sessions()
+
+    failed = [params for params, success in zip(deliveries, results) if not success]
+    if failed:
+        logger.warning(f"{len(failed)} of {len(deliveries)} webhook deliveries failed; re-enqueuing")
+        get_queue(get_queue_for_model('webhook')).enqueue_many([
+            Queue.prepare_data(get_delivery_job(params), kwargs=params, retry=get_rq_retry())
+            for params in failed
+        ])
+
+    return f"{len(deliveries) - len(failed)} of {len(deliveries)} webhooks successfully processed."
+
+
+def get_delivery_job(params):
+    """
+    Return the job function for a webhook delivery, which conveys either a single event or a batch of events.
+    """
+    if 'events' in params:
+        return 'extras.webhooks.send_webhook_batch'
+    return 'extras.webhooks.send_webhook'
+
+
+def _deliver_webhook(params):
+    """
+    Send a webhook delivery from within a worker thread, returning True if it succeeded.
+    """
+    try:
+        if 'events' in params:
+            _send_webhook_batch(**params)
+        else:
+            _send_webhook(**params)
+        return True
+    except Exception as e:
+        logger.error(f"Webhook delivery failed: {e}")
+        return False
+    finally:
+        # Close any database connections opened by this thread
+        connections.close_all()
+
+
+#
+# Batch windows
+#
+
+def _get_batch_key(webhook_id):
+    return f'extras.webhook_batch:{webhook_id}'
+
+
+def collect_webhook_events(webhook, events):
+    """
+    Add events (a list of context data) to the pending batch for a Webhook. The batch will be sent once the webhook's
+    batch window has elapsed.
+    """
+    queue = get_queue(get_queue_for_model('webhook'))
+    key = _get_batch_key(webhook.pk)
+    queue.connection.rpush(key, *[pickle.dumps(event) for event in events])
+
+    # Schedule delivery of the batch, unless it has been scheduled already
+    if queue.connection.set(f'{key}:scheduled', 1, nx=True, ex=webhook.batch_window * 2):
+        queue.enqueue_in(
+            timedelta(seconds=webhook.batch_window),
+            'extras.webhooks.flush_webhook_batch',
+            webhook_id=webhook.pk
+        )
+
+
+@job('default')
+def flush_webhook_batch(webhook_id):
+    """
+    Enqueue the events collected for a Webhook during its batch window for delivery, up to the webhook's batch size
+    per request.
+    """
+    queue = get_queue(get_queue_for_model('webhook'))
+    key = _get_batch_key(webhook_id)
+
+    # Clear the schedule before retrieving the pending events, so that any events added subsequently are scheduled
+    # for a new batch.
+    queue.connection.delete(f'{key}:scheduled')
+    with queue.connection.pipeline() as pipe:
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        events, _ = pipe.execute()
+    if not events:
+        return
+
+    try:
+        webhook = Webhook.objects.get(pk=webhook_id)
+    except Webhook.DoesNotExist:
+        logger.warning(f"Discarding {len(events)} batched events for deleted webhook {webhook_id}")
+        return
+
+    events = [pickle.loads(event) for event in events]
+    batch_size = webhook.batch_size or len(events)
+    timestamp = timezone.now().isoformat()
+    queue.enqueue_many([
+        Queue.prepare_data(
+            'extras.webhooks.send_webhook_batch',
+            kwargs={'webhook': webhook, 'events': events[i:i + batch_size], 'timestamp': timestamp},
+            retry=get_rq_retry()
+        )
+        for i in range(0, len(events), batch_size)
+    ])
+
+    return f"Enqueued {len(events)} events for delivery"
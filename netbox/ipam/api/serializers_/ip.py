@@ -34,12 +34,13 @@ class AggregateSerializer(NetBoxModelSerializer):
     rir = RIRSerializer(nested=True)
     tenant = TenantSerializer(nested=True, required=False, allow_null=True)
     prefix = IPNetworkField()
+    utilization = serializers.FloatField(source='get_utilization', read_only=True)
 
     class Meta:
         model = Aggregate
         fields = [
             'id', 'url', 'display', 'family', 'prefix', 'rir', 'tenant', 'date_added', 'description', 'comments',
-            'tags', 'custom_fields', 'created', 'last_updated',
+            'tags', 'custom_fields', 'created', 'last_updated', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'prefix', 'description')
 
@@ -56,13 +57,14 @@ class PrefixSerializer(NetBoxModelSerializer):
     children = serializers.IntegerField(read_only=True)
     _depth = serializers.IntegerField(read_only=True)
     prefix = IPNetworkField()
+    utilization = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Prefix
         fields = [
             'id', 'url', 'display', 'family', 'prefix', 'site', 'vrf', 'tenant', 'vlan', 'status', 'role', 'is_pool',
             'mark_utilized', 'description', 'comments', 'tags', 'custom_fields', 'created', 'last_updated', 'children',
-            '_depth',
+            '_depth', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'prefix', 'description', '_depth')
 
@@ -127,6 +129,7 @@ class IPRangeSerializer(NetBoxModelSerializer):
     tenant = TenantSerializer(nested=True, required=False, allow_null=True)
     status = ChoiceField(choices=IPRangeStatusChoices, required=False)
     role = RoleSerializer(nested=True, required=False, allow_null=True)
+    utilization = serializers.FloatField(read_only=True)
 
     class Meta:
         model = IPRange
@@ -134,6 +137,7 @@ class IPRangeSerializer(NetBoxModelSerializer):
             'id', 'url', 'display', 'family', 'start_address', 'end_address', 'size', 'vrf', 'tenant', 'status', 'role',
             'description', 'comments', 'tags', 'custom_fields', 'created', 'last_updated',
             'mark_utilized', 'description', 'comments', 'tags', 'custom_fields', 'created', 'last_updated',
+            'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'start_address', 'end_address', 'description')
 
@@ -6,7 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 from django_pglocks import advisory_lock
 from drf_spectacular.utils import extend_schema
-from netaddr import IPSet
+from netaddr import AddrFormatError, IPNetwork, IPSet
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
@@ -15,7 +15,7 @@ from rest_framework.views import APIView
 
 from ipam import filtersets
 from ipam.models import *
-from ipam.utils import get_next_available_prefix
+from ipam.utils import allocation_lock, get_next_available_prefix
 from netbox.api.viewsets import NetBoxModelViewSet
 from netbox.api.viewsets.mixins import ObjectValidationMixin
 from netbox.config import get_config
@@ -67,7 +67,7 @@ class RIRViewSet(NetBoxModelViewSet):
 
 
 class AggregateViewSet(NetBoxModelViewSet):
-    queryset = Aggregate.objects.all()
+    queryset = Aggregate.objects.annotate_utilization()
     serializer_class = serializers.AggregateSerializer
     filterset_class = filtersets.AggregateFilterSet
 
@@ -79,7 +79,7 @@ class RoleViewSet(NetBoxModelViewSet):
 
 
 class PrefixViewSet(NetBoxModelViewSet):
-    queryset = Prefix.objects.all()
+    queryset = Prefix.objects.annotate_utilization()
     serializer_class = serializers.PrefixSerializer
     filterset_class = filtersets.PrefixFilterSet
 
@@ -92,7 +92,7 @@ class PrefixViewSet(NetBoxModelViewSet):
 
 
 class IPRangeViewSet(NetBoxModelViewSet):
-    queryset = IPRange.objects.all()
+    queryset = IPRange.objects.annotate_utilization()
     serializer_class = serializers.IPRangeSerializer
     filterset_class = filtersets.IPRangeFilterSet
 
@@ -104,17 +104,41 @@ class IPAddressViewSet(NetBoxModelViewSet):
     serializer_class = serializers.IPAddressSerializer
     filterset_class = filtersets.IPAddressFilterSet
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
+    @staticmethod
+    def _get_lock_scope(data, instance=None):
+        """
+        Return the (VRF ID, address) scope of an IP address being created or modified, for the purposes of
+        allocation_lock(). Returns None if either cannot be determined from the request data.
+        """
+        vrf = data.get('vrf', instance.vrf_id if instance else None)
+        address = data.get('address', instance.address if instance else None)
+        if isinstance(vrf, dict):
+            # A nested VRF can be resolved only by its ID
+            vrf = vrf.get('id', vrf)
+        try:
+            return (int(vrf) if vrf is not None else None), IPNetwork(address).ip
+        except (AddrFormatError, TypeError, ValueError):
+            return None
+
     def create(self, request, *args, **kwargs):
-        return super().create(request, *args, **kwargs)
+        data = request.data if isinstance(request.data, list) else [request.data]
+        scopes = [self._get_lock_scope(item) if isinstance(item, dict) else None for item in data]
+        with allocation_lock('available-ips', scopes):
+            return super().create(request, *args, **kwargs)
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
     def update(self, request, *args, **kwargs):
-        return super().update(request, *args, **kwargs)
+        instance = self.get_object()
+        scopes = [
+            self._get_lock_scope({}, instance),
+            self._get_lock_scope(request.data, instance) if isinstance(request.data, dict) else None,
+        ]
+        with allocation_lock('available-ips', scopes):
+            return super().update(request, *args, **kwargs)
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)
+        instance = self.get_object()
+        with allocation_lock('available-ips', [self._get_lock_scope({}, instance)]):
+            return super().destroy(request, *args, **kwargs)
 
 
 class FHRPGroupViewSet(NetBoxModelViewSet):
@@ -213,6 +237,12 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
         """
         return requested_objects
 
+    def get_advisory_lock(self, parent):
+        """
+        Return the advisory lock to be held while allocating objects within the parent.
+        """
+        return advisory_lock(ADVISORY_LOCK_KEYS[self.advisory_lock_key])
+
     def get(self, request, pk):
         parent = self.get_parent(request, pk)
         limit = get_results_limit(request)
@@ -244,7 +274,7 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        with advisory_lock(ADVISORY_LOCK_KEYS[self.advisory_lock_key]):
+        with self.get_advisory_lock(parent):
             available_objects = self.get_available_objects(parent, limit)
 
             # Determine if the requested number of objects is available
@@ -328,6 +358,9 @@ class AvailablePrefixesView(AvailableObjectsView):
     def get_parent(self, request, pk):
         return get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
+    def get_advisory_lock(self, parent):
+        return allocation_lock(self.advisory_lock_key, [(parent.vrf_id, parent.prefix)])
+
     def get_available_objects(self, parent, limit=None):
         return parent.get_available_prefixes().iter_cidrs()
 
@@ -380,12 +413,7 @@ class AvailableIPAddressesView(AvailableObjectsView):
 
     def get_available_objects(self, parent, limit=None):
         # Calculate available IPs within the parent
-        ip_list = []
-        for index, ip in enumerate(parent.get_available_ips(), start=1):
-            ip_list.append(ip)
-            if index == limit:
-                break
-        return ip_list
+        return list(parent.iter_available_ips(limit or None))
 
     def get_extra_context(self, parent):
         return {
@@ -421,12 +449,18 @@ class PrefixAvailableIPAddressesView(AvailableIPAddressesView):
     def get_parent(self, request, pk):
         return get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
+    def get_advisory_lock(self, parent):
+        return allocation_lock(self.advisory_lock_key, [(parent.vrf_id, parent.prefix)])
+
 
 class IPRangeAvailableIPAddressesView(AvailableIPAddressesView):
 
     def get_parent(self, request, pk):
         return get_object_or_404(IPRange.objects.restrict(request.user), pk=pk)
 
+    def get_advisory_lock(self, parent):
+        return allocation_lock(self.advisory_lock_key, [(parent.vrf_id, parent.start_address.ip)])
+
 
 class AvailableVLANsView(AvailableObjectsView):
     queryset = VLAN.objects.all()
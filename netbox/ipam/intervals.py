@@ -0,0 +1,32 @@
+import heapq
+
+__all__ = (
+    'iter_available_intervals',
+)
+
+
+def iter_available_intervals(first, last, *used):
+    """
+    Yield the (first, last) bounds of each contiguous interval of integers between `first` and `last` (inclusive) which
+    is not covered by any of the used intervals. Each argument following the bounds is an iterable of (first, last)
+    used intervals, ordered by their first value. (Intervals may overlap one another and need not fall within the
+    bounds.) The iterables are merged lazily, so they may be streamed directly from the database without being held
+    in memory.
+
+    :param first: The first integer of the space to be searched
+    :param last: The last integer of the space to be searched
+    :param used: One or more iterables of ordered (first, last) used intervals
+    """
+    cursor = first
+    for start, end in heapq.merge(*used):
+        if start > last:
+            break
+        if end < cursor:
+            continue
+        if start > cursor:
+            yield cursor, start - 1
+        cursor = end + 1
+        if cursor > last:
+            return
+    if cursor <= last:
+        yield cursor, last
@@ -1,27 +1,43 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
 
 from ipam.models import Prefix, VRF
 from ipam.utils import rebuild_prefixes
+from utilities.parallel import get_process_pool
 
 
 class Command(BaseCommand):
     help = "Rebuild the prefix hierarchy (depth and children counts)"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of processes among which to divide the VRFs being rebuilt (default: 1)"
+        )
+
     def handle(self, *model_names, **options):
+        if options['workers'] < 1:
+            raise CommandError("The number of workers must be at least 1.")
         self.stdout.write(f'Rebuilding {Prefix.objects.count()} prefixes...')
 
-        # Reset existing counts
-        Prefix.objects.update(_depth=0, _children=0)
-
-        # Rebuild the global table
-        global_count = Prefix.objects.filter(vrf__isnull=True).count()
-        self.stdout.write(f'Global: {global_count} prefixes...')
-        rebuild_prefixes(None)
-
-        # Rebuild each VRF
-        for vrf in VRF.objects.all():
-            vrf_count = Prefix.objects.filter(vrf=vrf).count()
-            self.stdout.write(f'VRF {vrf}: {vrf_count} prefixes...')
-            rebuild_prefixes(vrf.pk)
+        # Count the prefixes in the global table and in each VRF, and rebuild the largest first
+        prefix_counts = dict(Prefix.objects.order_by().values_list('vrf').annotate(count=Count('pk')))
+        vrf_ids = sorted(prefix_counts, key=prefix_counts.get, reverse=True)
+        vrfs = VRF.objects.in_bulk([vrf_id for vrf_id in vrf_ids if vrf_id is not None])
+
+        def report(vrf_id, updated_count):
+            name = f'VRF {vrfs[vrf_id]}' if vrf_id is not None else 'Global'
+            self.stdout.write(f'{name}: {prefix_counts[vrf_id]} prefixes ({updated_count} updated)')
+
+        if options['workers'] > 1:
+            with get_process_pool(options['workers']) as executor:
+                futures = {executor.submit(rebuild_prefixes, vrf_id): vrf_id for vrf_id in vrf_ids}
+                for future in as_completed(futures):
+                    report(futures[future], future.result())
+        else:
+            for vrf_id in vrf_ids:
+                report(vrf_id, rebuild_prefixes(vrf_id))
 
         self.stdout.write(self.style.SUCCESS('Finished.'))
@@ -1,3 +1,5 @@
+import itertools
+
 import netaddr
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import ValidationError
@@ -12,9 +14,10 @@ from core.models import ObjectType
 from ipam.choices import *
 from ipam.constants import *
 from ipam.fields import IPNetworkField, IPAddressField
+from ipam.intervals import iter_available_intervals
 from ipam.lookups import Host
 from ipam.managers import IPAddressManager
-from ipam.querysets import PrefixQuerySet
+from ipam.querysets import AggregateQuerySet, IPRangeQuerySet, PrefixQuerySet
 from ipam.validators import DNSValidator
 from netbox.config import get_config
 from netbox.models import OrganizationalModel, PrimaryModel
@@ -55,6 +58,68 @@ class GetAvailablePrefixesMixin:
         return available_prefixes.iter_cidrs()[0]
 
 
+def _iter_address_intervals(queryset, start_field, end_field):
+    """
+    Stream the (first, last) integer interval of address space occupied by each object in the queryset, ordered by the
+    host address of its start field.
+    """
+    queryset = queryset.annotate(
+        _start=Cast(Host(start_field), output_field=IPAddressField()),
+    ).order_by('_start').values_list('_start', end_field)
+    for start, end in queryset.iterator():
+        yield start.value, end.value
+
+
+class GetAvailableIPsMixin:
+    """
+    Compute the available IP addresses within a Prefix or IPRange from the ordered intervals of address space occupied
+    by its child objects, which are streamed from the database rather than compiled into an IPSet. Subclasses must
+    implement get_available_ip_bounds() and get_used_ip_intervals().
+    """
+    def get_available_ip_bounds(self):
+        """
+        Return the first and last usable IP addresses as integers, or None if no IPs are available.
+        """
+        raise NotImplementedError()
+
+    def get_used_ip_intervals(self):
+        """
+        Return a list of iterables, each of which yields the ordered (first, last) integer intervals of address space
+        occupied by a type of child object.
+        """
+        raise NotImplementedError()
+
+    def get_available_ip_ranges(self, limit=None):
+        """
+        Yield each contiguous range of available IPs as a netaddr.IPRange, up to the specified number of ranges.
+        """
+        if (bounds := self.get_available_ip_bounds()) is None:
+            return
+        intervals = iter_available_intervals(*bounds, *self.get_used_ip_intervals())
+        for first, last in itertools.islice(intervals, limit):
+            yield netaddr.IPRange(netaddr.IPAddress(first, self.family), netaddr.IPAddress(last, self.family))
+
+    def iter_available_ips(self, limit=None):
+        """
+        Yield each available IP as a netaddr.IPAddress, up to the specified number of IPs.
+        """
+        ips = (ip for iprange in self.get_available_ip_ranges() for ip in iprange)
+        return itertools.islice(ips, limit)
+
+    def get_available_ips(self):
+        """
+        Return all available IPs as an IPSet. Note that compiling an IPSet for a large and fragmented address space may
+        be expensive; consider employing get_available_ip_ranges() or iter_available_ips() instead.
+        """
+        return netaddr.IPSet(self.get_available_ip_ranges())
+
+    def get_available_ip_count(self):
+        """
+        Return the total number of available IPs.
+        """
+        return sum(iprange.size for iprange in self.get_available_ip_ranges())
+
+
 class RIR(OrganizationalModel):
     """
     A Regional Internet Registry (RIR) is responsible for the allocation of a large portion of the global IP address
@@ -103,6 +168,8 @@ class Aggregate(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         null=True
     )
 
+    objects = AggregateQuerySet.as_manager()
+
     clone_fields = (
         'rir', 'tenant', 'date_added', 'description',
     )
@@ -176,10 +243,14 @@ class Aggregate(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
 
     def get_utilization(self):
         """
-        Determine the prefix utilization of the aggregate and return it as a percentage.
+        Determine the prefix utilization of the aggregate and return it as a percentage. Employ the child prefixes
+        annotated by AggregateQuerySet.annotate_utilization(), if present.
         """
-        queryset = Prefix.objects.filter(prefix__net_contained_or_equal=str(self.prefix))
-        child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
+        if hasattr(self, 'child_prefix_list'):
+            child_prefixes = netaddr.IPSet(self.child_prefix_list or [])
+        else:
+            queryset = Prefix.objects.filter(prefix__net_contained_or_equal=str(self.prefix))
+            child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
         utilization = float(child_prefixes.size) / self.prefix.size * 100
 
         return min(utilization, 100)
@@ -207,7 +278,7 @@ class Role(OrganizationalModel):
         return reverse('ipam:role', args=[self.pk])
 
 
-class Prefix(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
+class Prefix(ContactsMixin, GetAvailablePrefixesMixin, GetAvailableIPsMixin, PrimaryModel):
     """
     A Prefix represents an IPv4 or IPv6 network, including mask length. Prefixes can optionally be assigned to Sites and
     VRFs. A Prefix must be assigned a status and may optionally be assigned a used-define Role. A Prefix can also be
@@ -419,44 +490,36 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         else:
             return IPAddress.objects.filter(address__net_host_contained=str(self.prefix), vrf=self.vrf)
 
-    def get_available_ips(self):
-        """
-        Return all available IPs within this prefix as an IPSet.
-        """
+    def get_available_ip_bounds(self):
         if self.mark_utilized:
-            return netaddr.IPSet()
-
-        prefix = netaddr.IPSet(self.prefix)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
-        child_ranges = []
-        for iprange in self.get_child_ranges():
-            child_ranges.append(iprange.range)
-        available_ips = prefix - child_ips - netaddr.IPSet(child_ranges)
+            return None
 
         # IPv6 /127's, pool, or IPv4 /31-/32 sets are fully usable
         if (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (self.family == 4 and self.prefix.prefixlen >= 31):
-            return available_ips
+            return self.prefix.first, self.prefix.last
 
         if self.family == 4:
             # For "normal" IPv4 prefixes, omit first and last addresses
-            available_ips -= netaddr.IPSet([
-                netaddr.IPAddress(self.prefix.first),
-                netaddr.IPAddress(self.prefix.last),
-            ])
-        else:
-            # For IPv6 prefixes, omit the Subnet-Router anycast address
-            # per RFC 4291
-            available_ips -= netaddr.IPSet([netaddr.IPAddress(self.prefix.first)])
-        return available_ips
+            return self.prefix.first + 1, self.prefix.last - 1
+
+        # For IPv6 prefixes, omit the Subnet-Router anycast address
+        # per RFC 4291
+        return self.prefix.first + 1, self.prefix.last
+
+    def get_used_ip_intervals(self):
+        return [
+            _iter_address_intervals(self.get_child_ips(), 'address', 'address'),
+            _iter_address_intervals(self.get_child_ranges(), 'start_address', 'end_address'),
+        ]
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        first_available_ip = next(self.iter_available_ips(), None)
+        if first_available_ip is None:
             return None
-        return '{}/{}'.format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return '{}/{}'.format(first_available_ip, self.prefix.prefixlen)
 
     def get_utilization(self):
         """
@@ -486,8 +549,16 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
 
         return min(utilization, 100)
 
+    @cached_property
+    def utilization(self):
+        """
+        Return the utilization of the prefix as a percentage. This may be annotated in bulk by
+        PrefixQuerySet.annotate_utilization().
+        """
+        return self.get_utilization()
 
-class IPRange(ContactsMixin, PrimaryModel):
+
+class IPRange(ContactsMixin, GetAvailableIPsMixin, PrimaryModel):
     """
     A range of IP addresses, defined by start and end addresses.
     """
@@ -539,6 +610,8 @@ class IPRange(ContactsMixin, PrimaryModel):
         help_text=_("Treat as fully utilized")
     )
 
+    objects = IPRangeQuerySet.as_manager()
+
     clone_fields = (
         'vrf', 'tenant', 'status', 'role', 'description',
     )
@@ -660,30 +733,30 @@ class IPRange(ContactsMixin, PrimaryModel):
             vrf=self.vrf
         )
 
-    def get_available_ips(self):
-        """
-        Return all available IPs within this range as an IPSet.
-        """
-        range = netaddr.IPRange(self.start_address.ip, self.end_address.ip)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
+    def get_available_ip_bounds(self):
+        return int(self.start_address.ip), int(self.end_address.ip)
 
-        return netaddr.IPSet(range) - child_ips
+    def get_used_ip_intervals(self):
+        return [
+            _iter_address_intervals(self.get_child_ips(), 'address', 'address'),
+        ]
 
     @cached_property
     def first_available_ip(self):
         """
         Return the first available IP within the range (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        first_available_ip = next(self.iter_available_ips(), None)
+        if first_available_ip is None:
             return None
 
-        return '{}/{}'.format(next(available_ips.__iter__()), self.start_address.prefixlen)
+        return '{}/{}'.format(first_available_ip, self.start_address.prefixlen)
 
     @cached_property
     def utilization(self):
         """
-        Determine the utilization of the range and return it as a percentage.
+        Determine the utilization of the range and return it as a percentage. This may be annotated in bulk by
+        IPRangeQuerySet.annotate_utilization().
         """
         if self.mark_utilized:
             return 100
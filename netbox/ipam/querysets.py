@@ -1,18 +1,52 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import Count, F, FloatField, OuterRef, Q, Subquery, Value
 from django.db.models.expressions import RawSQL
 from django.db.models.functions import Round
 
 from utilities.query import count_related
 from utilities.querysets import RestrictedQuerySet
+from .choices import PrefixStatusChoices
+from .fields import IPNetworkField
 
 __all__ = (
+    'AggregateQuerySet',
     'ASNRangeQuerySet',
+    'IPRangeQuerySet',
     'PrefixQuerySet',
     'VLANQuerySet',
 )
 
 
+def _prefix_size(column):
+    """
+    Return SQL for the number of addresses within a prefix column. (Computed as a numeric to accommodate IPv6.)
+    """
+    return f'POWER(2::numeric, (CASE WHEN FAMILY({column}) = 4 THEN 32 ELSE 128 END) - MASKLEN({column}))'
+
+
+class AggregateQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the distinct Prefixes (in any VRF) within each Aggregate as `child_prefix_list`, from which
+        Aggregate.get_utilization() computes utilization without querying the database for each Aggregate.
+        """
+        from .models import Prefix
+
+        # Group all child prefixes on a fake column "_" to return a single array per Aggregate
+        child_prefixes = Prefix.objects.filter(
+            prefix__net_contained_or_equal=OuterRef('prefix')
+        ).order_by().annotate(_=Value(1)).values('_').annotate(
+            prefixes=ArrayAgg('prefix', distinct=True)
+        ).values('prefixes')
+
+        return self.annotate(
+            child_prefix_list=Subquery(child_prefixes, output_field=ArrayField(IPNetworkField()))
+        )
+
+
 class ASNRangeQuerySet(RestrictedQuerySet):
 
     def annotate_asn_counts(self):
@@ -55,6 +89,76 @@ class PrefixQuerySet(RestrictedQuerySet):
             )
         )
 
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each Prefix as a percentage, matching Prefix.get_utilization(). Container
+        utilization is the share of the prefix covered by its distinct direct children (those one level deeper within
+        the same VRF). For all other prefixes, utilization is the size of all child IP ranges plus the number of
+        distinct child IP addresses which fall outside those ranges, relative to the usable size of the prefix.
+        """
+        prefix_size = _prefix_size('"ipam_prefix"."prefix"')
+        child_size = _prefix_size('U0."prefix"')
+        return self.annotate(
+            utilization=RawSQL(
+                'CAST(CASE '
+                'WHEN "ipam_prefix"."mark_utilized" THEN 100 '
+                'WHEN "ipam_prefix"."status" = %s THEN LEAST(100, ('
+                f'SELECT COALESCE(SUM({child_size}), 0) '
+                'FROM (SELECT DISTINCT U1."prefix" FROM "ipam_prefix" U1 '
+                'WHERE U1."prefix" << "ipam_prefix"."prefix" '
+                'AND COALESCE(U1."vrf_id", 0) = COALESCE("ipam_prefix"."vrf_id", 0) '
+                'AND U1."_depth" = "ipam_prefix"."_depth" + 1) U0'
+                f') * 100 / {prefix_size}) '
+                'ELSE LEAST(100, (('
+                'SELECT COALESCE(SUM(U2."size"), 0) FROM "ipam_iprange" U2 '
+                'WHERE CAST(HOST(U2."start_address") AS INET) <<= "ipam_prefix"."prefix" '
+                'AND CAST(HOST(U2."end_address") AS INET) <<= "ipam_prefix"."prefix" '
+                'AND COALESCE(U2."vrf_id", 0) = COALESCE("ipam_prefix"."vrf_id", 0)'
+                ') + ('
+                'SELECT COUNT(DISTINCT HOST(U3."address")) FROM "ipam_ipaddress" U3 '
+                'WHERE CAST(HOST(U3."address") AS INET) <<= "ipam_prefix"."prefix" '
+                'AND COALESCE(U3."vrf_id", 0) = COALESCE("ipam_prefix"."vrf_id", 0) '
+                'AND NOT EXISTS ('
+                'SELECT 1 FROM "ipam_iprange" U4 '
+                'WHERE CAST(HOST(U4."start_address") AS INET) <<= "ipam_prefix"."prefix" '
+                'AND CAST(HOST(U4."end_address") AS INET) <<= "ipam_prefix"."prefix" '
+                'AND COALESCE(U4."vrf_id", 0) = COALESCE("ipam_prefix"."vrf_id", 0) '
+                'AND CAST(HOST(U3."address") AS INET) BETWEEN CAST(HOST(U4."start_address") AS INET) '
+                'AND CAST(HOST(U4."end_address") AS INET)'
+                ')'
+                f')) * 100 / ({prefix_size} - CASE '
+                'WHEN FAMILY("ipam_prefix"."prefix") = 4 AND MASKLEN("ipam_prefix"."prefix") < 31 '
+                'AND NOT "ipam_prefix"."is_pool" THEN 2 ELSE 0 END)) '
+                'END AS DOUBLE PRECISION)',
+                (PrefixStatusChoices.STATUS_CONTAINER,),
+                output_field=FloatField()
+            )
+        )
+
+
+class IPRangeQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each IPRange as a percentage, matching IPRange.utilization. Cast null VRF values
+        to zero for comparison.
+        """
+        return self.annotate(
+            utilization=RawSQL(
+                'CAST(CASE '
+                'WHEN "ipam_iprange"."mark_utilized" THEN 100 '
+                'ELSE LEAST(100, ('
+                'SELECT COUNT(DISTINCT HOST(U0."address")) FROM "ipam_ipaddress" U0 '
+                'WHERE U0."address" >= "ipam_iprange"."start_address" '
+                'AND U0."address" <= "ipam_iprange"."end_address" '
+                'AND COALESCE(U0."vrf_id", 0) = COALESCE("ipam_iprange"."vrf_id", 0)'
+                ') * 100.0 / "ipam_iprange"."size") '
+                'END AS DOUBLE PRECISION)',
+                (),
+                output_field=FloatField()
+            )
+        )
+
 
 class VLANGroupQuerySet(RestrictedQuerySet):
 
@@ -1,29 +1,42 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from dcim.models import Device
 from virtualization.models import VirtualMachine
 from .models import IPAddress, Prefix
+from .utils import lock_prefix_hierarchy
 
 
-def update_parents_children(prefix):
+def update_surrounding_prefixes(instance, vrf_id, prefix, delta):
     """
-    Update depth on prefix & containing prefixes
+    Adjust the hierarchy of the prefixes surrounding a Prefix which has been added to (delta=1) or removed from
+    (delta=-1) the specified location within a VRF. The child count of each containing prefix and the depth of each
+    contained prefix are adjusted by the delta, using one UPDATE each. (Because depth counts only distinct parent
+    prefixes, the depth of contained prefixes is left untouched if a duplicate of the prefix exists.) The Prefix
+    itself is disregarded, as it may have moved into the surrounding hierarchy.
+
+    The caller must hold the lock on the VRF's prefix hierarchy (see lock_prefix_hierarchy()), so that the check for
+    a duplicate prefix cannot race with a concurrent change.
     """
-    parents = prefix.get_parents(include_self=True).annotate_hierarchy()
-    for parent in parents:
-        parent._children = parent.hierarchy_children
-    Prefix.objects.bulk_update(parents, ['_children'], batch_size=100)
+    prefixes = Prefix.objects.filter(vrf_id=vrf_id).exclude(pk=instance.pk)
+    prefixes.filter(prefix__net_contains=str(prefix)).update(_children=Greatest(F('_children') + delta, 0))
+    if not prefixes.filter(prefix=str(prefix)).exists():
+        prefixes.filter(prefix__net_contained=str(prefix)).update(_depth=Greatest(F('_depth') + delta, 0))
 
 
-def update_children_depth(prefix):
+def update_prefix_hierarchy(instance):
     """
-    Update children count on prefix & contained prefixes
+    Update the depth & child count of a Prefix within its current location.
     """
-    children = prefix.get_children(include_self=True).annotate_hierarchy()
-    for child in children:
-        child._depth = child.hierarchy_depth
-    Prefix.objects.bulk_update(children, ['_depth'], batch_size=100)
+    hierarchy = Prefix.objects.filter(pk=instance.pk).annotate_hierarchy().values(
+        'hierarchy_depth', 'hierarchy_children'
+    ).get()
+    instance._depth = hierarchy['hierarchy_depth']
+    instance._children = hierarchy['hierarchy_children']
+    Prefix.objects.filter(pk=instance.pk).update(_depth=instance._depth, _children=instance._children)
 
 
 @receiver(post_save, sender=Prefix)
@@ -31,22 +44,28 @@ def handle_prefix_saved(instance, created, **kwargs):
 
     # Prefix has changed (or new instance has been created)
     if created or instance.vrf_id != instance._vrf_id or instance.prefix != instance._prefix:
+        vrf_ids = [instance.vrf_id] if created else [instance.vrf_id, instance._vrf_id]
+        with transaction.atomic():
+            lock_prefix_hierarchy(*vrf_ids)
 
-        update_parents_children(instance)
-        update_children_depth(instance)
+            # If this is not a new prefix, remove it from the hierarchy of its previous location
+            if not created:
+                update_surrounding_prefixes(instance, instance._vrf_id, instance._prefix, -1)
 
-        # If this is not a new prefix, clean up parent/children of previous prefix
-        if not created:
-            old_prefix = Prefix(vrf_id=instance._vrf_id, prefix=instance._prefix)
-            update_parents_children(old_prefix)
-            update_children_depth(old_prefix)
+            update_surrounding_prefixes(instance, instance.vrf_id, instance.prefix, 1)
+            update_prefix_hierarchy(instance)
+
+        # Record the new location, in case the instance is saved again
+        instance._prefix = instance.prefix
+        instance._vrf_id = instance.vrf_id
 
 
 @receiver(post_delete, sender=Prefix)
 def handle_prefix_deleted(instance, **kwargs):
 
-    update_parents_children(instance)
-    update_children_depth(instance)
+    with transaction.atomic():
+        lock_prefix_hierarchy(instance.vrf_id)
+        update_surrounding_prefixes(instance, instance.vrf_id, instance.prefix, -1)
 
 
 @receiver(pre_delete, sender=IPAddress)
@@ -265,7 +265,7 @@ class PrefixTable(TenancyColumnsMixin, NetBoxTable):
     )
     utilization = PrefixUtilizationColumn(
         verbose_name=_('Utilization'),
-        accessor='get_utilization',
+        accessor='utilization',
         orderable=False
     )
     comments = columns.MarkdownColumn(
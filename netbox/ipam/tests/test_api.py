@@ -1,13 +1,22 @@
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TransactionTestCase
 from django.urls import reverse
 from netaddr import IPNetwork
 from rest_framework import status
+from rest_framework.test import APIClient
 
 from dcim.models import Device, DeviceRole, DeviceType, Interface, Manufacturer, Site
 from ipam.choices import *
 from ipam.models import *
+from netbox.search.backends import search_backend
 from tenancy.models import Tenant
+from users.models import Token
 from utilities.testing import APITestCase, APIViewTestCases, create_test_device, disable_warnings
 
 
@@ -1103,3 +1112,50 @@ class ServiceTest(APIViewTestCases.APIViewTestCase):
                 'ports': [6],
             },
         ]
+
+
+class AvailableIPConcurrencyTest(TransactionTestCase):
+    """
+    Test that concurrent allocations of available IP addresses never assign the same address twice.
+    """
+    def setUp(self):
+        # Disconnect search backend to avoid issues with cached ObjectTypes being deleted
+        # from the database upon transaction rollback
+        post_save.disconnect(search_backend.caching_handler)
+
+        user = get_user_model().objects.create_user(username='testuser', is_superuser=True)
+        self.header = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+        # Disable uniqueness enforcement so that any duplicate assignment would go undetected by validation
+        vrf = VRF.objects.create(name='VRF 1', enforce_unique=False)
+        self.parent_prefix = Prefix.objects.create(prefix=IPNetwork('192.0.2.0/24'), vrf=vrf)
+        self.child_prefix = Prefix.objects.create(prefix=IPNetwork('192.0.2.0/27'), vrf=vrf)
+        self.other_prefix = Prefix.objects.create(prefix=IPNetwork('198.51.100.0/28'), vrf=vrf)
+
+    def test_concurrent_available_ip_allocation(self):
+        # Allocate IPs concurrently from overlapping prefixes (192.0.2.0/24 and 192.0.2.0/27) and from an unrelated
+        # prefix (198.51.100.0/28)
+        prefixes = [self.parent_prefix, self.child_prefix, self.other_prefix] * 4
+        barrier = threading.Barrier(len(prefixes))
+
+        def allocate(prefix):
+            url = reverse('ipam-api:prefix-available-ips', kwargs={'pk': prefix.pk})
+            client = APIClient()
+            barrier.wait()
+            try:
+                return [
+                    client.post(url, {}, format='json', **self.header).status_code for _ in range(3)
+                ]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(prefixes)) as executor:
+            results = list(executor.map(allocate, prefixes))
+
+        self.assertEqual(
+            [status_code for result in results for status_code in result],
+            [status.HTTP_201_CREATED] * len(prefixes) * 3
+        )
+        addresses = list(IPAddress.objects.values_list('address', flat=True))
+        self.assertEqual(len(addresses), len(prefixes) * 3)
+        self.assertEqual(len(set(addresses)), len(addresses), "Duplicate IP addresses were assigned")
@@ -1,9 +1,13 @@
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase, override_settings
-from netaddr import IPNetwork, IPSet
+from django.test.utils import CaptureQueriesContext
+from netaddr import IPAddress as Address, IPNetwork, IPRange as Range, IPSet
 
 from ipam.choices import *
 from ipam.models import *
+from ipam.utils import rebuild_prefixes
+from netbox.constants import ADVISORY_LOCK_KEYS
 
 
 class TestAggregate(TestCase):
@@ -34,6 +38,28 @@ class TestAggregate(TestCase):
         ))
         self.assertEqual(aggregate.get_utilization(), 100)
 
+    def test_annotate_utilization(self):
+        rir = RIR.objects.create(name='RIR 1', slug='rir-1')
+        vrf = VRF.objects.create(name='VRF 1')
+        Aggregate.objects.bulk_create((
+            Aggregate(prefix=IPNetwork('10.0.0.0/8'), rir=rir),
+            Aggregate(prefix=IPNetwork('172.16.0.0/12'), rir=rir),
+        ))
+
+        # Overlapping and duplicate prefixes (in any VRF) are counted only once
+        Prefix.objects.bulk_create((
+            Prefix(prefix=IPNetwork('10.0.0.0/10')),
+            Prefix(prefix=IPNetwork('10.0.0.0/12')),
+            Prefix(prefix=IPNetwork('10.0.0.0/10'), vrf=vrf),
+            Prefix(prefix=IPNetwork('10.64.0.0/10'), vrf=vrf),
+        ))
+
+        aggregates = Aggregate.objects.annotate_utilization()
+        self.assertEqual(aggregates.get(prefix='10.0.0.0/8').get_utilization(), 50)
+        self.assertEqual(aggregates.get(prefix='172.16.0.0/12').get_utilization(), 0)
+        for aggregate in aggregates:
+            self.assertEqual(aggregate.get_utilization(), Aggregate.objects.get(pk=aggregate.pk).get_utilization())
+
 
 class TestPrefix(TestCase):
 
@@ -159,6 +185,57 @@ class TestPrefix(TestCase):
 
         self.assertEqual(available_ips, missing_ips)
 
+    def test_get_available_ip_ranges(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('10.0.0.1/24')),
+            IPAddress(address=IPNetwork('10.0.0.2/32')),
+            IPAddress(address=IPNetwork('10.0.0.2/24')),  # Duplicate
+            IPAddress(address=IPNetwork('10.0.0.100/24')),
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.10/24'),
+            end_address=IPNetwork('10.0.0.19/24')
+        )
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.15/24'),  # Overlaps the first range
+            end_address=IPNetwork('10.0.0.29/24')
+        )
+        available_ranges = [
+            Range('10.0.0.3', '10.0.0.9'),
+            Range('10.0.0.30', '10.0.0.99'),
+            Range('10.0.0.101', '10.0.0.254'),
+        ]
+
+        self.assertEqual(list(parent_prefix.get_available_ip_ranges()), available_ranges)
+        self.assertEqual(list(parent_prefix.get_available_ip_ranges(limit=1)), available_ranges[:1])
+        self.assertEqual(parent_prefix.get_available_ip_count(), 7 + 70 + 154)
+        self.assertEqual(parent_prefix.get_available_ips(), IPSet(available_ranges))
+        self.assertEqual(
+            list(parent_prefix.iter_available_ips(limit=9)),
+            [Address(f'10.0.0.{i}') for i in (3, 4, 5, 6, 7, 8, 9, 30, 31)]
+        )
+
+    def test_get_available_ip_ranges_ipv6(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('2001:db8::/48'))
+        IPAddress.objects.create(address=IPNetwork('2001:db8::1/64'))
+        IPRange.objects.create(
+            start_address=IPNetwork('2001:db8::3/64'),
+            end_address=IPNetwork('2001:db8::ffff/64')
+        )
+
+        self.assertEqual(
+            list(parent_prefix.get_available_ip_ranges()),
+            [
+                Range('2001:db8::2', '2001:db8::2'),
+                Range('2001:db8::1:0', '2001:db8:0:ffff:ffff:ffff:ffff:ffff'),
+            ]
+        )
+        self.assertEqual(parent_prefix.get_available_ip_count(), 2 ** 80 - 2 ** 16 + 1)
+        self.assertEqual(parent_prefix.get_first_available_ip(), '2001:db8::2/48')
+
     def test_get_first_available_prefix(self):
 
         prefixes = Prefix.objects.bulk_create((
@@ -222,6 +299,36 @@ class TestPrefix(TestCase):
         IPRange.objects.create(start_address=IPNetwork('10.0.0.33/24'), end_address=IPNetwork('10.0.0.64/24'))
         self.assertEqual(prefix.get_utilization(), 64 / 254 * 100)  # ~25% utilization
 
+    def test_annotate_utilization(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        container = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/16'), status=PrefixStatusChoices.STATUS_CONTAINER)
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/26'))
+        Prefix.objects.create(prefix=IPNetwork('10.0.1.0/24'), is_pool=True)
+        Prefix.objects.create(prefix=IPNetwork('10.0.2.0/24'), mark_utilized=True)
+        Prefix.objects.create(prefix=IPNetwork('10.0.3.0/24'), vrf=vrf)
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/31'))
+        Prefix.objects.create(prefix=IPNetwork('2001:db8::/64'))
+
+        # Child IPs (including duplicates and IPs within a range) and ranges
+        IPAddress.objects.bulk_create([
+            IPAddress(address=IPNetwork(f'10.0.{i // 100}.{i % 100}/24')) for i in range(0, 200)
+        ] + [
+            IPAddress(address=IPNetwork('10.0.0.1/24')),
+            IPAddress(address=IPNetwork('10.0.3.1/24'), vrf=vrf),
+            IPAddress(address=IPNetwork('2001:db8::1/64')),
+        ])
+        IPRange.objects.create(start_address=IPNetwork('10.0.0.50/24'), end_address=IPNetwork('10.0.0.149/24'))
+        IPRange.objects.create(start_address=IPNetwork('10.0.3.1/24'), end_address=IPNetwork('10.0.3.2/24'), vrf=vrf)
+
+        prefixes = Prefix.objects.annotate_utilization()
+        self.assertEqual(prefixes.get(pk=container.pk).utilization, 3 * 256 / 65536 * 100)
+        for prefix in prefixes:
+            self.assertAlmostEqual(prefix.utilization, Prefix.objects.get(pk=prefix.pk).get_utilization())
+        for iprange in IPRange.objects.annotate_utilization():
+            self.assertAlmostEqual(iprange.utilization, IPRange.objects.get(pk=iprange.pk).utilization)
+
     #
     # Uniqueness enforcement tests
     #
@@ -447,6 +554,74 @@ class TestPrefixHierarchy(TestCase):
         self.assertEqual(prefixes[3]._depth, 2)
         self.assertEqual(prefixes[3]._children, 0)
 
+    def test_delete_duplicate_prefix4(self):
+        # Duplicate 10.0.0.0/16, then delete the duplicate
+        duplicate_prefix = Prefix(prefix='10.0.0.0/16')
+        duplicate_prefix.save()
+        duplicate_prefix.delete()
+
+        prefixes = Prefix.objects.filter(prefix__family=4)
+        self.assertEqual(prefixes[0].prefix, IPNetwork('10.0.0.0/8'))
+        self.assertEqual(prefixes[0]._depth, 0)
+        self.assertEqual(prefixes[0]._children, 2)
+        self.assertEqual(prefixes[1].prefix, IPNetwork('10.0.0.0/16'))
+        self.assertEqual(prefixes[1]._depth, 1)
+        self.assertEqual(prefixes[1]._children, 1)
+        self.assertEqual(prefixes[2].prefix, IPNetwork('10.0.0.0/24'))
+        self.assertEqual(prefixes[2]._depth, 2)
+        self.assertEqual(prefixes[2]._children, 0)
+
+    def test_update_prefix_repeatedly4(self):
+        # Change 10.0.0.0/24 to 10.0.0.0/12, then to 10.1.0.0/16, saving the same instance each time
+        prefix = Prefix.objects.get(prefix='10.0.0.0/24')
+        prefix.prefix = '10.0.0.0/12'
+        prefix.save()
+        prefix.prefix = '10.1.0.0/16'
+        prefix.save()
+        prefix.save()
+
+        prefixes = Prefix.objects.filter(prefix__family=4)
+        self.assertEqual(prefixes[0].prefix, IPNetwork('10.0.0.0/8'))
+        self.assertEqual(prefixes[0]._depth, 0)
+        self.assertEqual(prefixes[0]._children, 2)
+        self.assertEqual(prefixes[1].prefix, IPNetwork('10.0.0.0/16'))
+        self.assertEqual(prefixes[1]._depth, 1)
+        self.assertEqual(prefixes[1]._children, 0)
+        self.assertEqual(prefixes[2].prefix, IPNetwork('10.1.0.0/16'))
+        self.assertEqual(prefixes[2]._depth, 1)
+        self.assertEqual(prefixes[2]._children, 0)
+
+    def test_prefix_hierarchy_lock(self):
+        vrf = VRF(name='VRF A')
+        vrf.save()
+
+        # Moving a prefix should lock the hierarchies of both its previous and new VRFs
+        p = Prefix.objects.get(prefix='10.0.0.0/16')
+        p.vrf = vrf
+        with CaptureQueriesContext(connection) as queries:
+            p.save()
+        locks = [query['sql'] for query in queries if 'pg_advisory_xact_lock' in query['sql']]
+        lock_key = ADVISORY_LOCK_KEYS['prefix-hierarchy']
+        self.assertEqual(locks, [
+            f'SELECT pg_advisory_xact_lock({lock_key}, 0)',
+            f'SELECT pg_advisory_xact_lock({lock_key}, {vrf.pk})',
+        ])
+
+    def test_rebuild_prefixes(self):
+        # Duplicate 10.0.0.0/16, then reset the hierarchy of all IPv4 prefixes
+        Prefix(prefix='10.0.0.0/16').save()
+        Prefix.objects.filter(prefix__family=4).update(_depth=0, _children=0)
+
+        self.assertEqual(rebuild_prefixes(None), 4)
+        prefixes = Prefix.objects.filter(prefix__family=4)
+        self.assertEqual(
+            [(p._depth, p._children) for p in prefixes],
+            [(0, 3), (1, 1), (1, 1), (2, 0)]
+        )
+
+        # Rebuilding an intact hierarchy should not update any prefixes
+        self.assertEqual(rebuild_prefixes(None), 0)
+
 
 class TestIPAddress(TestCase):
 
@@ -1,5 +1,10 @@
+from contextlib import ExitStack, contextmanager
+
 import netaddr
+from django.db import connection
+from django_pglocks import advisory_lock
 
+from netbox.constants import ADVISORY_LOCK_KEYS
 from .constants import *
 from .models import Prefix, VLAN
 
@@ -7,7 +12,10 @@ __all__ = (
     'add_available_ipaddresses',
     'add_available_vlans',
     'add_requested_prefixes',
+    'allocation_lock',
     'get_next_available_prefix',
+    'get_root_prefix_id',
+    'lock_prefix_hierarchy',
     'rebuild_prefixes',
 )
 
@@ -136,7 +144,10 @@ def add_available_vlans(vlans, vlan_group=None):
 
 def rebuild_prefixes(vrf):
     """
-    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table).
+    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table). The depth and child count
+    of every prefix are computed in a single ordered pass over the VRF's prefixes, then written back using a single
+    UPDATE statement, which modifies only those prefixes whose values have changed. Returns the number of prefixes
+    updated.
     """
     def contains(parent, child):
         return child in parent and child != parent
@@ -151,47 +162,53 @@ def rebuild_prefixes(vrf):
             'children': 0,
         })
 
+    def pop_from_stack():
+        node = stack.pop()
+        for pk in node['pk']:
+            hierarchy.append((pk, len(stack), node['children']))
+
     stack = []
-    update_queue = []
+    hierarchy = []
     prefixes = Prefix.objects.filter(vrf=vrf).values('pk', 'prefix')
 
     # Iterate through all Prefixes in the VRF, growing and shrinking the stack as we go
-    for i, p in enumerate(prefixes):
+    for p in prefixes.iterator():
 
         # Grow the stack if this is a child of the most recent prefix
         if not stack or contains(stack[-1]['prefix'], p['prefix']):
             push_to_stack(p)
 
-        # Handle duplicate prefixes
+        # Handle duplicate prefixes (each of which counts as a child of the parent nodes)
         elif stack[-1]['prefix'] == p['prefix']:
+            for n in stack[:-1]:
+                n['children'] += 1
             stack[-1]['pk'].append(p['pk'])
 
         # If this is a sibling or parent of the most recent prefix, pop nodes from the
         # stack until we reach a parent prefix (or the root)
         else:
             while stack and not contains(stack[-1]['prefix'], p['prefix']):
-                node = stack.pop()
-                for pk in node['pk']:
-                    update_queue.append(
-                        Prefix(pk=pk, _depth=len(stack), _children=node['children'])
-                    )
+                pop_from_stack()
             push_to_stack(p)
 
-        # Flush the update queue once it reaches 100 Prefixes
-        if len(update_queue) >= 100:
-            Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
-            update_queue = []
-
     # Clear out any prefixes remaining in the stack
     while stack:
-        node = stack.pop()
-        for pk in node['pk']:
-            update_queue.append(
-                Prefix(pk=pk, _depth=len(stack), _children=node['children'])
-            )
+        pop_from_stack()
+
+    if not hierarchy:
+        return 0
 
-    # Final flush of any remaining Prefixes
-    Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
+    # Write the hierarchy back to the database
+    pks, depths, children = zip(*hierarchy)
+    table = connection.ops.quote_name(Prefix._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET _depth = h.depth, _children = h.children "
+            f"FROM unnest(%s::bigint[], %s::integer[], %s::integer[]) AS h(id, depth, children) "
+            f"WHERE {table}.id = h.id AND ({table}._depth, {table}._children) <> (h.depth, h.children)",
+            [list(pks), list(depths), list(children)]
+        )
+        return cursor.rowcount
 
 
 def get_next_available_prefix(ipset, prefix_size):
@@ -204,3 +221,61 @@ def get_next_available_prefix(ipset, prefix_size):
             ipset.remove(allocated_prefix)
             return allocated_prefix
     return None
+
+
+def get_root_prefix_id(vrf_id, address):
+    """
+    Return the ID of the top-level (depth zero) prefix within the specified VRF (or global table) which contains the
+    given IP address or network, or None if no such prefix exists.
+    """
+    return Prefix.objects.filter(
+        vrf_id=vrf_id,
+        _depth=0,
+        prefix__net_contains_or_equals=str(address)
+    ).values_list('pk', flat=True).first()
+
+
+def lock_prefix_hierarchy(*vrf_ids):
+    """
+    Acquire an exclusive advisory lock on the prefix hierarchy of each of the specified VRFs (or None for the global
+    table). The locks are held until the end of the current transaction, so that concurrent changes to prefixes within
+    a VRF adjust its hierarchy one after another, each seeing the changes committed before it.
+    """
+    lock_key = ADVISORY_LOCK_KEYS['prefix-hierarchy']
+    with connection.cursor() as cursor:
+        # Always acquire locks in the same order to avoid deadlocks
+        for vrf_id in sorted({vrf_id or 0 for vrf_id in vrf_ids}):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [lock_key, vrf_id])
+
+
+@contextmanager
+def allocation_lock(name, scopes):
+    """
+    Acquire the advisory locks required to allocate objects of the given type (e.g. 'available-ips') within each of
+    the specified scopes. Each scope is a two-tuple of a VRF ID (or None for the global table) and an IP address or
+    network, or None if the scope of the allocation cannot be determined.
+
+    Any two overlapping prefixes or ranges within a VRF fall within the same top-level prefix, so an exclusive lock on
+    each top-level prefix is sufficient to serialize allocations which might conflict, while allowing allocations
+    within unrelated prefixes to proceed concurrently. These locks are held alongside a shared lock on the key for
+    the object type. If a scope does not fall within any prefix (or is unknown), an exclusive lock on the object type
+    key is taken instead, serializing the allocation with all others of its type.
+    """
+    lock_key = ADVISORY_LOCK_KEYS[name]
+    prefix_ids = set()
+    for scope in scopes:
+        prefix_id = get_root_prefix_id(*scope) if scope is not None else None
+        if prefix_id is None:
+            prefix_ids = None
+            break
+        prefix_ids.add(prefix_id)
+
+    with ExitStack() as stack:
+        if prefix_ids is None:
+            stack.enter_context(advisory_lock(lock_key))
+        else:
+            stack.enter_context(advisory_lock(lock_key, shared=True))
+            # Always acquire prefix locks in the same order to avoid deadlocks
+            for prefix_id in sorted(prefix_ids):
+                stack.enter_context(advisory_lock((lock_key, prefix_id)))
+        yield
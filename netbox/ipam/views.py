@@ -327,7 +327,7 @@ class ASNBulkDeleteView(generic.BulkDeleteView):
 class AggregateListView(generic.ObjectListView):
     queryset = Aggregate.objects.annotate(
         child_count=RawSQL('SELECT COUNT(*) FROM ipam_prefix WHERE ipam_prefix.prefix <<= ipam_aggregate.prefix', ())
-    )
+    ).annotate_utilization()
     filterset = filtersets.AggregateFilterSet
     filterset_form = forms.AggregateFilterForm
     table = tables.AggregateTable
@@ -355,7 +355,7 @@ class AggregatePrefixesView(generic.ObjectChildrenView):
     def get_children(self, request, parent):
         return Prefix.objects.restrict(request.user, 'view').filter(
             prefix__net_contained_or_equal=str(parent.prefix)
-        ).prefetch_related('site', 'role', 'tenant', 'tenant__group', 'vlan')
+        ).prefetch_related('site', 'role', 'tenant', 'tenant__group', 'vlan').annotate_utilization()
 
     def prep_table_data(self, request, queryset, parent):
         # Determine whether to show assigned prefixes, available prefixes, or both
@@ -392,7 +392,7 @@ class AggregateBulkImportView(generic.BulkImportView):
 class AggregateBulkEditView(generic.BulkEditView):
     queryset = Aggregate.objects.annotate(
         child_count=RawSQL('SELECT COUNT(*) FROM ipam_prefix WHERE ipam_prefix.prefix <<= ipam_aggregate.prefix', ())
-    )
+    ).annotate_utilization()
     filterset = filtersets.AggregateFilterSet
     table = tables.AggregateTable
     form = forms.AggregateBulkEditForm
@@ -401,7 +401,7 @@ class AggregateBulkEditView(generic.BulkEditView):
 class AggregateBulkDeleteView(generic.BulkDeleteView):
     queryset = Aggregate.objects.annotate(
         child_count=RawSQL('SELECT COUNT(*) FROM ipam_prefix WHERE ipam_prefix.prefix <<= ipam_aggregate.prefix', ())
-    )
+    ).annotate_utilization()
     filterset = filtersets.AggregateFilterSet
     table = tables.AggregateTable
 
@@ -476,7 +476,7 @@ class RoleBulkDeleteView(generic.BulkDeleteView):
 #
 
 class PrefixListView(generic.ObjectListView):
-    queryset = Prefix.objects.all()
+    queryset = Prefix.objects.annotate_utilization()
     filterset = filtersets.PrefixFilterSet
     filterset_form = forms.PrefixFilterForm
     table = tables.PrefixTable
@@ -547,7 +547,7 @@ class PrefixPrefixesView(generic.ObjectChildrenView):
     def get_children(self, request, parent):
         return parent.get_child_prefixes().restrict(request.user, 'view').prefetch_related(
             'site', 'vrf', 'vlan', 'role', 'tenant', 'tenant__group'
-        )
+        ).annotate_utilization()
 
     def prep_table_data(self, request, queryset, parent):
         # Determine whether to show assigned prefixes, available prefixes, or both
@@ -582,7 +582,7 @@ class PrefixIPRangesView(generic.ObjectChildrenView):
     def get_children(self, request, parent):
         return parent.get_child_ranges().restrict(request.user, 'view').prefetch_related(
             'tenant__group',
-        )
+        ).annotate_utilization()
 
     def get_extra_context(self, request, instance):
         return {
@@ -659,7 +659,7 @@ class PrefixContactsView(ObjectContactsView):
 #
 
 class IPRangeListView(generic.ObjectListView):
-    queryset = IPRange.objects.all()
+    queryset = IPRange.objects.annotate_utilization()
     filterset = filtersets.IPRangeFilterSet
     filterset_form = forms.IPRangeFilterForm
     table = tables.IPRangeTable
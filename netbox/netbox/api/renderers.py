@@ -1,7 +1,11 @@
+import json
+
 from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer
+from rest_framework.utils.encoders import JSONEncoder
 
 __all__ = (
     'FormlessBrowsableAPIRenderer',
+    'NDJSONRenderer',
     'TextRenderer',
 )
 
@@ -26,3 +30,24 @@ class TextRenderer(BaseRenderer):
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
         return str(data)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Render a list of objects as newline-delimited JSON (one object per line). Any other data is rendered as a single
+    line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        return b''.join(self.render_line(item) for item in data)
+
+    @staticmethod
+    def render_line(item):
+        return json.dumps(item, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode() + b'\n'
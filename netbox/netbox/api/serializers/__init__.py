@@ -4,6 +4,7 @@ from .base import *
 from .features import *
 from .generic import *
 from .nested import *
+from .search import *
 
 
 #
@@ -0,0 +1,26 @@
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from netbox.api.fields import ContentTypeField
+from utilities.api import get_serializer_for_model
+
+__all__ = (
+    'SearchResultSerializer',
+)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """
+    Represents a single object returned by the global search engine, along with the cached value it matched.
+    """
+    object_type = ContentTypeField(read_only=True)
+    object_id = serializers.IntegerField(read_only=True)
+    object = serializers.SerializerMethodField(read_only=True)
+    field = serializers.CharField(read_only=True)
+    value = serializers.CharField(read_only=True)
+    weight = serializers.IntegerField(read_only=True)
+
+    @extend_schema_field(serializers.JSONField(allow_null=True))
+    def get_object(self, instance):
+        serializer = get_serializer_for_model(instance.object)
+        return serializer(instance.object, nested=True, context=self.context).data
@@ -4,15 +4,24 @@ from django import __version__ as DJANGO_VERSION
 from django.apps import apps
 from django.conf import settings
 from django_rq.queues import get_connection
-from drf_spectacular.utils import extend_schema
+from django.contrib.contenttypes.models import ContentType
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from drf_spectacular.types import OpenApiTypes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rq.worker import Worker
 
-from netbox.plugins.utils import get_installed_plugins
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
+from netbox.api.pagination import OptionalLimitOffsetPagination
+from netbox.api.serializers import SearchResultSerializer
+from netbox.config import get_config
+from netbox.forms import SearchForm
+from netbox.plugins.utils import get_installed_plugins
+from netbox.search import LookupTypes
+from netbox.search.backends import search_backend
 
 
 class APIRootView(APIView):
@@ -35,6 +44,7 @@ class APIRootView(APIView):
             'extras': reverse('extras-api:api-root', request=request, format=format),
             'ipam': reverse('ipam-api:api-root', request=request, format=format),
             'plugins': reverse('plugins-api:api-root', request=request, format=format),
+            'search': reverse('api-search', request=request, format=format),
             'status': reverse('api-status', request=request, format=format),
             'tenancy': reverse('tenancy-api:api-root', request=request, format=format),
             'users': reverse('users-api:api-root', request=request, format=format),
@@ -71,3 +81,60 @@ class StatusView(APIView):
             'python-version': platform.python_version(),
             'rq-workers-running': Worker.count(get_connection('default')),
         })
+
+
+class SearchView(APIView):
+    """
+    Search all indexed objects. Results are ordered by weight, object type, and object ID, and returned in pages; use
+    the `next` URL to retrieve the subsequent page. The reported count is an estimate.
+    """
+    permission_classes = [IsAuthenticatedOrLoginNotRequired]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', OpenApiTypes.STR, required=True, description="Search query"),
+            OpenApiParameter('lookup', OpenApiTypes.STR, description="Lookup type (defaults to a partial match)"),
+            OpenApiParameter(
+                'obj_types', OpenApiTypes.STR, many=True, description="Object types to search (e.g. dcim.site)"
+            ),
+            OpenApiParameter('limit', OpenApiTypes.INT, description="Number of results to return per page"),
+            OpenApiParameter('cursor', OpenApiTypes.STR, description="Cursor indicating the page to return"),
+        ],
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def get(self, request):
+        form = SearchForm(request.query_params)
+        if not form.is_valid():
+            raise ValidationError(form.errors)
+
+        # Restrict results by object type
+        object_types = []
+        for obj_type in form.cleaned_data['obj_types']:
+            app_label, model_name = obj_type.split('.')
+            object_types.append(ContentType.objects.get_by_natural_key(app_label, model_name))
+
+        query = form.cleaned_data['q']
+        lookup = form.cleaned_data['lookup'] or LookupTypes.PARTIAL
+        limit = OptionalLimitOffsetPagination().get_limit(request) or get_config().PAGINATE_COUNT
+
+        try:
+            results, cursor = search_backend.search_page(
+                query,
+                user=request.user,
+                object_types=object_types,
+                lookup=lookup,
+                cursor=request.query_params.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            raise ValidationError({'cursor': str(e)})
+
+        next_url = None
+        if cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+
+        return Response({
+            'count': search_backend.estimate_count(query, object_types=object_types, lookup=lookup),
+            'next': next_url,
+            'results': SearchResultSerializer(results, many=True, context={'request': request}).data,
+        })
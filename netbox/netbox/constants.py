@@ -18,6 +18,9 @@ ADVISORY_LOCK_KEYS = {
     'available-vlans': 100300,
     'available-asns': 100400,
 
+    # Prefix hierarchy locks
+    'prefix-hierarchy': 101100,
+
     # MPTT locks
     'region': 105100,
     'sitegroup': 105200,
@@ -1,10 +1,20 @@
 from contextvars import ContextVar
 
 __all__ = (
+    'cablepath_queue',
+    'cabletrace_generation_queue',
+    'changelog_queue',
     'current_request',
     'events_queue',
+    'search_generation_queue',
+    'search_queue',
 )
 
 
+cablepath_queue = ContextVar('cablepath_queue', default=None)
+cabletrace_generation_queue = ContextVar('cabletrace_generation_queue', default=None)
+changelog_queue = ContextVar('changelog_queue', default=None)
 current_request = ContextVar('current_request', default=None)
 events_queue = ContextVar('events_queue', default=dict())
+search_generation_queue = ContextVar('search_generation_queue', default=None)
+search_queue = ContextVar('search_queue', default=None)
@@ -27,6 +27,12 @@ class LookupTypes:
     REGEX = 'iregex'
 
 
+class IndexingModes:
+    IMMEDIATE = 'immediate'
+    DEFERRED = 'deferred'
+    BACKGROUND = 'background'
+
+
 class SearchIndex:
     """
     Base class for building search indexes.
@@ -1,27 +1,45 @@
+import base64
+import hashlib
+import json
+import time
 from collections import defaultdict
 
 from django.conf import settings
+from django.contrib import auth
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import F, Window, Q, prefetch_related_objects
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Window, Q, prefetch_related_objects
 from django.db.models.fields.related import ForeignKey
-from django.db.models.functions import window
+from django.db.models.functions import Upper, window
 from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
 from django.utils.module_loading import import_string
+from django_rq import get_queue
 import netaddr
 from netaddr.core import AddrFormatError
 
 from core.models import ObjectType
 from extras.models import CachedValue, CustomField
+from netbox.authentication import ObjectPermissionMixin
+from netbox.config import get_config
+from netbox.constants import RQ_QUEUE_DEFAULT
+from netbox.context import search_generation_queue, search_queue
 from netbox.registry import registry
 from utilities.object_types import object_type_identifier
 from utilities.querysets import RestrictedPrefetch
 from utilities.string import title
-from . import FieldTypes, LookupTypes, get_indexer
+from utilities.transactions import get_transaction_batch
+from . import FieldTypes, IndexingModes, LookupTypes, get_indexer
 
 DEFAULT_LOOKUP_TYPE = LookupTypes.PARTIAL
 MAX_RESULTS = 1000
 
+# Batches of CachedValues at least this large are written using COPY rather than INSERT
+COPY_THRESHOLD = 500
+
 
 class SearchBackend:
     """
@@ -57,17 +75,85 @@ class SearchBackend:
         """
         raise NotImplementedError
 
+    def search_page(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE, cursor=None, limit=50):
+        """
+        Return a single page of search results, ordered by weight, object type, and object ID. Returns a two-tuple of
+        the results list and an opaque cursor to pass when retrieving the next page (None if this is the last page).
+        """
+        raise NotImplementedError
+
+    def estimate_count(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return an estimate of the total number of objects matching a search query (or None if not supported).
+        """
+        return None
+
     def caching_handler(self, sender, instance, created, **kwargs):
         """
         Receiver for the post_save signal, responsible for caching object creation/changes.
         """
-        self.cache(instance, remove_existing=not created)
+        if settings.SEARCH_INDEXING_MODE != IndexingModes.IMMEDIATE:
+            self.defer(instance)
+        else:
+            self.cache(instance, remove_existing=not created)
 
     def removal_handler(self, sender, instance, **kwargs):
         """
         Receiver for the post_delete signal, responsible for caching object deletion.
         """
-        self.remove(instance)
+        if settings.SEARCH_INDEXING_MODE != IndexingModes.IMMEDIATE:
+            self.defer(instance)
+        else:
+            self.remove(instance)
+
+    def defer(self, instance):
+        """
+        Mark an instance as needing its cached representation updated once the current database transaction has been
+        committed. Repeated changes to the same object within a transaction are coalesced, and changes within a
+        transaction (or savepoint) which is rolled back are discarded.
+        """
+        # Ignore non-cacheable objects
+        try:
+            get_indexer(instance)
+        except KeyError:
+            return
+
+        label = instance._meta.label_lower
+        if not transaction.get_connection().in_atomic_block:
+            self.flush({label: {instance.pk}})
+            return
+
+        if (queue := search_queue.get()) is None:
+            queue = {}
+            search_queue.set(queue)
+        batch = get_transaction_batch(queue, self.flush, factory=lambda: defaultdict(set))
+        batch[label].add(instance.pk)
+
+    def flush(self, batch):
+        """
+        Update the cached representations of a batch of objects marked by defer(), either immediately or by enqueuing
+        a background task (depending on SEARCH_INDEXING_MODE).
+        """
+        if not batch:
+            return
+        objects = {label: list(pks) for label, pks in batch.items()}
+
+        if settings.SEARCH_INDEXING_MODE == IndexingModes.BACKGROUND:
+            queue_name = get_config().QUEUE_MAPPINGS.get('search', RQ_QUEUE_DEFAULT)
+            get_queue(queue_name).enqueue('netbox.search.backends.refresh_cache', objects=objects)
+        else:
+            self.refresh(objects)
+
+    def refresh(self, objects):
+        """
+        Update the cached representations of the specified objects, given as a dictionary mapping model labels to
+        lists of primary keys. Any cached values for objects which no longer exist are removed.
+        """
+        for label, pks in objects.items():
+            indexer = registry['search'][label]
+            for pk in pks:
+                self.remove(indexer.model(pk=pk))
+            self.cache(indexer.model.objects.filter(pk__in=pks), indexer=indexer, remove_existing=False)
 
     def cache(self, instances, indexer=None, remove_existing=True):
         """
@@ -104,9 +190,10 @@ class SearchBackend:
 
 class CachedValueSearchBackend(SearchBackend):
 
-    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
-
-        # Build the filter used to find relevant CachedValue records
+    def get_query_filter(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a Q object used to find the CachedValue records relevant to the given query.
+        """
         query_filter = Q(**{f'value__{lookup}': value})
         if object_types:
             # Limit results by object type
@@ -122,40 +209,197 @@ class CachedValueSearchBackend(SearchBackend):
             except (AddrFormatError, ValueError):
                 pass
 
-        # Construct the base queryset to retrieve matching results
-        queryset = CachedValue.objects.filter(query_filter).annotate(
+        return query_filter
+
+    def get_matches(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a queryset of all CachedValues matching the given query.
+        """
+        return CachedValue.objects.filter(
+            self.get_query_filter(value, object_types=object_types, lookup=lookup)
+        )
+
+    def get_rank_ordering(self, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return the ordering by which results of equal weight for an object are ranked.
+        """
+        return []
+
+    def get_queryset(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a queryset of all CachedValues matching the given query, annotated with the rank of each result for
+        its object.
+        """
+        return self.get_matches(value, object_types=object_types, lookup=lookup).annotate(
             # Annotate the rank of each result for its object according to its weight
             row_number=Window(
                 expression=window.RowNumber(),
                 partition_by=[F('object_type'), F('object_id')],
-                order_by=[F('weight').asc()],
+                order_by=[F('weight').asc(), *self.get_rank_ordering(lookup)],
             )
-        )[:MAX_RESULTS]
+        )
 
-        # Gather all ObjectTypes present in the search results (used for prefetching related
-        # objects). This must be done before generating the final results list, which returns
-        # a RawQuerySet.
-        object_type_ids = set(queryset.values_list('object_type', flat=True))
-        object_types = ObjectType.objects.filter(pk__in=object_type_ids)
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
 
-        # Construct a Prefetch to pre-fetch only those related objects for which the
-        # user has permission to view.
-        if user:
-            prefetch = (RestrictedPrefetch('object', user, 'view'), 'object_type')
-        else:
-            prefetch = ('object', 'object_type')
+        # Return cached results (if enabled & available)
+        if settings.SEARCH_CACHE_TIMEOUT:
+            cache_key = self._get_results_cache_key(value, user=user, object_types=object_types, lookup=lookup)
+            if (results := cache.get(cache_key)) is not None:
+                return results
+
+        # Construct the base queryset to retrieve matching results
+        queryset = self.get_queryset(value, object_types=object_types, lookup=lookup)[:MAX_RESULTS]
 
         # Wrap the base query to return only the lowest-weight result for each object
         # Hat-tip to https://blog.oyam.dev/django-filter-by-window-function/ for the solution
         sql, params = queryset.query.sql_with_params()
-        results = CachedValue.objects.prefetch_related(*prefetch).raw(
+        results = CachedValue.objects.raw(
             f"SELECT * FROM ({sql}) t WHERE row_number = 1",
             params
         )
+        results = self._prefetch_results(list(results), user=user)
+
+        if settings.SEARCH_CACHE_TIMEOUT:
+            cache.set(cache_key, results, settings.SEARCH_CACHE_TIMEOUT)
+
+        return results
+
+    def search_page(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE, cursor=None, limit=50):
+        matches = self.get_matches(value, object_types=object_types, lookup=lookup)
+
+        # Return only the lowest-weight results for each object, excluding any result for which the object has a
+        # lower-weight match. This avoids ranking all matches, so that both the keyset predicate and the limit can be
+        # applied directly to the matches.
+        lower_weight_matches = matches.filter(
+            object_type=OuterRef('object_type'),
+            object_id=OuterRef('object_id'),
+            weight__lt=OuterRef('weight')
+        )
+        queryset = matches.exclude(
+            Exists(lower_weight_matches)
+        ).order_by(
+            'weight', 'object_type_id', 'object_id', *self.get_rank_ordering(lookup)
+        ).distinct(
+            'weight', 'object_type_id', 'object_id'
+        )
+        if cursor:
+            weight, object_type_id, object_id = self._decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(weight__gt=weight) |
+                Q(weight=weight, object_type_id__gt=object_type_id) |
+                Q(weight=weight, object_type_id=object_type_id, object_id__gt=object_id)
+            )
+
+        # Retrieve one extra result to determine whether another page follows
+        results = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = self._encode_cursor(last.weight, last.object_type_id, last.object_id)
+
+        return self._prefetch_results(results, user=user), next_cursor
+
+    def estimate_count(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        queryset = CachedValue.objects.filter(
+            self.get_query_filter(value, object_types=object_types, lookup=lookup)
+        ).values('object_type', 'object_id').distinct()
+        sql, params = queryset.query.sql_with_params()
+
+        # Return the number of rows estimated by the PostgreSQL query planner
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if type(plan) is str:
+            plan = json.loads(plan)
+
+        return plan[0]['Plan']['Plan Rows']
+
+    @staticmethod
+    def _encode_cursor(*values):
+        """
+        Encode a keyset as an opaque cursor string.
+        """
+        return base64.urlsafe_b64encode(':'.join(str(v) for v in values).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """
+        Decode an opaque cursor string into its keyset (weight, object type ID, object ID).
+        """
+        try:
+            weight, object_type_id, object_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            return int(weight), int(object_type_id), int(object_id)
+        except (ValueError, UnicodeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    @staticmethod
+    def _get_results_cache_key(value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return the key under which the results of a search are cached. The key incorporates the current result cache
+        generation of each object type being searched, as well as the user's view permissions.
+        """
+        if object_types:
+            labels = sorted(object_type_identifier(object_type) for object_type in object_types)
+        else:
+            labels = sorted(registry['search'])
+        generations = cache.get_many([f'search:generation:{label}' for label in labels])
+
+        # Capture the user's view permissions (including any constraints)
+        permissions = {}
+        if user is not None and user.is_active and user.is_superuser:
+            permissions = 'superuser'
+        elif user is not None:
+            for backend in auth.get_backends():
+                if isinstance(backend, ObjectPermissionMixin):
+                    permissions.update({
+                        name: constraints for name, constraints in backend.get_all_permissions(user).items()
+                        if '.view_' in name
+                    })
+
+        data = json.dumps(
+            [value, lookup, labels, sorted(generations.items()), getattr(user, 'pk', None), permissions],
+            sort_keys=True,
+            default=str
+        )
+        return f'search:results:{hashlib.sha256(data.encode()).hexdigest()}'
+
+    @staticmethod
+    def _invalidate_results(*labels):
+        """
+        Increment the result cache generation for each of the specified object types once the current transaction
+        has been committed. This has the effect of invalidating any cached search results which include these types.
+        The object types invalidated within a transaction are collected, so that each generation is incremented only
+        once.
+        """
+        if not settings.SEARCH_CACHE_TIMEOUT or not labels:
+            return
+        if not transaction.get_connection().in_atomic_block:
+            bump_generations(labels)
+            return
+
+        if (queue := search_generation_queue.get()) is None:
+            queue = {}
+            search_generation_queue.set(queue)
+        get_transaction_batch(queue, bump_generations, factory=set).update(labels)
+
+    @staticmethod
+    def _prefetch_results(results, user=None):
+        """
+        Prefetch the objects (and any related objects necessary for display) referenced by a list of CachedValues.
+        Results pertaining to objects which the user does not have permission to view are omitted.
+        """
+        # Construct a Prefetch to pre-fetch only those related objects for which the
+        # user has permission to view.
+        if user:
+            prefetch = (RestrictedPrefetch('object', user, 'view'), 'object_type')
+        else:
+            prefetch = ('object', 'object_type')
+        prefetch_related_objects(results, *prefetch)
 
         # Iterate through each ObjectType represented in the search results and prefetch any
         # related objects necessary to render the prescribed display attributes (display_attrs).
-        for object_type in object_types:
+        for object_type in {r.object_type for r in results}:
             model = object_type.model_class()
             indexer = registry['search'].get(object_type_identifier(object_type))
             if not (display_attrs := getattr(indexer, 'display_attrs', None)):
@@ -228,15 +472,45 @@ class CachedValueSearchBackend(SearchBackend):
 
             # Check whether the buffer needs to be flushed
             if len(buffer) >= 2000:
-                counter += len(CachedValue.objects.bulk_create(buffer))
+                counter += self._write_values(buffer)
                 buffer = []
 
         # Final buffer flush
         if buffer:
-            counter += len(CachedValue.objects.bulk_create(buffer))
+            counter += self._write_values(buffer)
+
+        if counter:
+            self._invalidate_results(indexer.model._meta.label_lower)
 
         return counter
 
+    @staticmethod
+    def _write_values(values):
+        """
+        Write a list of CachedValue instances to the database and return the number of rows written. Large batches
+        are streamed to PostgreSQL using COPY, which avoids the overhead of parsing and planning a huge INSERT.
+        """
+        if len(values) < COPY_THRESHOLD:
+            return len(CachedValue.objects.bulk_create(values))
+
+        meta = CachedValue._meta
+        fields = [
+            meta.get_field(name) for name in
+            ('id', 'timestamp', 'object_type', 'object_id', 'field', 'type', 'value', 'weight')
+        ]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f'COPY {connection.ops.quote_name(meta.db_table)} ({columns}) FROM STDIN'
+        timestamp = timezone.now()
+
+        with connection.cursor() as cursor:
+            with cursor.copy(sql) as copy:
+                for cv in values:
+                    copy.write_row((
+                        cv.id, timestamp, cv.object_type_id, cv.object_id, cv.field, cv.type, str(cv.value), cv.weight
+                    ))
+
+        return len(values)
+
     def remove(self, instance):
         # Avoid attempting to query for non-cacheable objects
         try:
@@ -246,14 +520,30 @@ class CachedValueSearchBackend(SearchBackend):
 
         ct = ContentType.objects.get_for_model(instance)
         qs = CachedValue.objects.filter(object_type=ct, object_id=instance.pk)
+        self._invalidate_results(instance._meta.label_lower)
 
         # Call _raw_delete() on the queryset to avoid first loading instances into memory
         return qs._raw_delete(using=qs.db)
 
+    def refresh(self, objects):
+        for label, pks in objects.items():
+            indexer = registry['search'][label]
+            object_type = ObjectType.objects.get_for_model(indexer.model)
+
+            # Delete any existing cached values for the objects in a single query
+            qs = CachedValue.objects.filter(object_type=object_type, object_id__in=pks)
+            qs._raw_delete(using=qs.db)
+            self._invalidate_results(label)
+
+            self.cache(indexer.model.objects.filter(pk__in=pks), indexer=indexer, remove_existing=False)
+
     def clear(self, object_types=None):
         qs = CachedValue.objects.all()
         if object_types:
             qs = qs.filter(object_type__in=object_types)
+            self._invalidate_results(*[object_type_identifier(object_type) for object_type in object_types])
+        else:
+            self._invalidate_results(*registry['search'].keys())
 
         # Call _raw_delete() on the queryset to avoid first loading instances into memory
         return qs._raw_delete(using=qs.db)
@@ -269,10 +559,76 @@ class CachedValueSearchBackend(SearchBackend):
         return CachedValue.objects.count()
 
 
+class TrigramSearchBackend(CachedValueSearchBackend):
+    """
+    A variant of CachedValueSearchBackend which leverages PostgreSQL's pg_trgm extension for partial matches. In
+    addition to substring matches, values similar to the query (e.g. misspellings) are returned. Partial match results
+    are ranked by weight and then by their similarity to the query.
+    """
+    def get_matches(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        if lookup != LookupTypes.PARTIAL:
+            return super().get_matches(value, object_types=object_types, lookup=lookup)
+
+        # Match on the uppercased value to employ the trigram index on CachedValue
+        query = value.upper()
+        similar_filter = Q(value_upper__trigram_similar=query)
+        if object_types:
+            similar_filter &= Q(object_type__in=object_types)
+
+        return CachedValue.objects.alias(
+            value_upper=Upper('value')
+        ).filter(
+            self.get_query_filter(value, object_types=object_types, lookup=lookup) | similar_filter
+        ).annotate(
+            similarity=TrigramSimilarity(Upper('value'), query)
+        )
+
+    def get_rank_ordering(self, lookup=DEFAULT_LOOKUP_TYPE):
+        if lookup != LookupTypes.PARTIAL:
+            return super().get_rank_ordering(lookup)
+
+        # Rank results of equal weight by their similarity to the query
+        return [F('similarity').desc()]
+
+    def get_queryset(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        queryset = super().get_queryset(value, object_types=object_types, lookup=lookup)
+        if lookup != LookupTypes.PARTIAL:
+            return queryset
+
+        return queryset.order_by(
+            'weight', '-similarity', 'object_type', 'object_id'
+        )
+
+
+def bump_generations(labels):
+    """
+    Increment the search result cache generation for each of the specified object types.
+    """
+    for label in labels:
+        key = f'search:generation:{label}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Seed a missing counter using the current time, so that it cannot repeat a prior generation
+            cache.set(key, time.time_ns(), None)
+
+
+def refresh_cache(objects):
+    """
+    Background task for updating the cached representations of objects deferred by the search backend.
+    """
+    search_backend.refresh(objects)
+
+
 def get_backend():
     """
     Initializes and returns the configured search backend.
     """
+    if settings.SEARCH_INDEXING_MODE not in (
+        IndexingModes.IMMEDIATE, IndexingModes.DEFERRED, IndexingModes.BACKGROUND
+    ):
+        raise ImproperlyConfigured(f"Invalid SEARCH_INDEXING_MODE: {settings.SEARCH_INDEXING_MODE}")
+
     try:
         backend_cls = import_string(settings.SEARCH_BACKEND)
     except AttributeError:
@@ -1,7 +1,10 @@
 import uuid
 
 from django.urls import reverse
+from rest_framework import status
 
+from dcim.models import Site
+from netbox.search.backends import search_backend
 from utilities.testing import APITestCase
 
 
@@ -26,3 +29,55 @@ class AppTest(APITestCase):
         response = self.client.get(f'{url}?format=api', **self.header)
 
         self.assertEqual(response.status_code, 200)
+
+
+class SearchAPITest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sites = [
+            Site(name=f'Site {i}', slug=f'site-{i}', description='Test site') for i in range(1, 6)
+        ]
+        Site.objects.bulk_create(sites)
+        search_backend.cache(Site.objects.all())
+
+    def test_search(self):
+        self.add_permissions('dcim.view_site')
+        url = reverse('api-search')
+        response = self.client.get(f'{url}?q=site', **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertIn('count', response.data)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['results'][0]['object_type'], 'dcim.site')
+        self.assertEqual(response.data['results'][0]['object']['name'], 'Site 1')
+
+    def test_search_pagination(self):
+        self.add_permissions('dcim.view_site')
+        url = reverse('api-search')
+
+        # Walk through all pages of results
+        names = []
+        next_url = f'{url}?q=site&limit=2'
+        while next_url:
+            response = self.client.get(next_url, **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            names.extend(result['object']['name'] for result in response.data['results'])
+            next_url = response.data['next']
+
+        self.assertListEqual(names, [f'Site {i}' for i in range(1, 6)])
+
+    def test_search_without_permission(self):
+        url = reverse('api-search')
+        response = self.client.get(f'{url}?q=site', **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_search_invalid_cursor(self):
+        url = reverse('api-search')
+        response = self.client.get(f'{url}?q=site&cursor=invalid', **self.header)
+
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
@@ -1,10 +1,14 @@
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
 
 from dcim.models import Site
 from dcim.search import SiteIndex
 from extras.models import CachedValue
-from netbox.search.backends import search_backend
+from netbox.search import LookupTypes
+from netbox.search.backends import COPY_THRESHOLD, TrigramSearchBackend, search_backend
+from utilities.exceptions import AbortTransaction
 
 
 class SearchBackendTestCase(TestCase):
@@ -90,6 +94,28 @@ class SearchBackendTestCase(TestCase):
                     ),
                 )
 
+    def test_cache_bulk(self):
+        """
+        Test that large batches of objects (which are written using COPY) are cached appropriately
+        """
+        Site.objects.bulk_create([
+            Site(name=f'Bulk Site {i}', slug=f'bulk-site-{i}', description=f'Bulk test site {i}')
+            for i in range(1, 201)
+        ])
+        sites = Site.objects.all()
+        count = search_backend.cache(sites)
+
+        content_type = ContentType.objects.get_for_model(Site)
+        cached_values = CachedValue.objects.filter(object_type=content_type)
+        self.assertGreaterEqual(count, COPY_THRESHOLD)
+        self.assertEqual(cached_values.count(), count)
+        self.assertTrue(
+            cached_values.filter(field='description', value='Bulk test site 200', weight=500).exists()
+        )
+        self.assertFalse(
+            cached_values.filter(timestamp__isnull=True).exists()
+        )
+
     def test_cache_on_save(self):
         """
         Test that an object is automatically cached on calling save().
@@ -123,6 +149,66 @@ class SearchBackendTestCase(TestCase):
             CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
         )
 
+    @override_settings(SEARCH_INDEXING_MODE='deferred')
+    def test_deferred_indexing(self):
+        """
+        Test that changes to objects are cached only once the transaction has been committed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        site = Site.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            site.description = 'Updated description'
+            site.save()
+            site.save()
+            Site.objects.last().delete()
+            self.assertFalse(CachedValue.objects.filter(object_type=content_type).exists())
+
+        # Changes within the transaction should be coalesced and flushed together
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk).count(),
+            len(SiteIndex.fields)
+        )
+        self.assertTrue(
+            CachedValue.objects.filter(object_type=content_type, field='description', value='Updated description')
+        )
+
+        # Deleting the object should remove its cached values
+        with self.captureOnCommitCallbacks(execute=True):
+            site.delete()
+        self.assertFalse(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
+        )
+
+    @override_settings(SEARCH_INDEXING_MODE='deferred')
+    def test_deferred_indexing_rollback(self):
+        """
+        Test that changes within a transaction which has been rolled back are discarded, and do not prevent the object
+        from being cached following a subsequent change.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        site = Site.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    site.description = 'Discarded description'
+                    site.save()
+                    raise AbortTransaction()
+            except AbortTransaction:
+                pass
+        self.assertEqual(len(callbacks), 0)
+        self.assertFalse(CachedValue.objects.filter(object_type=content_type).exists())
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            site.description = 'Updated description'
+            site.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(
+            CachedValue.objects.filter(object_type=content_type, field='description', value='Updated description')
+        )
+
     def test_clear_all(self):
         """
         Test that calling clear() on the backend removes all cached entries.
@@ -138,6 +224,34 @@ class SearchBackendTestCase(TestCase):
             CachedValue.objects.exists()
         )
 
+    @override_settings(SEARCH_CACHE_TIMEOUT=60)
+    def test_search_result_caching(self):
+        """
+        Test that search results are cached, and invalidated when objects of the relevant type are cached.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            search_backend.cache(Site.objects.all())
+        cache.clear()
+        self.assertEqual(len(search_backend.search('site')), 3)
+
+        # Deleting CachedValues directly should not affect the cached results
+        CachedValue.objects.all().delete()
+        self.assertEqual(len(search_backend.search('site')), 3)
+
+        # Caching a new Site should invalidate the cached results
+        with self.captureOnCommitCallbacks(execute=True):
+            site = Site.objects.create(name='Site 4', slug='site-4')
+        self.assertEqual(len(search_backend.search('site')), 1)
+        self.assertEqual(search_backend.search('site')[0].object, site)
+
+        # The generation should be incremented only once per transaction
+        generation = cache.get('search:generation:dcim.site')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for i in range(5, 10):
+                Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cache.get('search:generation:dcim.site'), generation + 1)
+
     def test_search(self):
         """
         Test various searches.
@@ -151,3 +265,43 @@ class SearchBackendTestCase(TestCase):
         self.assertEqual(len(results), 1)
         results = search_backend.search('xxxxx')
         self.assertEqual(len(results), 0)
+
+
+class TrigramSearchBackendTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sites = (
+            Site(name='Site 1', slug='site-1', description='First test site'),
+            Site(name='Site 2', slug='site-2', description='Second test site'),
+            Site(name='Site 3', slug='site-3', description='Third test site'),
+        )
+        Site.objects.bulk_create(sites)
+        search_backend.cache(Site.objects.all())
+
+    def test_search(self):
+        """
+        Test partial and near-miss searches.
+        """
+        backend = TrigramSearchBackend()
+
+        results = backend.search('site')
+        self.assertEqual(len(results), 3)
+        results = backend.search('FIRST')
+        self.assertEqual(len(results), 1)
+        results = backend.search('xxxxx')
+        self.assertEqual(len(results), 0)
+
+        # Misspelled query
+        results = backend.search('frist test site')
+        self.assertIn(Site.objects.get(name='Site 1'), [r.object for r in results])
+
+    def test_search_exact(self):
+        """
+        Test that non-partial lookups are unaffected.
+        """
+        backend = TrigramSearchBackend()
+
+        results = backend.search('site 2', lookup=LookupTypes.EXACT)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].value, 'Site 2')
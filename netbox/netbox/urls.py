@@ -6,7 +6,7 @@ from django.views.static import serve
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
 from account.views import LoginView, LogoutView
-from netbox.api.views import APIRootView, StatusView
+from netbox.api.views import APIRootView, SearchView as APISearchView, StatusView
 from netbox.graphql.schema import schema
 from netbox.graphql.views import NetBoxGraphQLView
 from netbox.plugins.urls import plugin_patterns, plugin_api_patterns
@@ -53,6 +53,7 @@ _patterns = [
     path('api/virtualization/', include('virtualization.api.urls')),
     path('api/vpn/', include('vpn.api.urls')),
     path('api/wireless/', include('wireless.api.urls')),
+    path('api/search/', APISearchView.as_view(), name='api-search'),
     path('api/status/', StatusView.as_view(), name='api-status'),
 
     path(
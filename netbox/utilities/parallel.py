@@ -0,0 +1,31 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+__all__ = (
+    'get_process_pool',
+    'split_range',
+)
+
+
+def get_process_pool(workers):
+    """
+    Return a ProcessPoolExecutor with the specified number of worker processes. Each worker is started fresh (rather
+    than forked) and initializes Django on its own, so that no database connections are shared with the parent.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    )
+
+
+def split_range(start, end, size):
+    """
+    Partition the inclusive integer range [start, end] into consecutive (start, end) tuples, each spanning no more
+    than `size` integers.
+    """
+    return [
+        (i, min(i + size - 1, end)) for i in range(start, end + 1, size)
+    ]
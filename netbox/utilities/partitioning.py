@@ -0,0 +1,225 @@
+import logging
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+__all__ = (
+    'create_partitions',
+    'drop_partitions',
+    'get_partitions',
+    'is_partitioned',
+    'partition_table',
+)
+
+PARTITION_BOUND_RE = re.compile(r"FOR VALUES FROM \('(?P<start>[^']+)'\) TO \('(?P<end>[^']+)'\)")
+PARTITION_KEY_RE = re.compile(r"RANGE \((?P<column>.+)\)")
+
+logger = logging.getLogger('netbox.utilities.partitioning')
+
+
+def _month_start(dt, offset=0):
+    """
+    Return the beginning of the month (in UTC) containing the given datetime, advanced by `offset` months.
+    """
+    month = dt.year * 12 + dt.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _get_partition_name(model, start):
+    return f'{model._meta.db_table}_p{start:%Y_%m}'
+
+
+def is_partitioned(model):
+    """
+    Return True if the database table for the given model is a partitioned table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [model._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions(model):
+    """
+    Return a list of (name, start, end) tuples for each range partition of the model's table, ordered by start time.
+    The default partition (if any) is excluded.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+            [model._meta.db_table]
+        )
+        partitions = []
+        for name, bound in cursor.fetchall():
+            if match := PARTITION_BOUND_RE.match(bound):
+                partitions.append((
+                    name,
+                    datetime.fromisoformat(match.group('start')),
+                    datetime.fromisoformat(match.group('end')),
+                ))
+
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def _get_default_partition(model):
+    """
+    Return the name of the default partition of the model's table (or None if it has none).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'",
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+
+    return row[0] if row else None
+
+
+def create_partitions(model, start, end):
+    """
+    Create a monthly partition of the model's table for each month from `start` through `end` (inclusive) which
+    does not already have one. Any records for a month which have been stored in the default partition are moved
+    into the new partition. (PostgreSQL will not create a partition while the default partition holds records
+    belonging to it.) Returns the names of the partitions created.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    existing = {p[1] for p in get_partitions(model)}
+    default_partition = _get_default_partition(model)
+    created = []
+
+    month = _month_start(start)
+    with connection.cursor() as cursor:
+        if default_partition:
+            default_partition = connection.ops.quote_name(default_partition)
+            cursor.execute("SELECT pg_get_partkeydef(to_regclass(%s))", [model._meta.db_table])
+            column = PARTITION_KEY_RE.match(cursor.fetchone()[0]).group('column')
+
+        while month <= end:
+            next_month = _month_start(month, 1)
+            if month not in existing:
+                name = _get_partition_name(model, month)
+                with transaction.atomic():
+                    # Detach the default partition while moving any records which belong to the new partition
+                    moving = False
+                    if default_partition:
+                        cursor.execute(
+                            f"SELECT EXISTS (SELECT 1 FROM {default_partition} WHERE {column} >= %s AND {column} < %s)",
+                            [month, next_month]
+                        )
+                        moving = cursor.fetchone()[0]
+                    if moving:
+                        logger.warning(f"Moving records from the default partition of {table} into {name}")
+                        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default_partition}")
+                    cursor.execute(
+                        f"CREATE TABLE {connection.ops.quote_name(name)} PARTITION OF {table} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        [month, next_month]
+                    )
+                    if moving:
+                        cursor.execute(
+                            f"WITH moved AS ("
+                            f"DELETE FROM {default_partition} WHERE {column} >= %s AND {column} < %s RETURNING *"
+                            f") INSERT INTO {table} SELECT * FROM moved",
+                            [month, next_month]
+                        )
+                        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default_partition} DEFAULT")
+                created.append(name)
+            month = next_month
+
+    return created
+
+
+def drop_partitions(model, cutoff):
+    """
+    Detach and drop all partitions of the model's table containing only records older than the cutoff time. Returns
+    the names of the partitions dropped.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    dropped = []
+
+    with connection.cursor() as cursor:
+        for name, start, end in get_partitions(model):
+            if end > cutoff:
+                break
+            with transaction.atomic():
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {connection.ops.quote_name(name)}")
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            dropped.append(name)
+
+    return dropped
+
+
+def partition_table(model, field_name, months_ahead=3):
+    """
+    Convert the model's table into a table partitioned by month on the given date/time field. Monthly partitions are
+    created to cover all existing records and the specified number of months ahead, along with a default partition
+    to hold any records outside these ranges. All existing records are copied to the new table, and all indexes and
+    foreign key constraints are recreated.
+
+    The primary key of a partitioned table must include the partitioning field, so it is replaced with a composite
+    key. (Primary key values continue to be assigned from a sequence, so remain unique.)
+    """
+    table = model._meta.db_table
+    old_table = f'{table}_old'
+    sequence = f'{table}_id_seq'
+    pk_column = model._meta.pk.column
+    column = model._meta.get_field(field_name).column
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+
+        # Record the existing indexes & foreign keys (excluding the primary key), to be recreated once the original
+        # table has been dropped
+        cursor.execute(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary",
+            [old_table]
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [old_table]
+        )
+        foreign_keys = cursor.fetchall()
+
+        # Create the partitioned table
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({qn(column)})"
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk_column)} DROP DEFAULT")
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn(pk_column)}, {qn(column)})")
+
+        # Create partitions
+        cursor.execute(f"SELECT MIN({qn(column)}) FROM {qn(old_table)}")
+        now = datetime.now(tz=timezone.utc)
+        earliest = cursor.fetchone()[0] or now
+        create_partitions(model, earliest, _month_start(now, months_ahead))
+        cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+        # Copy all records and drop the original table
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+
+        # Partitioned tables do not support identity columns (prior to PostgreSQL 17), so assign primary keys from a
+        # sequence. (The original sequence was dropped along with the original table.)
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn(pk_column)}")
+        cursor.execute(
+            f"SELECT setval(%s, (SELECT COALESCE(MAX({qn(pk_column)}), 0) + 1 FROM {qn(table)}), false)",
+            [sequence]
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk_column)} SET DEFAULT nextval(%s)", [sequence])
+
+        # Recreate indexes & foreign keys
+        for index in indexes:
+            cursor.execute(re.sub(rf'\bON (ONLY )?(\S+\.)?{re.escape(old_table)}\b', f'ON {qn(table)}', index))
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
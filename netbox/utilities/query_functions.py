@@ -1,9 +1,10 @@
 from django.contrib.postgres.aggregates import JSONBAgg
-from django.db.models import Func
+from django.db.models import BigIntegerField, Func
 
 __all__ = (
     'CollateAsChar',
     'EmptyGroupByJSONBAgg',
+    'TransactionID',
 )
 
 
@@ -22,3 +23,12 @@ class EmptyGroupByJSONBAgg(JSONBAgg):
     incorrect. This subclass overrides the Django ORM aggregation control to remove the GROUP BY.
     """
     contains_aggregate = False
+
+
+class TransactionID(Func):
+    """
+    Return the ID of the current transaction (assigning one if necessary). Transaction IDs returned by this function
+    include the transaction ID epoch, so they do not wrap around.
+    """
+    function = 'txid_current'
+    output_field = BigIntegerField()
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+
+from dcim.models import Site
+from extras.choices import ObjectChangeActionChoices
+from extras.models import ObjectChange
+from utilities.partitioning import create_partitions, drop_partitions, get_partitions, is_partitioned, partition_table
+
+
+class PartitioningTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        site_type = ContentType.objects.get_for_model(Site)
+        now = datetime.now(tz=timezone.utc)
+
+        # Create ObjectChanges spanning the past year
+        for i in range(12):
+            objectchange = ObjectChange.objects.create(
+                changed_object_type=site_type,
+                changed_object_id=i,
+                action=ObjectChangeActionChoices.ACTION_CREATE,
+                user_name='user1',
+                object_repr=f'Site {i}'
+            )
+            ObjectChange.objects.filter(pk=objectchange.pk).update(time=now - timedelta(days=30 * i))
+
+    def test_partition_table(self):
+        # Fire any deferred constraint checks, which would otherwise prevent altering the table
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        self.assertFalse(is_partitioned(ObjectChange))
+        pks = set(ObjectChange.objects.values_list('pk', flat=True))
+
+        partition_table(ObjectChange, 'time', months_ahead=2)
+        self.assertTrue(is_partitioned(ObjectChange))
+
+        # All records should have been retained
+        self.assertEqual(set(ObjectChange.objects.values_list('pk', flat=True)), pks)
+
+        # Partitions should cover all existing records and the next two months
+        partitions = get_partitions(ObjectChange)
+        earliest = ObjectChange.objects.order_by('time').first().time
+        self.assertLessEqual(partitions[0][1], earliest)
+        self.assertGreater(partitions[-1][2], datetime.now(tz=timezone.utc) + timedelta(days=31))
+
+        # New records should be assigned the next primary key
+        objectchange = ObjectChange.objects.create(
+            changed_object_type=ContentType.objects.get_for_model(Site),
+            changed_object_id=100,
+            action=ObjectChangeActionChoices.ACTION_CREATE,
+            user_name='user1',
+            object_repr='Site 100'
+        )
+        self.assertGreater(objectchange.pk, max(pks))
+
+        # Creating partitions should be idempotent
+        self.assertEqual(create_partitions(ObjectChange, partitions[0][1], partitions[-1][1]), [])
+
+        # Drop partitions older than ~six months
+        cutoff = datetime.now(tz=timezone.utc) - timedelta(days=185)
+        dropped = drop_partitions(ObjectChange, cutoff)
+        self.assertEqual(dropped, [p[0] for p in partitions if p[2] <= cutoff])
+        self.assertFalse(ObjectChange.objects.filter(time__lt=partitions[len(dropped)][1]).exists())
+        self.assertTrue(ObjectChange.objects.filter(time__gte=cutoff).exists())
+
+    def test_create_partition_from_default(self):
+        # Fire any deferred constraint checks, which would otherwise prevent altering the table
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        partition_table(ObjectChange, 'time', months_ahead=1)
+        partitions = get_partitions(ObjectChange)
+
+        # Record a change beyond the last partition, which will be stored in the default partition
+        future = partitions[-1][2] + timedelta(days=45)
+        objectchange = ObjectChange.objects.create(
+            changed_object_type=ContentType.objects.get_for_model(Site),
+            changed_object_id=100,
+            action=ObjectChangeActionChoices.ACTION_CREATE,
+            user_name='user1',
+            object_repr='Site 100'
+        )
+        ObjectChange.objects.filter(pk=objectchange.pk).update(time=future)
+        count = ObjectChange.objects.count()
+
+        # Creating a partition for the month should move the record out of the default partition
+        created = create_partitions(ObjectChange, partitions[-1][2], future)
+        self.assertEqual(len(created), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {created[-1]}")
+            self.assertEqual(cursor.fetchall(), [(objectchange.pk,)])
+            cursor.execute(f"SELECT COUNT(*) FROM {ObjectChange._meta.db_table}_default")
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(ObjectChange.objects.count(), count)
@@ -2,6 +2,7 @@ from django.http import QueryDict
 from django.test import TestCase
 
 from utilities.data import deepmerge
+from utilities.parallel import split_range
 from utilities.query import dict_to_filter_params
 from utilities.querydict import normalize_querydict
 
@@ -130,3 +131,13 @@ class DeepMergeTest(TestCase):
             deepmerge(dict1, dict2),
             merged
         )
+
+
+class SplitRangeTest(TestCase):
+    """
+    Validate the behavior of the split_range() utility.
+    """
+    def test_split_range(self):
+        self.assertListEqual(split_range(1, 10, 4), [(1, 4), (5, 8), (9, 10)])
+        self.assertListEqual(split_range(1, 8, 4), [(1, 4), (5, 8)])
+        self.assertListEqual(split_range(5, 5, 100), [(5, 5)])
@@ -0,0 +1,68 @@
+from functools import partial
+
+from django.db import transaction
+
+__all__ = (
+    'get_pending_batches',
+    'get_transaction_batch',
+)
+
+
+def _get_savepoint_id(connection):
+    """
+    Return the ID of the innermost savepoint within the current transaction (or None if no savepoint has been created).
+    """
+    return next((sid for sid in reversed(connection.savepoint_ids) if sid), None)
+
+
+def _run_batch_hook(batches, sid, flush, batch):
+    # Stop collecting into the batch before it is flushed
+    if batches.get(sid, (None, None))[1] is batch:
+        del batches[sid]
+    flush(batch)
+
+
+def get_pending_batches(batches):
+    """
+    Return all batches which belong to transactions (or savepoints) that remain open or have been committed, in the
+    order in which they were created. `batches` is a dictionary maintained by the caller and populated by
+    get_transaction_batch().
+
+    Each batch is tied to an on_commit() hook. Django discards the hooks registered within a transaction or savepoint
+    when it is rolled back, so any batch whose hook is no longer pending is discarded here along with it.
+    """
+    connection = transaction.get_connection()
+    pending_hooks = {id(hook) for _, hook, _ in connection.run_on_commit}
+    for sid, (hook, batch) in list(batches.items()):
+        if id(hook) not in pending_hooks:
+            del batches[sid]
+
+    return [batch for hook, batch in batches.values()]
+
+
+def get_transaction_batch(batches, flush, factory=dict):
+    """
+    Return a batch (created by calling `factory`) in which to collect work arising from the current transaction or
+    savepoint. When a batch is created, `flush(batch)` is registered to be called once the transaction has been
+    committed. Batches which have been rolled back are discarded (see get_pending_batches()), so their contents are
+    never flushed.
+
+    This must be called within an atomic block.
+
+    :param batches: A dictionary maintained by the caller, mapping savepoint IDs to their batches
+    :param flush: A callable which accepts a batch
+    :param factory: A callable which returns a new (empty) batch
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError("Batches can be collected only within an atomic block.")
+
+    get_pending_batches(batches)
+    sid = _get_savepoint_id(connection)
+    if sid not in batches:
+        batch = factory()
+        hook = partial(_run_batch_hook, batches, sid, flush, batch)
+        transaction.on_commit(hook)
+        batches[sid] = (hook, batch)
+
+    return batches[sid][1]